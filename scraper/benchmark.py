@@ -0,0 +1,534 @@
+"""
+Offline benchmarks of the hot paths, so a slower extractor or export shows up before a 10k property run does.
+
+Nothing here touches the site. The corpus is the HTML in fixtures/ (property_*.html.gz and search_*.html.gz),
+or, when that folder is empty, synthetic ~1 MB pages rendered by fixture_server.py. Real pages can be turned
+into fixtures from the page cache; addresses, agent contacts and phone numbers are replaced on the way:
+
+    python benchmark.py fixtures --from-cache data/page_cache --limit 20
+
+Timed cases:
+  * every page source / lxml / driver strategy of each extract_* on every fixture page, and full
+    extract_complete_property_data runs ('live', 'structured', 'script'); the driver is FixtureDriver, an lxml stand-in
+    for the browser, so this is the Python side only (round trips are measured live, see instrumentation.py)
+  * flatten_property_data, save_all_properties (in memory and streamed), checkpoint writing and the typed export
+    (written with write_typed_dataset and loaded back with load_typed_dataset) at 1k/10k/100k records
+
+Every case reports its median time over --repeat rounds, throughput and peak memory (tracemalloc), and is
+compared with the stored baseline; anything more than --tolerance slower is reported and the exit code is 1.
+Absolute seconds only hold on the machine that stored them, so each round also times CALIBRATION_CASE (lxml
+parsing the same corpus, in the same process, right before the case) and the comparison uses the median ratio:
+a slower host slows the calibration just as much and is not a regression, a slower extractor is. Cases under
+MIN_SAMPLE_SECONDS are looped so each sample is long enough to time.
+
+    python benchmark.py                  # run and compare with benchmark_baseline.json
+    python benchmark.py --quick          # 1k/10k records only
+    python benchmark.py --save-baseline  # store this run as the new baseline (after an intended change)
+
+A faster page_patterns must still find the same things. parity runs every page text parser of the current
+page_patterns and of the one at an earlier git revision on the corpus (plus every cached property page with
+--from-cache) and lists each page and parser where the two disagree; the exit code is 1 if any do. The old
+patterns can take seconds per page, so this is slow on purpose:
+
+    python benchmark.py parity --against 2f704ca [--from-cache data/page_cache] [--limit 200]
+"""
+import gc
+import os
+import re
+import sys
+import json
+import glob
+import gzip
+import time
+import copy
+import types
+import shutil
+import argparse
+import statistics
+import subprocess
+import tempfile
+import tracemalloc
+import contextlib
+from lxml import etree, html as lxml_html
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+from zillow import MultiPropertyZillowScraper, flatten_property_data
+from html_extractor import ZillowHtmlExtractor, element_text
+from embedded_data import extract_embedded_property, find_property_json
+from page_script import PAGE_SCRIPT
+from property_record import new_property_record
+from typed_export import SCHEMA, write_typed_dataset, load_typed_dataset
+from listings import find_list_results, search_result_count, list_result_record
+from fixture_server import make_listings, property_page, search_page, PER_PAGE
+import page_patterns
+from page_patterns import (
+    find_image_url_in_source, parse_facts_from_source_json, parse_page_facts, parse_features,
+    parse_scores_from_source, parse_schools, parse_region, parse_nearby_cities_from_source,
+)
+
+# cssselect is optional: without it CSS lookups find nothing and the extractors go on with their XPath/source fallbacks
+try:
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    CSSSelector = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(HERE, 'fixtures')
+BASELINE_PATH = os.path.join(HERE, 'benchmark_baseline.json')
+CALIBRATION_CASE = 'lxml:parse'  # every case is compared relative to this one (see compare)
+MIN_SAMPLE_SECONDS = 0.1  # faster cases are called in a loop until one timed sample takes this long, like timeit
+RECORD_COUNTS = [1000, 10000, 100000]
+
+
+# ---------------------------------------------------------------- corpus
+
+CONTACT_FIELDS = re.compile(r'"(agentName|agentEmail|agentPhoneNumber|agentLicenseNumber|brokerName|brokerPhoneNumber|'
+                            r'coAgentName|coAgentNumber|buyerAgentName|buyerBrokerageName)":"[^"]*"')
+PHONE_PATTERN = re.compile(r'\(?\b\d{3}\)?[-.\s]\d{3}-\d{4}\b')
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+\.[\w.]+')
+
+
+def anonymize(page_html):
+    """Best effort scrub of a real page: listing address, agent/broker contacts, phone numbers and emails"""
+    prop = find_property_json(page_html) or {}
+    street = (prop.get('address') or {}).get('streetAddress')
+    if street:
+        page_html = page_html.replace(street, '1 Fixture St').replace(street.replace(' ', '-'), '1-Fixture-St')
+    page_html = CONTACT_FIELDS.sub(lambda match: f'"{match.group(1)}":"Anonymized"', page_html)
+    page_html = PHONE_PATTERN.sub('(555) 555-0100', page_html)
+    return EMAIL_PATTERN.sub('agent@example.com', page_html)
+
+
+def export_fixtures(cache_dir, limit=20):
+    """Copy the newest cached pages (anonymized) into fixtures/ as the benchmark corpus"""
+    from page_cache import PageCache
+    cache = PageCache(cache_dir)
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    written = 0
+    for kind in ('property', 'search'):
+        for index, (url, _, sha256) in enumerate(cache.entries(kind)[:limit]):
+            page_html = cache.read_blob(sha256)
+            if page_html is None:
+                continue
+            with gzip.open(os.path.join(FIXTURES_DIR, f"{kind}_{index:03d}.html.gz"), 'wt', encoding='utf-8') as f:
+                f.write(anonymize(page_html))
+            written += 1
+    return written
+
+
+def load_corpus(property_pages=8, search_pages=3):
+    """(property pages, search pages) as lists of (url, html): fixtures/ if it has any, else synthetic pages"""
+    corpus = {'property': [], 'search': []}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html.gz'))):
+        kind = os.path.basename(path).split('_')[0]
+        if kind in corpus:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                page_html = f.read()
+            canonical = re.search(r'<link rel="canonical" href="([^"]+)"', page_html)
+            corpus[kind].append((canonical.group(1) if canonical else f"https://www.zillow.com/homedetails/{os.path.basename(path)}", page_html))
+    if not corpus['property']:
+        listings = make_listings(max(property_pages, search_pages * PER_PAGE))
+        corpus['property'] = [(listing['detailUrl'], property_page(listing)) for listing in listings[:property_pages]]
+    if not corpus['search']:
+        listings = make_listings(search_pages * PER_PAGE)
+        corpus['search'] = [(f"https://www.zillow.com/springfield-ma/{page}_p/",
+                             search_page(listings[(page - 1) * PER_PAGE:page * PER_PAGE], len(listings), page))
+                            for page in range(1, search_pages + 1)]
+    return corpus['property'], corpus['search']
+
+
+# ---------------------------------------------------------------- browser stand-in
+
+class FixtureElement:
+    def __init__(self, element):
+        self.element = element
+
+    @property
+    def text(self):
+        return element_text(self.element)
+
+    def get_attribute(self, name):
+        return self.element.get(name)
+
+    def find_element(self, by, selector):
+        found = self.find_elements(by, selector)
+        if not found:
+            raise NoSuchElementException(selector)
+        return found[0]
+
+    def find_elements(self, by, selector):
+        if by == By.XPATH:
+            results = self.element.xpath(selector)
+        elif by == By.CSS_SELECTOR and CSSSelector is not None:
+            results = CSSSelector(selector)(self.element)
+        else:
+            results = []
+        return [FixtureElement(result) for result in results if isinstance(result, etree._Element)]
+
+
+def visible_elements(nodes):
+    return [node for node in nodes if isinstance(node, etree._Element) and node.tag not in ('script', 'style', 'noscript')]
+
+
+def ancestor_text(element, levels):
+    for _ in range(levels):
+        element = element.getparent() if element is not None else None
+    return element_text(element) if element is not None else ''
+
+
+class FixtureDriver(FixtureElement):
+    """
+    Just enough of a WebDriver for the extract_* methods, answered from an lxml tree of a fixture page.
+    Scripts are not run: execute_script returns True, so readiness checks pass at once and nothing sleeps.
+    The page script (page_script.py) is answered by page_payload(), the same XPaths evaluated with lxml.
+    """
+    def __init__(self, url, page_html):
+        super().__init__(lxml_html.fromstring(page_html))
+        self.current_url = url
+        self.page_source = page_html
+
+    def execute_script(self, script, *args):
+        return True
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_async_script(self, script, *args):
+        if script == PAGE_SCRIPT:
+            return self.page_payload(*args)
+        return None
+
+    def page_payload(self, queries, property_keys, settings):
+        prop = find_property_json(self.page_source)
+        visible = copy.deepcopy(self.element.body if self.element.find('body') is not None else self.element)
+        for node in visible.xpath('.//script | .//style'):
+            node.drop_tree()
+        sections = {}
+        for name, query in queries.items():
+            context = self.element
+            if query.get('within'):
+                anchors = self.element.xpath(query['within']['xpath'])
+                context = anchors[0] if anchors else None
+                for _ in range(query['within']['up']):
+                    context = context.getparent() if context is not None else None
+            sections[name] = [[node.get(query['attr']) if query.get('attr') else [ancestor_text(node, levels) for levels in query.get('up', [0])]
+                               for node in visible_elements(context.xpath(xpath))[:query['limit']]] if context is not None else []
+                              for xpath in query['xpaths']]
+        return {'property': {key: prop[key] for key in property_keys if key in prop} if prop else None,
+                'text': element_text(visible), 'sections': sections}
+
+
+# ---------------------------------------------------------------- cases
+
+def strategy_cases(property_pages, search_pages):
+    """[(name, function, units)] of the per page strategies, units = pages handled by one call"""
+    pages = [page_html for _, page_html in property_pages]
+    lowered = [page_html.lower() for page_html in pages]
+    trees = [lxml_html.fromstring(page_html) for page_html in pages]
+    extractor = ZillowHtmlExtractor()
+    scraper = MultiPropertyZillowScraper(driver=FixtureDriver(*property_pages[0]))
+
+    def each_page(parse, texts=pages):
+        return lambda: [parse(text, new_property_record('fixture')) for text in texts]
+
+    cases = [
+        ('source:embedded_json', each_page(extract_embedded_property), len(pages)),
+        ('source:find_image_url_in_source', lambda: [find_image_url_in_source(text) for text in pages], len(pages)),
+        ('source:parse_facts_from_source_json', each_page(parse_facts_from_source_json), len(pages)),
+        ('source:parse_page_facts', each_page(parse_page_facts), len(pages)),
+        ('source:parse_features', each_page(parse_features, lowered), len(pages)),
+        ('source:parse_scores_from_source', each_page(parse_scores_from_source), len(pages)),
+        ('source:parse_schools', each_page(parse_schools), len(pages)),
+        ('source:parse_region', lambda: [parse_region(text) for text in pages], len(pages)),
+        ('source:parse_nearby_cities_from_source', lambda: [parse_nearby_cities_from_source(text) for text in pages], len(pages)),
+        ('lxml:parse', lambda: [lxml_html.fromstring(text) for text in pages], len(pages)),
+        ('lxml:extract', lambda: [extractor.extract(text, url=url) for url, text in property_pages], len(pages)),
+    ]
+    for method in ['extract_property_image_url', 'extract_price_and_basic_info', 'extract_property_features',
+                   'extract_neighborhood_scores', 'extract_schools', 'extract_environmental_risks',
+                   'extract_market_data', 'extract_nearby_cities']:
+        bound = getattr(extractor, method)
+        cases.append((f"lxml:{method}", lambda bound=bound: [bound(tree, text, new_property_record('fixture'))
+                                                             for tree, text in zip(trees, pages)], len(pages)))
+
+    drivers = [FixtureDriver(url, page_html) for url, page_html in property_pages]
+
+    def on_every_page(run):
+        def call():
+            for driver in drivers:
+                scraper.driver = driver
+                scraper.page_snapshot = None
+                scraper.scrolled_depth = 0
+                run()
+        return call
+
+    for method in ['extract_property_image_url', 'extract_price_and_basic_info', 'extract_property_features_detailed',
+                   'extract_neighborhood_scores_detailed', 'extract_schools_detailed', 'extract_environmental_risks',
+                   'extract_market_data_detailed', 'extract_nearby_cities']:
+        bound = getattr(scraper, method)
+        cases.append((f"driver:{method}", on_every_page(lambda bound=bound: bound(new_property_record('fixture'))), len(drivers)))
+    for mode in ['live', 'structured', 'script']:
+        def complete(mode=mode):
+            scraper.extraction_mode = mode
+            scraper.extract_complete_property_data()
+        cases.append((f"driver:extract_complete_property_data[{mode}]", on_every_page(complete), len(drivers)))
+
+    search = [page_html for _, page_html in search_pages]
+    cases.append(('search:list_results', lambda: [[list_result_record(result) for result in find_list_results(text)]
+                                                  for text in search], len(search)))
+    cases.append(('search:search_result_count', lambda: [search_result_count(text) for text in search], len(search)))
+    return cases
+
+
+def sample_records(property_pages):
+    extractor = ZillowHtmlExtractor()
+    return [extractor.extract(page_html, url=url) for url, page_html in property_pages]
+
+
+def records_of(samples, count):
+    """count records cycled from the extracted samples, each with its own url"""
+    return [dict(samples[index % len(samples)], url=f"{samples[index % len(samples)]['url']}?n={index}") for index in range(count)]
+
+
+def export_cases(samples, counts, workdir):
+    """[(name, function, units)] of the per record paths: flatten, save (in memory / streamed), checkpoints, typed export"""
+    cases = []
+    for count in counts:
+        label = f"{count // 1000}k"
+        records = records_of(samples, count)
+
+        def save_in_memory(records=records):
+            scraper = MultiPropertyZillowScraper(driver=FixtureDriver('about:blank', '<html></html>'))
+            scraper.all_properties_data = records
+            scraper.save_all_properties(os.path.join(workdir, 'memory'))
+
+        def save_streamed(records=records):
+            scraper = MultiPropertyZillowScraper(driver=FixtureDriver('about:blank', '<html></html>'))
+            jsonl_path = os.path.join(workdir, 'streamed.jsonl')
+            if os.path.exists(jsonl_path):
+                os.remove(jsonl_path)
+            scraper.start_streaming(jsonl_path)
+            for property_data in records:
+                scraper.record_property(property_data)
+            scraper.save_all_properties(os.path.join(workdir, 'streamed'))
+
+        def checkpoint(records=records):
+            scraper = MultiPropertyZillowScraper(driver=FixtureDriver('about:blank', '<html></html>'))
+            scraper.all_properties_data = records[:count - count % 50]  # the checkpoint only writes on multiples of 50
+            with working_directory(workdir):
+                scraper.save_progress_checkpoint('benchmark', count)
+
+        def typed_round_trip(records=records):
+            # written and read back the way a notebook does, a dataset that does not load fails the run
+            root = os.path.join(workdir, 'typed')
+            rows = write_typed_dataset(records, root, 1, 'benchmark')
+            shape = load_typed_dataset(root).shape
+            if shape != (rows, len(SCHEMA) + 2):  # + the queue and county partition columns
+                raise AssertionError(f"typed dataset of {rows} rows loaded back as {shape}")
+
+        cases += [
+            (f"export:flatten_property_data@{label}", lambda records=records: [flatten_property_data(record) for record in records], count),
+            (f"export:save_all_properties@{label}", save_in_memory, count),
+            (f"export:save_all_properties[streamed]@{label}", save_streamed, count),
+            (f"export:save_progress_checkpoint@{label}", checkpoint, count),
+            (f"export:typed_export_round_trip@{label}", typed_round_trip, count),
+        ]
+    return cases
+
+
+# ---------------------------------------------------------------- running
+
+@contextlib.contextmanager
+def working_directory(path):
+    original = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(original)
+
+
+def sample_loops(function):
+    """Calls per timed sample, a single perf_counter reading of a sub-millisecond case is mostly noise"""
+    started = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - started
+    return 1 if elapsed >= MIN_SAMPLE_SECONDS else min(1000, int(MIN_SAMPLE_SECONDS / max(elapsed, 1e-6)) + 1)
+
+
+def timed(function, loops=1):
+    """Seconds per call over one sample of `loops` calls, garbage collector off as in timeit"""
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(loops):
+            function()
+        return (time.perf_counter() - started) / loops
+    finally:
+        gc.enable()
+
+
+def measure(function, units, rounds, calibrate, calibration_loops):
+    """
+    `rounds` samples of the case, each right after a sample of the calibration case, then one more run under
+    tracemalloc for the peak memory. seconds and relative are medians, so one disturbed round does not move them.
+    """
+    loops = sample_loops(function)
+    seconds, relative = [], []
+    for _ in range(rounds):
+        calibration = timed(calibrate, calibration_loops)
+        elapsed = timed(function, loops)
+        seconds.append(elapsed)
+        relative.append(elapsed / calibration)
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    median = statistics.median(seconds)
+    return {'seconds': round(median, 5), 'per_second': round(units / median, 1) if median else None,
+            'units': units, 'peak_mb': round(peak / 1024 ** 2, 2), 'relative': round(statistics.median(relative), 4)}
+
+
+def run(counts, repeat=5, match=None):
+    property_pages, search_pages = load_corpus()
+    print(f"Corpus: {len(property_pages)} property pages, {len(search_pages)} search pages"
+          f" ({'fixtures/' if glob.glob(os.path.join(FIXTURES_DIR, '*.html.gz')) else 'synthetic'})")
+    workdir = tempfile.mkdtemp(prefix='zillow_benchmark_')
+    results = {}
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            samples = sample_records(property_pages)
+            cases = strategy_cases(property_pages, search_pages) + export_cases(samples, counts, workdir)
+        calibrate = next(function for name, function, _ in cases if name == CALIBRATION_CASE)
+        calibration_loops = sample_loops(calibrate)
+        for name, function, units in cases:
+            if match and match not in name:
+                continue
+            # the host speed drifts during a long run, so every round times the calibration right before the case;
+            # the 100k cases take a while, one round of those is enough
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                results[name] = measure(function, units, repeat if units < 50000 else 1, calibrate, calibration_loops)
+            print(f"  {name:<58} {results[name]['seconds']:>9.4f}s  {results[name]['relative']:>9}x  {results[name]['per_second']:>10}/s  {results[name]['peak_mb']:>8} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+# ---------------------------------------------------------------- parity
+
+def patterns_at(revision):
+    """page_patterns.py as it was at a git revision, loaded as a separate module"""
+    source = subprocess.run(['git', 'show', f'{revision}:./page_patterns.py'], cwd=HERE,
+                            capture_output=True, text=True, check=True).stdout
+    module = types.ModuleType(f'page_patterns_{revision}')
+    exec(compile(source, f'{revision}:page_patterns.py', 'exec'), module.__dict__)
+    return module
+
+
+def parser_outputs(patterns, page_html):
+    """What every page text parser of a page_patterns module makes of one page"""
+    outputs = {}
+    for name in ['parse_facts_from_source_json', 'parse_page_facts', 'parse_scores_from_source', 'parse_schools']:
+        property_data = new_property_record('fixture', 'fixture')
+        getattr(patterns, name)(page_html, property_data)
+        outputs[name] = property_data
+    property_data = new_property_record('fixture', 'fixture')
+    patterns.parse_features(page_html.lower(), property_data)  # callers hand it the lowercased page
+    outputs['parse_features'] = property_data
+    for name in ['find_image_url_in_source', 'parse_region', 'parse_nearby_cities_from_source']:
+        outputs[name] = getattr(patterns, name)(page_html)
+    return outputs
+
+
+def parity(revision, cache_dir=None, limit=200):
+    """[(url, parser, old value, new value)] wherever the current page_patterns disagrees with the revision's"""
+    reference = patterns_at(revision)
+    pages = load_corpus()[0]
+    if cache_dir:
+        from page_cache import PageCache
+        cache = PageCache(cache_dir)
+        pages += [(url, page_html) for url, _, sha256 in cache.entries('property')[:limit]
+                  for page_html in [cache.read_blob(sha256)] if page_html is not None]
+    differences = []
+    for url, page_html in pages:
+        old, new = parser_outputs(reference, page_html), parser_outputs(page_patterns, page_html)
+        for name in old:
+            if isinstance(old[name], dict):
+                differences += [(url, f"{name}.{field}", old[name][field], new[name].get(field))
+                                for field in old[name] if old[name][field] != new[name].get(field)]
+            elif old[name] != new[name]:
+                differences.append((url, name, old[name], new[name]))
+    print(f"{len(pages)} pages checked against page_patterns at {revision}")
+    return differences
+
+
+def compare(results, baseline, tolerance):
+    """
+    Names of the cases more than tolerance slower than the baseline. Cases are compared by their time relative to
+    CALIBRATION_CASE, not by seconds, so a baseline stored on another machine still holds.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name == CALIBRATION_CASE or not baseline.get(name, {}).get('relative') or not result.get('relative'):
+            continue
+        ratio = result['relative'] / baseline[name]['relative']
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            print(f"  ⚠️ {name}: {ratio:.2f}x slower ({baseline[name]['relative']}x -> {result['relative']}x {CALIBRATION_CASE})")
+        elif ratio < 1 / (1 + tolerance):
+            print(f"  🚀 {name}: {1 / ratio:.2f}x faster ({baseline[name]['relative']}x -> {result['relative']}x {CALIBRATION_CASE})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the extraction and export hot paths")
+    parser.add_argument('command', nargs='?', choices=['run', 'fixtures', 'parity'], default='run')
+    parser.add_argument('--from-cache', help="fixtures/parity: page cache directory to take the pages from")
+    parser.add_argument('--limit', type=int, default=20, help="fixtures/parity: pages of each kind")
+    parser.add_argument('--against', help="parity: git revision of page_patterns.py to compare with")
+    parser.add_argument('--quick', action='store_true', help="skip the 100k record cases")
+    parser.add_argument('--match', help="only cases whose name contains this text")
+    parser.add_argument('--repeat', type=int, default=5, help="timed rounds per case, the median is kept")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    # 0.5: on a shared single core host clean runs of the same tree already differ by up to ~1.4x
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed slowdown against the baseline (0.5 = 50%%)")
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    if args.command == 'fixtures':
+        if not args.from_cache:
+            parser.error("fixtures needs --from-cache <page cache dir>")
+        print(f"Wrote {export_fixtures(args.from_cache, args.limit)} anonymized pages to {FIXTURES_DIR}")
+        sys.exit(0)
+
+    if args.command == 'parity':
+        if not args.against:
+            parser.error("parity needs --against <git revision>")
+        differences = parity(args.against, args.from_cache, args.limit)
+        for url, name, old_value, new_value in differences:
+            print(f"  ⚠️ {url} {name}: {old_value!r} -> {new_value!r}")
+        print(f"❌ {len(differences)} difference(s)" if differences else "✅ Same results as before")
+        sys.exit(1 if differences else 0)
+
+    results = run(RECORD_COUNTS[:2] if args.quick else RECORD_COUNTS, args.repeat, args.match)
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} case(s) slower than the baseline")
+            sys.exit(1)
+        print("✅ No regression against the baseline")
+    else:
+        print(f"No baseline at {args.baseline}, store one with --save-baseline")
@@ -0,0 +1,125 @@
+"""
+Browser lifecycle: recycle Chrome before it gets slow, instead of only replacing it once it is dead.
+
+One Chrome serves a whole queue of cities and hundreds of tabs. Its memory only grows (detached DOMs,
+renderer caches, the performance log...) and with it every page gets slower, while check_driver_health only
+notices a browser that stopped answering. BrowserLifecycle watches the Chrome process tree with psutil
+(chromedriver, the browser and every renderer/GPU/utility child): summed RSS and CPU, sampled every
+check_every pages. It asks for a recycle after max_pages pages or as soon as the RSS goes over max_rss_mb
+(or the CPU stays over max_cpu_percent, off by default).
+
+The scraper does the recycle between two search pages (see MultiPropertyZillowScraper.recycle_browser_if_needed):
+quit, kill whatever of the old tree survived, start a fresh driver and open the next search page by URL
+(with_page), so the city goes on where it was. scraped_urls, the sink and the crawl state live on the
+scraper, not in the browser, so nothing is lost.
+"""
+import psutil
+
+
+class BrowserLifecycle:
+    def __init__(self, max_pages=200, max_rss_mb=3000, max_cpu_percent=None, check_every=5):
+        self.max_pages = max_pages              # pages (search + property) per browser, 0 = no limit
+        self.max_rss_mb = max_rss_mb            # summed RSS of the Chrome tree, 0 = no limit
+        self.max_cpu_percent = max_cpu_percent  # summed CPU % averaged since the last sample, None = only watched
+        self.check_every = check_every          # pages between two psutil samples
+        self.pages = 0                          # pages of the current browser
+        self.total_pages = 0
+        self.processes = {}                     # pid -> psutil.Process, kept so cpu_percent() measures between samples
+        self.last_sample = None
+        self.driver = None
+        self.recycles = []                      # (reason, pages, rss_mb) per recycle
+        self.peak_rss_mb = 0.0
+
+    def watch(self, driver):
+        """A new browser: start counting from zero"""
+        self.driver = driver
+        self.pages = 0
+        self.processes = {}
+        self.last_sample = None
+        self.sample()  # primes cpu_percent
+
+    def root_pids(self):
+        """chromedriver (selenium) and the browser itself (undetected_chromedriver keeps its pid)"""
+        pids = []
+        service = getattr(self.driver, 'service', None)
+        process = getattr(service, 'process', None)
+        if getattr(process, 'pid', None):
+            pids.append(process.pid)
+        if getattr(self.driver, 'browser_pid', None):
+            pids.append(self.driver.browser_pid)
+        return pids
+
+    def process_tree(self):
+        tree = {}
+        for pid in self.root_pids():
+            try:
+                root = psutil.Process(pid)
+                for process in [root] + root.children(recursive=True):
+                    tree[process.pid] = self.processes.get(process.pid, process)
+            except psutil.Error:
+                continue
+        self.processes = tree
+        return list(tree.values())
+
+    def sample(self):
+        """{'processes', 'rss_mb', 'cpu_percent'} of the whole Chrome tree right now"""
+        rss = 0
+        cpu = 0.0
+        processes = self.process_tree()
+        for process in processes:
+            try:
+                rss += process.memory_info().rss
+                cpu += process.cpu_percent(None)  # since the previous call on the same Process (0.0 the first time)
+            except psutil.Error:
+                continue
+        self.last_sample = {'processes': len(processes), 'rss_mb': round(rss / 1024 ** 2, 1), 'cpu_percent': round(cpu, 1)}
+        self.peak_rss_mb = max(self.peak_rss_mb, self.last_sample['rss_mb'])
+        return self.last_sample
+
+    def page_done(self):
+        self.pages += 1
+        self.total_pages += 1
+        if self.check_every and self.pages % self.check_every == 0:
+            self.sample()
+
+    def recycle_reason(self):
+        """Why this browser should be replaced now, None while it is fine"""
+        if self.max_pages and self.pages >= self.max_pages:
+            return f"{self.pages} pages"
+        if not self.last_sample:
+            return None
+        if self.max_rss_mb and self.last_sample['rss_mb'] > self.max_rss_mb:
+            return f"{self.last_sample['rss_mb']:.0f} MB RSS"
+        if self.max_cpu_percent and self.last_sample['cpu_percent'] > self.max_cpu_percent:
+            return f"{self.last_sample['cpu_percent']:.0f}% CPU"
+        return None
+
+    def retire(self, reason):
+        """The browser is about to quit: note why, and remember its processes for kill_leftovers()"""
+        self.sample()
+        self.recycles.append((reason, self.pages, self.last_sample['rss_mb']))
+        return list(self.processes.values())
+
+    def kill_leftovers(self, processes, timeout=5):
+        """Chrome children that outlived driver.quit() (they keep their memory), terminated then killed"""
+        alive = []
+        for process in processes:
+            try:
+                if process.is_running():
+                    process.terminate()
+                    alive.append(process)
+            except psutil.Error:
+                continue
+        leftovers = len(alive)
+        if alive:
+            gone, alive = psutil.wait_procs(alive, timeout=timeout)
+            for process in alive:
+                try:
+                    process.kill()
+                except psutil.Error:
+                    continue
+        return leftovers
+
+    def summary(self):
+        return {'pages': self.total_pages, 'recycles': len(self.recycles), 'peak_rss_mb': self.peak_rss_mb,
+                'last_sample': self.last_sample, 'reasons': [reason for reason, _, _ in self.recycles]}
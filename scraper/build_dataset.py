@@ -0,0 +1,179 @@
+"""
+Consolidated dataset builder.
+
+The queues leave a tree of per city outputs behind (final exports, JSONL logs, checkpoints, *_error_partial
+files, pool outputs) and the same house often shows up several times across queues and re-runs. This merges
+all of them into one compacted dataset, one record per property (keyed by zpid, falling back to the URL),
+keeping the newest scraped_at. A detail page record always outranks a listing-only one (listing mode,
+detail_scraped=False): the listing is folded into it with listings.merge_listing instead of replacing it.
+
+    python build_dataset.py data --output data/dataset [--workers 8] [--parquet] [--rebuild]
+
+Incremental: manifest.json remembers size and mtime of every file already merged, so only new or changed
+files are parsed again (in parallel worker processes) and merged into the existing properties.jsonl. Pass
+--rebuild to start from scratch, e.g. after deleting bad output files.
+"""
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from jsonl_sink import iter_records
+from normalize import parse_zpid
+from listings import merge_listing
+
+SKIP_PREFIXES = ('summary_', 'queue_', 'manifest', 'timings', 'capture')
+PROPERTY_FIELDS = ('url', 'scraped_at', 'price', 'address')  # every record new_property_record builds has these
+
+
+def is_property_record(record):
+    """TIMINGS and CAPTURE_LOG lines also carry a url, only scraped property records have all the property fields"""
+    return isinstance(record, dict) and all(field in record for field in PROPERTY_FIELDS) and bool(record['url'])
+
+
+def property_key(record):
+    zpid = parse_zpid(record.get('url'))
+    return f"zpid:{zpid}" if zpid else record.get('url')
+
+
+def is_newer(record, existing):
+    return (record.get('scraped_at') or '') >= (existing.get('scraped_at') or '')
+
+
+def is_listing_only(record):
+    return record.get('detail_scraped') is False
+
+
+def merge_record(merged, record):
+    """Keep the newest version of each property, detail records over listing-only ones. True if record changed it."""
+    key = property_key(record)
+    if not key:
+        return False
+    existing = merged.get(key)
+    if existing is None:
+        merged[key] = record
+        return True
+    if is_listing_only(existing) and not is_listing_only(record):
+        merged[key] = merge_listing(record, existing)  # detail page wins, the listing keeps its coordinates
+        return True
+    if is_listing_only(record) and not is_listing_only(existing):
+        if not is_newer(record, existing):
+            return False
+        merged[key] = merge_listing(existing, record)  # a later listing only refreshes the listing fields
+        return True
+    if is_newer(record, existing):
+        merged[key] = record
+        return True
+    return False
+
+
+def find_output_files(data_dir, exclude_dir=None):
+    """Every .json/.jsonl under data_dir that can hold property records (not timings or capture logs), relative to data_dir"""
+    found = []
+    excluded = os.path.abspath(exclude_dir) if exclude_dir else None
+    for folder, dirs, files in os.walk(data_dir):
+        if os.path.abspath(folder) == excluded:
+            dirs[:] = []
+            continue
+        dirs[:] = [d for d in dirs if d != 'typed']
+        for name in files:
+            if name.endswith(('.json', '.jsonl')) and not name.startswith(SKIP_PREFIXES):
+                found.append(os.path.relpath(os.path.join(folder, name), data_dir))
+    return sorted(found)
+
+
+def parse_output_file(path):
+    """Worker process: the deduped records of one file (newest per property), [] if it is not a property file"""
+    merged = {}
+    try:
+        if path.endswith('.jsonl'):
+            records = iter_records(path)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            if not isinstance(records, list):
+                return []
+        for record in records:
+            if is_property_record(record):
+                merge_record(merged, record)
+    except (OSError, ValueError) as e:
+        print(f" Skipping {path}: {e}")
+        return []
+    return list(merged.values())
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {'files': {}}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def build_dataset(data_dir, output_dir, workers=None, rebuild=False, parquet=False):
+    started = time.time()
+    os.makedirs(output_dir, exist_ok=True)
+    dataset_path = os.path.join(output_dir, 'properties.jsonl')
+
+    manifest = {'files': {}} if rebuild else load_manifest(output_dir)
+    merged = {}
+    if not rebuild and os.path.exists(dataset_path):
+        for record in iter_records(dataset_path):
+            merge_record(merged, record)
+
+    files = find_output_files(data_dir, exclude_dir=output_dir)
+    signatures = {rel: file_signature(os.path.join(data_dir, rel)) for rel in files}
+    changed = [rel for rel in files if manifest['files'].get(rel, {}).get('signature') != signatures[rel]]
+
+    print(f"📂 {len(files)} output files, {len(changed)} new or changed, {len(merged)} properties already in the dataset")
+    if not changed and not rebuild:
+        print("Dataset is up to date.")
+        return dataset_path
+
+    # Big files first so one huge log does not end up last on a single worker
+    changed.sort(key=lambda rel: signatures[rel]['size'], reverse=True)
+    updated = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        paths = [os.path.join(data_dir, rel) for rel in changed]
+        for rel, records in zip(changed, executor.map(parse_output_file, paths, chunksize=4)):
+            updated += sum(merge_record(merged, record) for record in records)
+            manifest['files'][rel] = {'signature': signatures[rel], 'records': len(records)}
+
+    # Write next to the old dataset and swap, so a crash never leaves a half written one behind
+    with open(dataset_path + '.tmp', 'w', encoding='utf-8') as out:
+        for key in sorted(merged):
+            out.write(json.dumps(merged[key], ensure_ascii=False) + '\n')
+    os.replace(dataset_path + '.tmp', dataset_path)
+
+    manifest['built_at'] = datetime.now().isoformat()
+    manifest['properties'] = len(merged)
+    with open(os.path.join(output_dir, 'manifest.json.tmp'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(output_dir, 'manifest.json.tmp'), os.path.join(output_dir, 'manifest.json'))
+
+    if parquet:
+        import pyarrow.parquet as pq
+        from typed_export import to_table
+        pq.write_table(to_table(merged.values()), os.path.join(output_dir, 'properties.parquet'))
+
+    print(f"✓ {len(merged)} unique properties ({updated} added or updated) -> {dataset_path} in {time.time() - started:.1f}s")
+    return dataset_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge every queue/city output into one deduplicated dataset")
+    parser.add_argument('data_dir', help="output tree written by main.py (OUTPUT_DIR)")
+    parser.add_argument('--output', default=None, help="dataset folder (default: <data_dir>/dataset)")
+    parser.add_argument('--workers', type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument('--rebuild', action='store_true', help="ignore the manifest and rebuild from every file")
+    parser.add_argument('--parquet', action='store_true', help="also write properties.parquet with the typed schema")
+    args = parser.parse_args()
+
+    build_dataset(args.data_dir, args.output or os.path.join(args.data_dir, 'dataset'),
+                  workers=args.workers, rebuild=args.rebuild, parquet=args.parquet)
@@ -0,0 +1,131 @@
+"""
+Durable crawl state for the queue (terminal) mode.
+
+scraped_urls and all_properties_data only live in memory, so a crash or a bot detection stop used to mean
+rescraping the whole city. Every discovered URL goes in here with its status (pending/done/failed), attempt
+count and the search page it came from, together with the scraped data, the last page reached per city and
+the map tiles the city was split into.
+A restarted queue skips finished cities, reloads what was already scraped and jumps back to the page it
+stopped on. A finished city is crawled again from scratch once reset_city forgets it (RECRAWL / RECRAWL_AFTER_DAYS
+in main.py).
+"""
+import json
+import time
+import sqlite3
+
+
+class CrawlState:
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                city TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                source_page INTEGER,
+                data TEXT,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS urls_city ON urls (city, status);
+            CREATE TABLE IF NOT EXISTS cities (
+                city TEXT PRIMARY KEY,
+                last_page INTEGER NOT NULL DEFAULT 1,
+                completed INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS tiles (
+                city TEXT NOT NULL,
+                tile_index INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (city, tile_index)
+            );
+        """)
+
+    def record_discovered(self, city, urls, page):
+        """Every link found on a search page, so we know what is still pending after a crash"""
+        now = time.time()
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.executemany("INSERT OR IGNORE INTO urls (url, city, source_page, updated_at) VALUES (?, ?, ?, ?)",
+                                [(url, city, page, now) for url in urls])
+            self.db.execute("""INSERT INTO cities (city, last_page, updated_at) VALUES (?, ?, ?)
+                               ON CONFLICT(city) DO UPDATE SET last_page = MAX(last_page, excluded.last_page), updated_at = excluded.updated_at""",
+                            (city, page, now))
+
+    def mark_done(self, url, city, property_data):
+        self.db.execute("""INSERT INTO urls (url, city, status, attempts, data, updated_at) VALUES (?, ?, 'done', 1, ?, ?)
+                           ON CONFLICT(url) DO UPDATE SET status = 'done', attempts = attempts + 1, data = excluded.data, updated_at = excluded.updated_at""",
+                        (url, city, json.dumps(property_data), time.time()))
+
+    def mark_failed(self, url, city):
+        self.db.execute("""INSERT INTO urls (url, city, status, attempts, updated_at) VALUES (?, ?, 'failed', 1, ?)
+                           ON CONFLICT(url) DO UPDATE SET status = 'failed', attempts = attempts + 1, updated_at = excluded.updated_at""",
+                        (url, city, time.time()))
+
+    def should_skip(self, url):
+        """Done already, or failed too many times to bother again"""
+        row = self.db.execute("SELECT status, attempts FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return False
+        status, attempts = row
+        return status == 'done' or (status == 'failed' and attempts >= self.max_attempts)
+
+    def done_urls(self, city):
+        return {row[0] for row in self.db.execute("SELECT url FROM urls WHERE city = ? AND status = 'done'", (city,))}
+
+    def pending_urls(self, city):
+        """Discovered but not scraped yet (plus failed ones that still have attempts left)"""
+        return [row[0] for row in self.db.execute(
+            "SELECT url FROM urls WHERE city = ? AND (status = 'pending' OR (status = 'failed' AND attempts < ?)) ORDER BY source_page, rowid",
+            (city, self.max_attempts))]
+
+    def done_properties(self, city):
+        """Generator, so a resumed city never has to sit in memory all at once"""
+        for (data,) in self.db.execute(
+                "SELECT data FROM urls WHERE city = ? AND status = 'done' AND data IS NOT NULL ORDER BY updated_at", (city,)):
+            yield json.loads(data)
+
+    def last_page(self, city):
+        row = self.db.execute("SELECT last_page FROM cities WHERE city = ?", (city,)).fetchone()
+        return row[0] if row else 1
+
+    def save_tiles(self, city, tile_urls):
+        """The map tiles planned for a city (tiling.py), in crawl order"""
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.execute("DELETE FROM tiles WHERE city = ?", (city,))
+            self.db.executemany("INSERT INTO tiles (city, tile_index, url) VALUES (?, ?, ?)",
+                                [(city, index, url) for index, url in enumerate(tile_urls)])
+
+    def tiles(self, city):
+        return [row[0] for row in self.db.execute("SELECT url FROM tiles WHERE city = ? ORDER BY tile_index", (city,))]
+
+    def mark_city_completed(self, city):
+        self.db.execute("""INSERT INTO cities (city, completed, updated_at) VALUES (?, 1, ?)
+                           ON CONFLICT(city) DO UPDATE SET completed = 1, updated_at = excluded.updated_at""",
+                        (city, time.time()))
+
+    def is_city_completed(self, city, max_age=None):
+        """Completed, and less than max_age seconds ago when max_age is given (an older crawl is due again)"""
+        row = self.db.execute("SELECT completed, updated_at FROM cities WHERE city = ?", (city,)).fetchone()
+        if not (row and row[0]):
+            return False
+        return max_age is None or time.time() - (row[1] or 0) < max_age
+
+    def reset_city(self, city):
+        """Forget everything about a city (urls, scraped data, last page, tiles), so it is crawled from scratch"""
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.execute("DELETE FROM urls WHERE city = ?", (city,))
+            self.db.execute("DELETE FROM tiles WHERE city = ?", (city,))
+            self.db.execute("DELETE FROM cities WHERE city = ?", (city,))
+
+    def counts(self, city):
+        """{'pending': n, 'done': n, 'failed': n}"""
+        counts = {'pending': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(self.db.execute("SELECT status, COUNT(*) FROM urls WHERE city = ? GROUP BY status", (city,))))
+        return counts
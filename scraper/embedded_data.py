@@ -0,0 +1,242 @@
+import re
+import json
+
+# orjson is a lot faster on the multi-MB blobs but it is optional, the stdlib decoder works the same
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+# Zillow server-renders the whole property as JSON into one of these script tags.
+# The regex fallbacks in page_patterns ("bedrooms", "livingArea" ...) were matching inside this blob.
+EMBEDDED_SCRIPT_IDS = ['__NEXT_DATA__', 'hdpApolloPreloadedData']
+
+CLIMATE_SOURCES = {
+    'floodSources': 'flood_risk',
+    'fireSources': 'fire_risk',
+    'windSources': 'wind_risk',
+    'airSources': 'air_risk',
+    'heatSources': 'heat_risk'
+}
+
+# walk/transit/bike score objects (the lazy WalkTransitAndBikeScoreQuery response, sometimes embedded too)
+SCORE_SOURCES = {
+    'walkScore': ('walk_score', 'walkscore'),
+    'transitScore': ('transit_score', 'transit_score'),
+    'bikeScore': ('bike_score', 'bikescore')
+}
+
+
+def find_script_json(page_html, script_id):
+    """Locate a <script id=...> blob with plain string searches (no regex over the whole page) and parse it"""
+    marker = page_html.find(f'id="{script_id}"')
+    if marker == -1:
+        return None
+    start = page_html.find('>', marker) + 1
+    end = page_html.find('</script>', start)
+    if start == 0 or end == -1:
+        return None
+    try:
+        return loads(page_html[start:end])
+    except ValueError:
+        return None
+
+
+def parse_cache_string(cache):
+    """gdpClientCache / apiCache are JSON encoded again as a string inside the outer JSON"""
+    if isinstance(cache, str):
+        try:
+            cache = loads(cache)
+        except ValueError:
+            return None
+    return cache if isinstance(cache, dict) else None
+
+
+def find_property_in_cache(cache):
+    cache = parse_cache_string(cache)
+    if not cache:
+        return None
+    for entry in cache.values():
+        if isinstance(entry, dict) and isinstance(entry.get('property'), dict):
+            return entry['property']
+    return None
+
+
+def find_property_json(page_html):
+    """Return the embedded property dict of a homedetails page, or None if the page has no structured data"""
+    next_data = find_script_json(page_html, '__NEXT_DATA__')
+    if next_data:
+        try:
+            component_props = next_data['props']['pageProps']['componentProps']
+        except (KeyError, TypeError):
+            component_props = None
+        if isinstance(component_props, dict):
+            prop = find_property_in_cache(component_props.get('gdpClientCache'))
+            if prop:
+                return prop
+
+    apollo_data = find_script_json(page_html, 'hdpApolloPreloadedData')
+    if apollo_data:
+        prop = find_property_in_cache(apollo_data.get('apiCache'))
+        if prop:
+            return prop
+
+    return None
+
+
+def format_number(value):
+    """2.0 -> '2', 2.5 -> '2.5' (same shape as the text strategies)"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def format_home_type(home_type):
+    """'SINGLE_FAMILY', 'single-family', 'Single Family' -> 'Single Family', one vocabulary for every strategy"""
+    return re.sub(r'[\W_]+', ' ', home_type).strip().title()
+
+
+def format_lot(prop):
+    value = prop.get('lotAreaValue')
+    units = (prop.get('lotAreaUnits') or '').lower()
+    if value:
+        if 'acre' in units:
+            return f"{format_number(value)} Acres"
+        return f"{int(float(value)):,} sqft"
+    if prop.get('lotSize'):
+        return f"{int(prop['lotSize']):,} sqft"
+    return None
+
+
+def format_history_date(date_text):
+    """'2020-05-01' -> '05/01/2020' like the rendered price history table"""
+    parts = str(date_text).split('-')
+    if len(parts) == 3:
+        return f"{parts[1]}/{parts[2]}/{parts[0]}"
+    return str(date_text)
+
+
+def school_key(school):
+    level = (school.get('level') or '').lower()
+    grades = (school.get('grades') or '').upper()
+    if 'elementary' in level or 'primary' in level:
+        return 'elementary_school'
+    if 'middle' in level:
+        return 'middle_school'
+    if 'high' in level:
+        return 'high_school'
+    # some entries only carry the grade span
+    if grades.startswith(('PK', 'K')):
+        return 'elementary_school'
+    if grades.startswith(('6', '7')):
+        return 'middle_school'
+    if grades.startswith('9'):
+        return 'high_school'
+    return None
+
+
+def first_photo_url(prop):
+    for key in ('hiResImageLink', 'desktopWebHdpImageLink', 'mediumImageLink'):
+        if prop.get(key):
+            return prop[key]
+    for photo in prop.get('responsivePhotos') or prop.get('originalPhotos') or []:
+        jpegs = (photo.get('mixedSources') or {}).get('jpeg') or []
+        if jpegs:
+            return jpegs[-1].get('url')
+    return None
+
+
+def apply_property_json(prop, property_data):
+    """Map the embedded property JSON straight into property_data, only touching fields it actually has"""
+    if prop.get('price'):
+        property_data['price'] = f"${int(prop['price']):,}"
+    if prop.get('bedrooms') is not None:
+        property_data['beds'] = format_number(prop['bedrooms'])
+    if prop.get('bathrooms') is not None:
+        property_data['baths'] = format_number(prop['bathrooms'])
+    if prop.get('livingArea'):
+        property_data['sqft'] = f"{int(prop['livingArea']):,}"
+
+    lot = format_lot(prop)
+    if lot:
+        property_data['sqft_lot'] = lot
+
+    if prop.get('yearBuilt'):
+        property_data['year_built'] = str(prop['yearBuilt'])
+    if prop.get('homeType'):
+        property_data['property_type'] = format_home_type(prop['homeType'])
+
+    address = prop.get('address') or {}
+    if address.get('streetAddress'):
+        property_data['address'] = f"{address['streetAddress']}, {address.get('city', '')}, {address.get('state', '')} {address.get('zipcode', '')}".strip()
+
+    image_url = first_photo_url(prop)
+    if image_url:
+        property_data['image_url'] = image_url
+
+    reso = prop.get('resoFacts') or {}
+    if reso.get('pricePerSquareFoot'):
+        property_data['price_per_sqft'] = f"${int(reso['pricePerSquareFoot'])}/sqft"
+    if reso.get('appliances'):
+        property_data['appliances'] = [item.lower() for item in reso['appliances']]
+
+    utilities = {}
+    for label, key in [('Electric', 'electric'), ('Sewer', 'sewer'), ('Water', 'waterSource')]:
+        if reso.get(key):
+            utilities[label] = ', '.join(reso[key]) if isinstance(reso[key], list) else str(reso[key])
+    if utilities:
+        property_data['utilities'] = utilities
+
+    parking = {}
+    if reso.get('parkingCapacity') is not None:
+        parking['total_spaces'] = str(reso['parkingCapacity'])
+    if reso.get('garageParkingCapacity') is not None:
+        parking['garage_spaces'] = str(reso['garageParkingCapacity'])
+    if reso.get('parkingFeatures'):
+        parking['parking_features'] = ', '.join(reso['parkingFeatures'])
+    if parking:
+        property_data['parking'] = parking
+
+    history = []
+    for event in prop.get('priceHistory') or []:
+        if event.get('date') and event.get('price'):
+            history.append({
+                'date': format_history_date(event['date']),
+                'event': event.get('event', ''),
+                'price': f"${int(event['price']):,}"
+            })
+    if history:
+        property_data['property_history'] = history
+
+    for school in prop.get('schools') or []:
+        key = school_key(school)
+        if key and property_data[key]['name'] == 'N/A':
+            distance = school.get('distance')
+            property_data[key] = {
+                'name': school.get('name', 'N/A'),
+                'distance': f"{distance} mi" if distance is not None else 'N/A'
+            }
+
+    climate = prop.get('climate') or {}
+    for source_key, risk_key in CLIMATE_SOURCES.items():
+        risk_score = (((climate.get(source_key) or {}).get('primary') or {}).get('riskScore') or {})
+        if risk_score.get('value') is not None and risk_score.get('label'):
+            property_data[risk_key] = f"{risk_score['label'].title()} ({risk_score['value']}/10)"
+
+    for source_key, (score_key, value_key) in SCORE_SOURCES.items():
+        score = prop.get(source_key)
+        if isinstance(score, dict) and score.get(value_key) is not None and 0 <= int(score[value_key]) <= 100:
+            property_data[score_key] = f"{int(score[value_key])}/100"
+
+    parent_region = prop.get('parentRegion') or {}
+    if parent_region.get('name'):
+        property_data['region'] = parent_region['name']
+
+
+def extract_embedded_property(page_html, property_data):
+    """Parse the embedded JSON once and map it into property_data. Returns False when the page has none."""
+    prop = find_property_json(page_html)
+    if not prop:
+        return False
+    apply_property_json(prop, property_data)
+    return True
@@ -0,0 +1,252 @@
+"""
+Local stand-in for the Zillow search endpoint, so search_api.py can be run and checked offline.
+
+It answers PUT /async-create-search-page-state like the site does: a deterministic, seeded universe of
+synthetic listings spread over Massachusetts, filtered by the request's mapBounds, 41 per page, at most
+20 pages, with the real totalResultCount (so big regions trigger the quadrant split). Responses are gzipped
+when the client asks for it. Search pages (GET with ?searchQueryState=...) come back as HTML with the same
+results embedded in __NEXT_DATA__, for listings.py. Homedetails pages (GET /homedetails/.../<zpid>_zpid/)
+are rendered from the same listings: the sections the extractors read plus the embedded property JSON, padded
+with filler markup to the size of a real page (~1 MB). benchmark.py uses them as its default corpus.
+
+    python fixture_server.py --port 8765 --listings 20000 [--block-after 500]
+"""
+import json
+import gzip
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+MASSACHUSETTS = {'west': -73.51, 'east': -69.93, 'south': 41.24, 'north': 42.89}
+PER_PAGE = 41
+MAX_PAGES = 20
+STREETS = ['Oak St', 'Maple Ave', 'Main St', 'Elm St', 'Washington St', 'Pleasant St', 'Park Ave', 'Cedar Ln']
+HOME_TYPES = ['SINGLE_FAMILY', 'CONDO', 'TOWNHOUSE', 'MULTI_FAMILY']
+TOWNS = ['Chicopee', 'Ludlow', 'Agawam', 'Holyoke', 'Westfield', 'Longmeadow', 'Wilbraham']
+RISK_LEVELS = ['Minimal', 'Minor', 'Moderate', 'Major', 'Severe']
+FILLER_WORDS = ("home kitchen living room bathroom bedroom floor window price tax market listing agent photos view "
+                "map garage yard deck patio basement attic heating cooling roof lot zestimate rent history").split()
+
+
+def make_listings(count, seed=7):
+    rng = random.Random(seed)
+    listings = []
+    for index in range(count):
+        zpid = 10000000 + index
+        latitude = rng.uniform(MASSACHUSETTS['south'], MASSACHUSETTS['north'])
+        longitude = rng.uniform(MASSACHUSETTS['west'], MASSACHUSETTS['east'])
+        street = f"{rng.randint(1, 999)} {rng.choice(STREETS)}"
+        price = rng.randrange(150000, 2500000, 1000)
+        listings.append({
+            'zpid': str(zpid),
+            'detailUrl': f"https://www.zillow.com/homedetails/{street.replace(' ', '-')}-MA/{zpid}_zpid/",
+            'statusText': 'House for sale',
+            'unformattedPrice': price,
+            'price': f"${price:,}",
+            'address': f"{street}, Springfield, MA 01103",
+            'beds': rng.randint(1, 6),
+            'baths': rng.choice([1, 1.5, 2, 2.5, 3]),
+            'area': rng.randrange(600, 5000, 10),
+            'imgSrc': f"https://photos.zillowstatic.com/fp/{zpid:x}-p_e.jpg",
+            'latLong': {'latitude': round(latitude, 6), 'longitude': round(longitude, 6)},
+            'hdpData': {'homeInfo': {'zpid': zpid, 'homeType': rng.choice(HOME_TYPES),
+                                     'lotAreaValue': round(rng.uniform(0.05, 3), 2), 'lotAreaUnit': 'acres'}},
+        })
+    return listings
+
+
+def property_json(listing, rng):
+    """The embedded property dict (gdpClientCache shape, see embedded_data.py) of a synthetic listing"""
+    info = listing['hdpData']['homeInfo']
+    street, rest = listing['address'].split(', ', 1)
+    price = listing['unformattedPrice']
+    return {
+        'zpid': info['zpid'], 'price': price, 'bedrooms': listing['beds'], 'bathrooms': listing['baths'],
+        'livingArea': listing['area'], 'lotAreaValue': info['lotAreaValue'], 'lotAreaUnits': info['lotAreaUnit'],
+        'yearBuilt': rng.randint(1890, 2022), 'homeType': info['homeType'],
+        'address': {'streetAddress': street, 'city': 'Springfield', 'state': 'MA', 'zipcode': '01103'},
+        'hiResImageLink': listing['imgSrc'],
+        'resoFacts': {'pricePerSquareFoot': price // listing['area'], 'appliances': ['Dishwasher', 'Refrigerator', 'Range'],
+                      'electric': ['Circuit Breakers'], 'sewer': ['Public Sewer'], 'waterSource': ['Public'],
+                      'parkingCapacity': 4, 'garageParkingCapacity': 2, 'parkingFeatures': ['Attached', 'Off Street']},
+        'priceHistory': [{'date': f"20{year:02d}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}", 'event': event,
+                          'price': price - 20000 * index} for index, (year, event) in enumerate([(24, 'Listed for sale'), (19, 'Sold'), (12, 'Sold')])],
+        'schools': [{'name': f"{name} School", 'level': level, 'grades': grades, 'distance': round(rng.uniform(0.2, 4), 1)}
+                    for name, level, grades in [('Glenwood Elementary', 'Elementary', 'K-5'), ('Kiley Middle', 'Middle', '6-8'),
+                                                ('Central High', 'High', '9-12')]],
+        'climate': {f"{risk}Sources": {'primary': {'riskScore': {'value': rng.randint(1, 10), 'label': rng.choice(RISK_LEVELS)}}}
+                    for risk in ['flood', 'fire', 'wind', 'air', 'heat']},
+        'parentRegion': {'name': 'Springfield'},
+    }
+
+
+def filler_markup(rng, chunks):
+    """Unrelated markup and JSON of the size a real page carries (styles, ads, map and photo data)"""
+    out = []
+    for _ in range(chunks):
+        roll = rng.random()
+        if roll < 0.6:
+            out.append(' '.join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(3, 12))))
+        elif roll < 0.8:
+            out.append(f'<div class="StyledCard-c11n-{rng.randint(1, 999)}"><span>{rng.choice(FILLER_WORDS).title()} {rng.randint(1, 9999)}</span></div>')
+        else:
+            out.append(json.dumps({rng.choice(FILLER_WORDS): rng.randint(0, 10 ** 6), 'k': rng.choice(FILLER_WORDS)}))
+    return '\n'.join(out)
+
+
+def property_page(listing, filler_chunks=20000):
+    """Synthetic homedetails page of one listing: rendered sections + embedded JSON, deterministic per zpid"""
+    rng = random.Random(listing['zpid'])
+    prop = property_json(listing, rng)
+    reso = prop['resoFacts']
+    cache = {f'ForSaleDoubleScrollFullRenderQuery{{"zpid":{prop["zpid"]}}}': {'property': prop}}
+    next_data = {'props': {'pageProps': {'componentProps': {'gdpClientCache': json.dumps(cache)}}}}
+    scores = [rng.randint(10, 99) for _ in range(3)]
+    risks = ''.join(f'<div><div><div><span>{risk.title()} Factor</span></div><span>{value["primary"]["riskScore"]["label"]}</span>'
+                    f'<span>{value["primary"]["riskScore"]["value"]}/10</span></div></div>'
+                    for risk, value in ((key[:-len('Sources')], value) for key, value in prop['climate'].items()))
+    history = ''.join(f'<tr><td>{event["date"][5:7]}/{event["date"][8:10]}/{event["date"][:4]} {event["event"]} ${event["price"]:,}</td></tr>'
+                      for event in prop['priceHistory'])
+    schools = ''.join(f'<li><a>{school["name"]}</a><span>Grades: {school["grades"]}</span><span>Distance: {school["distance"]} mi</span></li>'
+                      for school in prop['schools'])
+    nearby = ''.join(f'<li><a href="/{town.lower()}-ma/">{town} Real estate</a></li>' for town in rng.sample(TOWNS, 4))
+    sections = f"""
+<link rel="canonical" href="{listing['detailUrl']}"/>
+<h1 data-testid="street-address">{listing['address']}</h1>
+<img data-testid="property-image" src="{listing['imgSrc']}"/>
+<span data-testid="price">{listing['price']}</span>
+<div data-testid="bed-bath-sqft-facts">{listing['beds']} beds {listing['baths']} baths {listing['area']:,} sqft</div>
+<div>{prop['homeType'].replace('_', ' ').title()}</div><div>Built in {prop['yearBuilt']}</div>
+<div>${reso['pricePerSquareFoot']}/sqft</div><div>{prop['lotAreaValue']} Acres Lot</div>
+<div><span>Monthly payment</span><span>${price_payment(listing)}/mo</span></div>
+<ul><li>Electric: Circuit Breakers, 200+ Amp Service</li><li>Sewer: Public Sewer</li><li>Water: Public</li>
+<li>Total spaces: 4</li><li>Garage spaces: 2</li><li>Parking features: Attached, Off Street</li></ul>
+<p>hardwood floors, granite countertops, fireplace, dishwasher, refrigerator, range, dining room, family room, basement</p>
+<div class="StyledScoresContainer"><div>Walk Score® {scores[0]} Bike Score® {scores[1]} Transit Score® {scores[2]}</div></div>
+<section><h2>GreatSchools rating</h2><ul>{schools}</ul></section>
+<section><h2>Climate risks</h2>{risks}</section>
+<section><div><h2>Price history</h2><table>{history}</table></div></section>
+<div>Region: Springfield</div>
+<section><div><h2>Nearby cities</h2><ul>{nearby}</ul></div></section>
+"""
+    return (f'<html><head><title>{listing["address"]} | Zillow</title></head><body>{filler_markup(rng, int(filler_chunks * 0.6))}'
+            f'{sections}{filler_markup(rng, int(filler_chunks * 0.4))}'
+            f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script></body></html>')
+
+
+def price_payment(listing):
+    return f"{listing['unformattedPrice'] // 200:,}"
+
+
+def search_page(listings, total=None, page=1):
+    """Search result page HTML with the results embedded in __NEXT_DATA__, like the site serves it"""
+    total = len(listings) if total is None else total
+    cat1 = {'searchResults': {'listResults': listings},
+            'searchList': {'totalResultCount': total, 'totalPages': min(max(1, -(-total // PER_PAGE)), MAX_PAGES),
+                           'resultsPerPage': PER_PAGE, 'currentPage': page}}
+    next_data = {'props': {'pageProps': {'searchPageState': {'cat1': cat1}}}}
+    cards = ''.join(f'<li><article><a href="{listing["detailUrl"]}">{listing["address"]}</a></article></li>' for listing in listings)
+    return (f'<html><body><div id="grid-search-results"><ul>{cards}</ul></div>'
+            f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script></body></html>')
+
+
+def in_bounds(listing, bounds):
+    lat_long = listing['latLong']
+    return (bounds['south'] <= lat_long['latitude'] < bounds['north']
+            and bounds['west'] <= lat_long['longitude'] < bounds['east'])
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    listings = []
+    by_zpid = {}
+    block_after = None
+    requests_served = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def search_payload(self, search_state):
+        bounds = search_state.get('mapBounds') or MASSACHUSETTS
+        matches = [listing for listing in self.listings if in_bounds(listing, bounds)]
+        page = (search_state.get('pagination') or {}).get('currentPage', 1)
+        total_pages = min(max(1, -(-len(matches) // PER_PAGE)), MAX_PAGES)
+        results = matches[(page - 1) * PER_PAGE:page * PER_PAGE] if page <= total_pages else []
+        return {
+            'cat1': {
+                'searchResults': {'listResults': results},
+                'searchList': {'totalResultCount': len(matches), 'totalPages': total_pages, 'resultsPerPage': PER_PAGE},
+            }
+        }
+
+    def blocked(self):
+        with self.lock:
+            FixtureHandler.requests_served += 1
+            return self.block_after is not None and self.requests_served > self.block_after
+
+    def send(self, status, body, content_type):
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_response(status)
+            self.send_header('Content-Encoding', 'gzip')
+        else:
+            self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_PUT(self):
+        if self.blocked():
+            return self.send(403, b'{"error": "blocked"}', 'application/json')
+        if urlsplit(self.path).path != '/async-create-search-page-state':
+            return self.send(404, b'{}', 'application/json')
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        payload = self.search_payload(request.get('searchQueryState') or {})
+        self.send(200, json.dumps(payload).encode(), 'application/json')
+
+    def do_GET(self):
+        if self.blocked():
+            return self.send(403, b'<html><body>Press &amp; Hold</body></html>', 'text/html')
+        path = urlsplit(self.path).path
+        if path.startswith('/homedetails/'):
+            zpid = path.rstrip('/').rsplit('/', 1)[-1].split('_')[0]
+            listing = self.by_zpid.get(zpid)
+            if listing is None:
+                return self.send(404, b'<html><body>Not found</body></html>', 'text/html')
+            return self.send(200, property_page(listing).encode(), 'text/html; charset=utf-8')
+        query = parse_qs(urlsplit(self.path).query)
+        search_state = json.loads(query['searchQueryState'][0]) if 'searchQueryState' in query else {}
+        cat1 = self.search_payload(search_state)['cat1']
+        page = (search_state.get('pagination') or {}).get('currentPage', 1)
+        page_html = search_page(cat1['searchResults']['listResults'], cat1['searchList']['totalResultCount'], page)
+        self.send(200, page_html.encode(), 'text/html; charset=utf-8')
+
+
+def start_fixture_server(port=0, listings=20000, block_after=None):
+    """Start the server in a background thread, returns (server, base_url)"""
+    FixtureHandler.listings = make_listings(listings)
+    FixtureHandler.by_zpid = {listing['zpid']: listing for listing in FixtureHandler.listings}
+    FixtureHandler.block_after = block_after
+    FixtureHandler.requests_served = 0
+    server = ThreadingHTTPServer(('127.0.0.1', port), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline stand-in for the Zillow search endpoint")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--listings', type=int, default=20000, help="size of the synthetic listing universe")
+    parser.add_argument('--block-after', type=int, default=None, help="answer 403 after this many requests")
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_server(args.port, args.listings, args.block_after)
+    print(f"Fixture server with {args.listings} listings on {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,312 @@
+"""
+Offline extraction engine for saved Zillow homedetails pages.
+
+Same property_data dict as MultiPropertyZillowScraper.extract_complete_property_data, but it works on
+the HTML alone with lxml and precompiled XPath selectors, so there is no browser and no round trip
+to chromedriver per field. The embedded property JSON (embedded_data.py) is read first and the
+XPath/regex strategies only fill whatever it did not have. The browser only has to fetch pages,
+and archived pages can be re-extracted in bulk:
+
+    python html_extractor.py saved_pages/*.html --output extracted.json
+"""
+import argparse
+import glob
+import json
+import os
+from lxml import etree, html as lxml_html
+from property_record import new_property_record, missing_fields, fill_missing
+from embedded_data import extract_embedded_property
+from page_patterns import (
+    RISK_TYPES, is_valid_zillow_image_url, find_image_url_in_source, is_price_text,
+    parse_bed_bath_sqft_facts, basic_facts_complete, parse_fallback_facts, parse_facts_from_source_json,
+    is_address_text, parse_page_facts, parse_features, parse_monthly_payment,
+    scores_complete, parse_scores_container, parse_scores_from_source, parse_score_element_text,
+    parse_schools, parse_risk_container, parse_price_history,
+    parse_region, parse_region_container, clean_nearby_city_links, parse_nearby_cities_from_source, release_fold
+)
+
+
+def has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def lowercase_text_contains(value):
+    return f"//*[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{value}')]"
+
+
+# The CSS selectors of the live scraper, translated to XPath and compiled once at import time
+# (the raw XPath strings are also run inside the browser by page_script.py)
+IMAGE_XPATHS = [
+    '//img[contains(@data-testid, "property-image")]',
+    '//img[contains(@alt, "property")]',
+    '//img[contains(@src, "photos.zillowstatic.com")]',
+    f'//*[{has_class("media-stream")}]//img[not(preceding-sibling::*)]',
+    f'//*[{has_class("photo-carousel")}]//img[not(preceding-sibling::*)]',
+    '//picture//img',
+    '//section//img[not(preceding-sibling::*)]',
+    '//main//img[not(preceding-sibling::*)]',
+]
+IMAGE_SELECTORS = [etree.XPath(xpath) for xpath in IMAGE_XPATHS]
+
+PRICE_XPATHS = [
+    '//span[@data-testid="price"]',
+    f'//*[{has_class("notranslate")}]',
+    '//h3//span',
+    f'//span[{has_class("Text-c11n-8-100-1__sc-aiai24-0")}]',
+    "//span[contains(@class, 'Text') and contains(text(), '$')]",
+    "//h3//span[contains(text(), '$')]",
+]
+PRICE_SELECTORS = [etree.XPath(xpath) for xpath in PRICE_XPATHS]
+
+BED_BATH_SQFT_XPATH = '//*[@data-testid="bed-bath-sqft-facts"]'
+BED_BATH_SQFT_SELECTOR = etree.XPath(BED_BATH_SQFT_XPATH)
+
+FACTS_FALLBACK_XPATHS = [
+    '//*[@data-testid="property-facts"]',
+    '//*[@data-testid="facts-container"]',
+    f'//*[{has_class("summary-container")}]',
+    '//section[contains(@aria-label, "facts")]',
+]
+FACTS_FALLBACK_SELECTORS = [etree.XPath(xpath) for xpath in FACTS_FALLBACK_XPATHS]
+
+ADDRESS_XPATHS = [
+    '//h1[@data-testid="street-address"]',
+    '//h1',
+]
+ADDRESS_SELECTORS = [etree.XPath(xpath) for xpath in ADDRESS_XPATHS]
+
+PAYMENT_XPATH = "//*[contains(text(), 'Monthly') or contains(text(), 'monthly') or contains(text(), 'Payment')]"
+PAYMENT_SELECTOR = etree.XPath(PAYMENT_XPATH)
+
+SCORES_CONTAINER_XPATHS = [
+    "//*[contains(@class, 'StyledScoresContainer')]/div",
+    "//*[contains(@class, 'ScoresContainer')]",
+    "//div[contains(@class, 'hQqCYo')]",
+]
+SCORES_CONTAINER_SELECTORS = [etree.XPath(xpath) for xpath in SCORES_CONTAINER_XPATHS]
+
+SCORE_KEYWORD_XPATHS = [lowercase_text_contains(keyword) for keyword in ['walk', 'bike', 'transit', 'score']]
+SCORE_KEYWORD_SELECTORS = [etree.XPath(xpath) for xpath in SCORE_KEYWORD_XPATHS]
+
+RISK_XPATHS = {risk_type: lowercase_text_contains(f'{risk_type} factor') for risk_type in RISK_TYPES}
+RISK_SELECTORS = {risk_type: etree.XPath(xpath) for risk_type, xpath in RISK_XPATHS.items()}
+
+HISTORY_XPATH = "//*[contains(text(), 'Price history') or contains(text(), 'Sold') or contains(text(), 'Listed')]"
+HISTORY_SELECTOR = etree.XPath(HISTORY_XPATH)
+
+LOCATION_XPATH = "//*[contains(text(), 'Location')]"
+LOCATION_SELECTOR = etree.XPath(LOCATION_XPATH)
+
+NEARBY_CITIES_XPATH = "//*[contains(text(), 'Nearby cities')]"
+NEARBY_CITIES_SELECTOR = etree.XPath(NEARBY_CITIES_XPATH)
+
+NEARBY_CITY_LINKS_XPATH = ".//a[contains(text(), 'Real estate')]"
+NEARBY_CITY_LINKS = etree.XPath(NEARBY_CITY_LINKS_XPATH)
+
+CANONICAL_URL_SELECTOR = etree.XPath('//link[@rel="canonical"]/@href | //meta[@property="og:url"]/@content')
+
+
+def element_text(element):
+    """Rough equivalent of selenium's element.text: visible text chunks, one per line"""
+    return '\n'.join(chunk.strip() for chunk in element.itertext() if chunk.strip())
+
+
+def ancestor(element, levels):
+    for _ in range(levels):
+        if element is None:
+            return None
+        element = element.getparent()
+    return element
+
+
+class ZillowHtmlExtractor:
+    def extract(self, page_html, url=None, scraped_at=None, use_embedded_data=True):
+        """Extract the complete property_data dict from a homedetails HTML document (embedded JSON first, then the markup)"""
+        tree = lxml_html.fromstring(page_html)
+        if url is None:
+            canonical = CANONICAL_URL_SELECTOR(tree)
+            url = canonical[0] if canonical else 'N/A'
+
+        property_data = new_property_record(url, scraped_at)
+
+        structured = False
+        if use_embedded_data:
+            try:
+                structured = extract_embedded_property(page_html, property_data)
+            except Exception as e:
+                print(f"  - Error in embedded JSON: {e}")
+
+        extractors = [
+            ('image', self.extract_property_image_url),
+            ('basic_info', self.extract_price_and_basic_info),
+            ('features', self.extract_property_features),
+            ('scores', self.extract_neighborhood_scores),
+            ('schools', self.extract_schools),
+            ('risks', self.extract_environmental_risks),
+            ('history', self.extract_market_data),
+            ('nearby', self.extract_nearby_cities),
+        ]
+        for group, extractor in extractors:
+            try:
+                if structured:
+                    # the markup strategies are only fallbacks for what the JSON did not have
+                    if not missing_fields(property_data, group):
+                        continue
+                    fallback_data = new_property_record(url, property_data['scraped_at'])
+                    extractor(tree, page_html, fallback_data)
+                    fill_missing(property_data, fallback_data, group)
+                else:
+                    extractor(tree, page_html, property_data)
+            except Exception as e:
+                print(f"  - Error in {extractor.__name__}: {e}")
+
+        release_fold()
+        return property_data
+
+    def extract_property_image_url(self, tree, page_html, property_data):
+        # same order as the live scraper: first element of each selector, then the page source
+        for selector in IMAGE_SELECTORS:
+            images = selector(tree)
+            if images:
+                image_url = images[0].get('src')
+                if image_url and is_valid_zillow_image_url(image_url):
+                    property_data['image_url'] = image_url
+                    return
+
+        image_url = find_image_url_in_source(page_html)
+        if image_url:
+            property_data['image_url'] = image_url
+
+    def extract_price_and_basic_info(self, tree, page_html, property_data):
+        for selector in PRICE_SELECTORS:
+            prices = [element_text(element) for element in selector(tree)]
+            price = next((text for text in prices if is_price_text(text)), None)
+            if price:
+                property_data['price'] = price
+                break
+
+        facts = BED_BATH_SQFT_SELECTOR(tree)
+        if facts:
+            parse_bed_bath_sqft_facts(element_text(facts[0]), property_data)
+
+        if not basic_facts_complete(property_data):
+            for selector in FACTS_FALLBACK_SELECTORS:
+                for element in selector(tree):
+                    parse_fallback_facts(element_text(element), property_data)
+                    if basic_facts_complete(property_data):
+                        break
+                if basic_facts_complete(property_data):
+                    break
+
+        if not basic_facts_complete(property_data):
+            parse_facts_from_source_json(page_html, property_data)
+
+        for selector in ADDRESS_SELECTORS:
+            headings = selector(tree)
+            if headings:
+                text = element_text(headings[0])
+                if is_address_text(text):
+                    property_data['address'] = text
+                    break
+
+        parse_page_facts(page_html, property_data)
+
+    def extract_property_features(self, tree, page_html, property_data):
+        parse_features(page_html.lower(), property_data)
+
+        for element in PAYMENT_SELECTOR(tree):
+            payment = parse_monthly_payment(element_text(ancestor(element, 1)))
+            if payment:
+                property_data['estimated_monthly_payment'] = payment
+                break
+
+    def extract_neighborhood_scores(self, tree, page_html, property_data):
+        for selector in SCORES_CONTAINER_SELECTORS:
+            containers = selector(tree)
+            if containers:
+                parse_scores_container(element_text(containers[0]), property_data)
+                break
+
+        if not scores_complete(property_data):
+            parse_scores_from_source(page_html, property_data)
+
+        if not scores_complete(property_data):
+            for selector in SCORE_KEYWORD_SELECTORS:
+                for element in selector(tree)[:3]:
+                    parse_score_element_text(element_text(element), property_data)
+
+    def extract_schools(self, tree, page_html, property_data):
+        parse_schools(page_html, property_data)
+
+    def extract_environmental_risks(self, tree, page_html, property_data):
+        for risk_type, risk_key in RISK_TYPES.items():
+            for element in RISK_SELECTORS[risk_type](tree):
+                container = ancestor(element, 3)
+                risk_value = parse_risk_container(element_text(container)) if container is not None else None
+                if risk_value:
+                    property_data[risk_key] = risk_value
+                    break
+
+    def extract_market_data(self, tree, page_html, property_data):
+        history = []
+        for element in HISTORY_SELECTOR(tree):
+            history.extend(parse_price_history(element_text(ancestor(element, 1))))
+            if len(history) >= 5:
+                break
+        property_data['property_history'] = history
+
+    def extract_nearby_cities(self, tree, page_html, property_data):
+        region = parse_region(page_html)
+        if not region:
+            for element in LOCATION_SELECTOR(tree):
+                for levels in (1, 2, 4):
+                    container = ancestor(element, levels)
+                    if container is None:
+                        break
+                    region = parse_region_container(element_text(container))
+                    if region:
+                        break
+                if region:
+                    break
+        if region:
+            property_data['region'] = region
+
+        nearby = NEARBY_CITIES_SELECTOR(tree)
+        if nearby:
+            container = ancestor(nearby[0], 2)
+            if container is not None:
+                links = NEARBY_CITY_LINKS(container)[:5]
+                property_data['nearby_cities'] = clean_nearby_city_links([element_text(link) for link in links])
+
+        if not property_data['nearby_cities']:
+            property_data['nearby_cities'] = parse_nearby_cities_from_source(page_html)
+
+
+def extract_saved_pages(paths, extractor=None):
+    """Generator over (path, property_data) for a batch of saved homedetails pages"""
+    extractor = extractor or ZillowHtmlExtractor()
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            page_html = f.read()
+        yield path, extractor.extract(page_html)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-extract property data from saved homedetails pages")
+    parser.add_argument('pages', nargs='+', help="HTML files or glob patterns")
+    parser.add_argument('--output', default='extracted_properties.json')
+    args = parser.parse_args()
+
+    paths = []
+    for pattern in args.pages:
+        paths.extend(sorted(glob.glob(pattern)) if any(c in pattern for c in '*?[') else [pattern])
+
+    properties = []
+    for path, property_data in extract_saved_pages(paths):
+        property_data['source_file'] = os.path.basename(path)
+        properties.append(property_data)
+
+    with open(args.output, 'w') as f:
+        json.dump(properties, f, indent=2)
+
+    print(f"Extracted {len(properties)} properties -> {args.output}")
@@ -0,0 +1,256 @@
+"""
+Timing instrumentation, to see where the ~30 s per property actually go.
+
+Off by default: every hook below is a shared no-op until start() is called (TIMINGS=<path> in main.py).
+Once on, it records with time.monotonic():
+
+  * one span per WebDriver command (driver.execute is wrapped, so element calls and page_source count too),
+    plus the number of round trips and the bytes of page_source pulled over the wire
+  * one span per extractor, readiness wait, pacer sleep and search page
+  * per property: total time and the self time per kind, i.e. 'webdriver' (DOM round trips), 'wait'/'sleep'
+    (polling and pacing) and 'extract' (what is left inside the extractors: Python and regex work)
+
+Every property is written as one JSON line, and every span goes into a log-bucket histogram per city and per
+queue, written by write_summary(). Compare two runs (before/after tuning) with
+
+    python instrumentation.py data/queue_1/timings.jsonl [--by queue]
+"""
+import json
+import time
+import bisect
+import argparse
+import threading
+from jsonl_sink import JsonlSink, iter_records
+
+# upper bounds of the histogram buckets, in seconds (the last bucket is everything above 60 s)
+BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 60)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (good enough to spot a 10x difference)"""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (self.max,), self.counts):
+            seen += count
+            if count and seen >= rank:
+                return round(min(bound, self.max), 4)
+        return round(self.max, 4)
+
+    def summary(self):
+        return {'count': self.count, 'total': round(self.total, 3), 'mean': round(self.total / self.count, 4) if self.count else 0,
+                'p50': self.quantile(0.5), 'p90': self.quantile(0.9), 'p99': self.quantile(0.99), 'max': round(self.max, 3),
+                'buckets': dict(zip([str(bound) for bound in BUCKETS] + ['inf'], self.counts))}
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    def __init__(self, timings, kind, name):
+        self.timings = timings
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self):
+        self.stack = self.timings.stack()
+        self.stack.append(0.0)  # time spent in nested spans, to get this span's self time
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.monotonic() - self.started
+        nested = self.stack.pop()
+        if self.stack:
+            self.stack[-1] += elapsed
+        self.timings.add(self.kind, self.name, elapsed, elapsed - nested)
+        return False
+
+
+class Timings:
+    def __init__(self):
+        self.enabled = False
+        self.sink = None
+        self.detail = False
+        self.context = {}          # process wide defaults (queue), threads add their city with set_context()
+        self.groups = {}           # 'city:<name>' / 'queue:<id>' -> {'kind:name': Histogram}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def start(self, path, detail=False, **context):
+        """Turn recording on. detail=True also writes every single span as a JSON line (large)."""
+        self.sink = JsonlSink(path)
+        self.detail = detail
+        self.context.update(context)
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+        if self.sink:
+            self.sink.close()
+
+    def set_context(self, **fields):
+        """Per thread labels (city), added to every line and histogram group of this thread"""
+        if not hasattr(self.local, 'context'):
+            self.local.context = {}
+        self.local.context.update(fields)
+
+    def labels(self):
+        return dict(self.context, **getattr(self.local, 'context', {}))
+
+    def stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def span(self, kind, name):
+        """with timings.span('extract', 'schools'): ... -- free when recording is off"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, kind, name)
+
+    def add(self, kind, name, elapsed, self_time):
+        key = f"{kind}:{name}"
+        labels = self.labels()
+        record = getattr(self.local, 'record', None)
+        if record is not None:
+            calls, seconds = record['spans'].get(key, (0, 0.0))
+            record['spans'][key] = (calls + 1, seconds + elapsed)
+            record['self_seconds'][kind] = record['self_seconds'].get(kind, 0.0) + self_time
+        with self.lock:
+            for group in self.group_names(labels):
+                histograms = self.groups.setdefault(group, {})
+                if key not in histograms:
+                    histograms[key] = Histogram()
+                histograms[key].add(elapsed)
+            if self.detail and self.sink:
+                self.sink.append(dict(labels, type='span', kind=kind, name=name, seconds=round(elapsed, 6)))
+
+    def count(self, name, n=1):
+        """Counter of the current property (round trips, page_source bytes), no-op outside of one"""
+        record = getattr(self.local, 'record', None)
+        if record is not None:
+            record['counters'][name] = record['counters'].get(name, 0) + n
+
+    def group_names(self, labels):
+        return [f"{field}:{labels[field]}" for field in ('city', 'queue') if labels.get(field) is not None]
+
+    def property(self, url):
+        """Wraps one property page: collects its spans and counters and writes them as one JSON line"""
+        if not self.enabled:
+            return NULL_SPAN
+        return PropertyScope(self, url)
+
+    def instrument_driver(self, driver):
+        """Wrap driver.execute so every WebDriver round trip is timed and counted"""
+        if not self.enabled or getattr(driver, 'timed_execute', False):
+            return driver
+        execute = driver.execute
+
+        def timed_execute(command, params=None):
+            with self.span('webdriver', command):
+                response = execute(command, params)
+            self.count('round_trips')
+            if command == 'getPageSource' and response:
+                self.count('page_source_bytes', len((response.get('value') or '').encode('utf-8')))
+            return response
+
+        driver.execute = timed_execute
+        driver.timed_execute = True
+        return driver
+
+    def summary(self):
+        with self.lock:
+            return {group: {key: histogram.summary() for key, histogram in sorted(histograms.items())}
+                    for group, histograms in sorted(self.groups.items())}
+
+    def write_summary(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def report(self, group, top=8):
+        """Print the spans that took the most time in one group"""
+        with self.lock:
+            histograms = dict(self.groups.get(group, {}))
+        if not histograms:
+            return
+        print(f"⏱️ Timings for {group}:")
+        for key, histogram in sorted(histograms.items(), key=lambda item: -item[1].total)[:top]:
+            print(f"   {key:<45} {histogram.count:>6}x  total {histogram.total:8.1f}s  p50 {histogram.quantile(0.5)}s  p90 {histogram.quantile(0.9)}s")
+
+
+class PropertyScope:
+    def __init__(self, timings, url):
+        self.timings = timings
+        self.url = url
+
+    def __enter__(self):
+        self.timings.local.record = {'spans': {}, 'self_seconds': {}, 'counters': {}}
+        self.span = self.timings.span('property', 'total').__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.span.__exit__(*exc)
+        record = self.timings.local.record
+        self.timings.local.record = None
+        line = dict(self.timings.labels(), type='property', url=self.url, ok=exc[0] is None,
+                    seconds=round(time.monotonic() - self.span.started, 3),
+                    self_seconds={kind: round(seconds, 3) for kind, seconds in record['self_seconds'].items()},
+                    spans={key: [calls, round(seconds, 4)] for key, (calls, seconds) in record['spans'].items()},
+                    **record['counters'])
+        with self.timings.lock:
+            self.timings.sink.append(line)
+        return False
+
+
+timings = Timings()  # the process wide recorder, shared by every scraper and pool worker
+
+
+def compare(jsonl_path, by='city'):
+    """Average seconds per property and their split per kind, per city (or queue), from a timings log"""
+    groups = {}
+    for line in iter_records(jsonl_path):
+        if line.get('type') != 'property':
+            continue
+        group = groups.setdefault(line.get(by), {'properties': 0, 'seconds': Histogram(), 'self_seconds': {},
+                                                 'round_trips': 0, 'page_source_bytes': 0})
+        group['properties'] += 1
+        group['seconds'].add(line['seconds'])
+        for kind, seconds in line['self_seconds'].items():
+            group['self_seconds'][kind] = group['self_seconds'].get(kind, 0.0) + seconds
+        group['round_trips'] += line.get('round_trips', 0)
+        group['page_source_bytes'] += line.get('page_source_bytes', 0)
+    return groups
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per property timings of a run, per city or queue")
+    parser.add_argument('timings_jsonl')
+    parser.add_argument('--by', choices=['city', 'queue'], default='city')
+    args = parser.parse_args()
+
+    for name, group in sorted(compare(args.timings_jsonl, args.by).items(), key=lambda item: str(item[0])):
+        n = group['properties']
+        split = ', '.join(f"{kind} {seconds / n:.2f}s" for kind, seconds in sorted(group['self_seconds'].items(), key=lambda item: -item[1]))
+        print(f"{name}: {n} properties, {group['seconds'].total / n:.1f}s each (p90 {group['seconds'].quantile(0.9)}s) -> {split}")
+        print(f"   {group['round_trips'] / n:.0f} round trips, {group['page_source_bytes'] / n / 1024:.0f} KB of page_source per property")
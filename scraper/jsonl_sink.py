@@ -0,0 +1,92 @@
+"""
+Append-only JSON Lines output.
+
+Every property is appended as one line the moment extract_complete_property_data returns, instead of
+re-dumping the whole list on every checkpoint and holding the full city in memory. The final JSON and CSV
+files are built from the log at the end, streaming record by record, so memory stays flat even for a
+750 property county. The log itself doubles as the checkpoint: a crash loses at most the records since
+the last fsync. The file is only created with the first record, so a city that yields nothing leaves no
+empty log behind.
+"""
+import os
+import csv
+import json
+import time
+
+
+class JsonlSink:
+    def __init__(self, path, fsync_every=10, fsync_seconds=30):
+        self.path = path
+        self.fsync_every = fsync_every        # fsync after this many records...
+        self.fsync_seconds = fsync_seconds    # ...or this many seconds, whichever comes first
+        self.count = 0
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.file = None  # opened by the first append
+
+    def append(self, record):
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+        self.count += 1
+        self.unsynced += 1
+        if self.unsynced >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_seconds:
+            self.sync()
+
+    def sync(self):
+        if self.unsynced:
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if self.file is not None and not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+def iter_records(jsonl_path):
+    """Records of a JSON Lines file one at a time. A half written last line (crash mid-write) is skipped."""
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def export_json(jsonl_path, json_path):
+    """Same layout as json.dump(list, indent=2), written one record at a time"""
+    count = 0
+    with open(json_path, 'w', encoding='utf-8') as out:
+        out.write('[')
+        for record in iter_records(jsonl_path):
+            body = json.dumps(record, indent=2).replace('\n', '\n  ')
+            out.write((',\n  ' if count else '\n  ') + body)
+            count += 1
+        out.write('\n]' if count else ']')
+    return count
+
+
+def export_csv(jsonl_path, csv_path, flatten):
+    """
+    Flattened CSV in two streaming passes: the first collects the union of columns (in first-seen order,
+    like the DataFrame did), the second writes the rows.
+    """
+    columns = {}
+    for record in iter_records(jsonl_path):
+        for key in flatten(record):
+            columns.setdefault(key, None)
+
+    count = 0
+    with open(csv_path, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.DictWriter(out, fieldnames=list(columns), restval='')
+        writer.writeheader()
+        for record in iter_records(jsonl_path):
+            writer.writerow({key: '' if value is None else value for key, value in flatten(record).items()})
+            count += 1
+    return count
@@ -0,0 +1,160 @@
+"""
+Listing-only crawl: build property records straight from the search result pages, no detail tabs.
+
+A search page already carries price, beds, baths, sqft, address, coordinates and the photo for every
+listing, in the listResults of its __NEXT_DATA__ payload (and, after client side page changes, on the
+rendered cards harvested by search_cards.py). Taking them from there is one page load per ~40 properties
+instead of one per property.
+
+Records made here carry detail_scraped=False. Run this module later to enrich them with the detail pages:
+
+    python listings.py data/queue_1/boston/zillow_q1_boston_....jsonl --output boston_enriched.jsonl
+"""
+import os
+import re
+import argparse
+from embedded_data import find_script_json, format_number, format_lot, format_home_type
+from property_record import new_property_record, is_missing
+
+ZILLOW_ROOT = 'https://www.zillow.com'
+
+# fields only the listing crawl knows, kept when a record is enriched with its detail page
+LISTING_FIELDS = ['latitude', 'longitude', 'listing_status']
+
+
+def find_list_results(page_html):
+    """The listResults of a search page's __NEXT_DATA__ (empty list if the page has none)"""
+    next_data = find_script_json(page_html, '__NEXT_DATA__')
+    try:
+        results = next_data['props']['pageProps']['searchPageState']['cat1']['searchResults']['listResults']
+    except (KeyError, TypeError):
+        return []
+    return results if isinstance(results, list) else []
+
+
+def search_result_count(page_html):
+    """totalResultCount of a search page's __NEXT_DATA__, None when the page does not say"""
+    next_data = find_script_json(page_html, '__NEXT_DATA__')
+    try:
+        return int(next_data['props']['pageProps']['searchPageState']['cat1']['searchList']['totalResultCount'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def listing_key(url):
+    """zpid when the URL has one, so payload entries and card links match even if the URLs differ slightly"""
+    match = re.search(r'/(\d+)_zpid', url or '')
+    return match.group(1) if match else url
+
+
+def absolute_url(detail_url):
+    return ZILLOW_ROOT + detail_url if detail_url.startswith('/') else detail_url
+
+
+def list_result_record(result, scraped_at=None):
+    """One listResults entry -> property record in the same display format as the detail extractors"""
+    home = (result.get('hdpData') or {}).get('homeInfo') or {}
+    record = new_property_record(absolute_url(result['detailUrl']), scraped_at)
+
+    price = result.get('unformattedPrice') or home.get('price')
+    if price:
+        record['price'] = f"${int(price):,}"
+    beds = result.get('beds', home.get('bedrooms'))
+    if beds is not None:
+        record['beds'] = format_number(beds)
+    baths = result.get('baths', home.get('bathrooms'))
+    if baths is not None:
+        record['baths'] = format_number(baths)
+    area = result.get('area') or home.get('livingArea')
+    if area:
+        record['sqft'] = f"{int(area):,}"
+
+    lot = format_lot({'lotAreaValue': home.get('lotAreaValue'), 'lotAreaUnits': home.get('lotAreaUnit')})
+    if lot:
+        record['sqft_lot'] = lot
+    if home.get('homeType'):
+        record['property_type'] = format_home_type(home['homeType'])
+    if result.get('address'):
+        record['address'] = result['address']
+    if result.get('imgSrc'):
+        record['image_url'] = result['imgSrc']
+
+    lat_long = result.get('latLong') or {}
+    record['latitude'] = lat_long.get('latitude', home.get('latitude'))
+    record['longitude'] = lat_long.get('longitude', home.get('longitude'))
+    record['listing_status'] = result.get('statusText') or home.get('homeStatus')
+    record['detail_scraped'] = False
+    return record
+
+
+def card_record(card, scraped_at=None):
+    """Fallback from a harvested DOM card (search_cards.harvest_search_cards), no coordinates there"""
+    record = new_property_record(card['url'], scraped_at)
+    for field in ['price', 'beds', 'baths', 'sqft', 'address', 'image_url']:
+        if card.get(field):
+            record[field] = card[field]
+    record['latitude'] = None
+    record['longitude'] = None
+    record['listing_status'] = card.get('status')
+    record['detail_scraped'] = False
+    return record
+
+
+def listing_records(links, page_html, cards):
+    """
+    Records for the links of one search page: from the embedded payload when it covers the link (the
+    payload is stale after a client side page change), else from the card, else bare.
+    """
+    payload = {listing_key(absolute_url(result['detailUrl'])): result
+               for result in find_list_results(page_html) if result.get('detailUrl')}
+    records = []
+    for url in links:
+        if listing_key(url) in payload:
+            records.append(list_result_record(payload[listing_key(url)]))
+        elif url in cards:
+            records.append(card_record(cards[url]))
+        else:
+            records.append(card_record({'url': url}))
+    return records
+
+
+def merge_listing(detail_data, listing_data):
+    """Detail page wins, the listing fills whatever the detail page did not have (plus the coordinates)"""
+    merged = dict(detail_data)
+    for field, value in listing_data.items():
+        if field in LISTING_FIELDS or field not in merged or (is_missing(merged[field]) and not is_missing(value)):
+            merged[field] = value
+    merged['detail_scraped'] = True
+    return merged
+
+
+def enrich_listings(scraper, records, already_enriched=()):
+    """Open the detail page of every listing-only record, yields the merged records"""
+    for record in records:
+        if record.get('detail_scraped') is not False or record['url'] in already_enriched:
+            continue
+        detail_data = scraper.scrape_property_in_new_tab(record['url'])
+        if detail_data:
+            yield merge_listing(detail_data, record)
+
+
+if __name__ == "__main__":
+    from zillow import MultiPropertyZillowScraper
+    from jsonl_sink import JsonlSink, iter_records
+
+    parser = argparse.ArgumentParser(description="Enrich listing-only records with their detail pages")
+    parser.add_argument('input', help="JSON Lines file written in listing mode")
+    parser.add_argument('--output', required=True, help="JSON Lines file for the enriched records (appended, resumable)")
+    parser.add_argument('--headless', action='store_true')
+    args = parser.parse_args()
+
+    done = {record['url'] for record in iter_records(args.output)} if os.path.exists(args.output) else set()
+    scraper = MultiPropertyZillowScraper(headless=args.headless)
+    sink = JsonlSink(args.output)
+    try:
+        for enriched in enrich_listings(scraper, iter_records(args.input), done):
+            sink.append(enriched)
+            print(f"✅ Enriched {sink.count}: {enriched['url']}")
+    finally:
+        sink.close()
+        scraper.driver.quit()
@@ -5,17 +5,27 @@ from datetime import datetime
 from city_queues import city_queues
 import os
 from zillow import MultiPropertyZillowScraper  
+from pool import run_pool
+from search_api import crawl_queue
+from crawl_state import CrawlState
+from pacing import get_pacer
+from typed_export import write_typed_dataset
+from page_cache import PageCache
+from resource_blocking import ResourceBlocker, BLOCK_CATEGORIES
+from response_capture import ResponseCapture
+from browser_lifecycle import BrowserLifecycle
+from instrumentation import timings
 
-def smart_sleep(sleep_type):
-    """Smart randomized delays"""
-    sleep_ranges = {
-        'between_properties': (1.5, 3.0),
-        'between_cities': (45, 75),        # Randomized city breaks
-        'after_error': (10, 20),           # Error recovery
-        'navigation': (2, 4)               # General navigation
+def smart_sleep(sleep_type, pacer):
+    """Randomized delays measured in page load intervals of the adaptive pacer, so they shrink while Zillow is happy and grow after push back"""
+    sleep_intervals = {
+        'between_properties': 0.5,
+        'between_cities': 10,              # Randomized city breaks
+        'after_error': 3,                  # Error recovery
+        'navigation': 0.5                  # General navigation
     }
     
-    delay = random.uniform(*sleep_ranges.get(sleep_type, (2, 4)))
+    delay = sleep_intervals.get(sleep_type, 0.5) * pacer.interval() * random.uniform(0.8, 1.2)
     return delay
 
 if __name__ == "__main__":
@@ -28,6 +38,75 @@ if __name__ == "__main__":
     queue_id = int(os.getenv('QUEUE_ID', '1'))
     headless = os.getenv('HEADLESS', 'false').lower() == 'true'
     output_base_dir = os.getenv('OUTPUT_DIR', 'data')
+    stream_output = os.getenv('STREAM_OUTPUT', 'true').lower() == 'true'  # append-only JSON Lines per city
+    extraction_mode = os.getenv('EXTRACTION_MODE', 'live').lower()  # 'live', 'offline' (lxml parser), 'structured' (embedded JSON) or 'script' (one in-browser call, see page_script.py)
+    crawl_mode = os.getenv('CRAWL_MODE', 'full').lower()  # 'full' (every property page), 'listing' (search pages only, enrich later with listings.py) or 'api' (search JSON endpoint, no browser)
+    typed_export = os.getenv('TYPED_EXPORT', 'parquet').lower()  # 'parquet', 'arrow' or 'none' -> typed dataset under <OUTPUT_DIR>/typed
+    
+    # Page cache: every loaded page gzipped under PAGE_CACHE, re-extract later with `python page_cache.py replay`
+    page_cache_dir = os.getenv('PAGE_CACHE')
+    cache_mode = os.getenv('PAGE_CACHE_MODE', 'record').lower()  # 'record' or 'replay' (cached property pages are not fetched again)
+    page_cache = PageCache(page_cache_dir, max_bytes=int(float(os.getenv('PAGE_CACHE_MAX_MB', '2048')) * 1024 ** 2),
+                           ttl_seconds=float(os.getenv('PAGE_CACHE_TTL_DAYS', '30')) * 24 * 3600) if page_cache_dir else None
+    
+    # Resource blocking on property tabs: BLOCK_RESOURCES is a comma list of images, fonts, media, maps, trackers
+    # or 'all' (off by default, so a crawl loads what it always loaded until you opt in), BLOCK_ALLOW adds URL
+    # patterns that must never be blocked, every BLOCK_SAMPLE_EVERY-th page loads unblocked to estimate the bytes saved (0 = never)
+    block_resources = os.getenv('BLOCK_RESOURCES', '').lower()
+    block_categories = list(BLOCK_CATEGORIES) if block_resources == 'all' else [c.strip() for c in block_resources.split(',') if c.strip() and c.strip() != 'none']
+    resource_blocker = ResourceBlocker(block_categories, allow=[p.strip() for p in os.getenv('BLOCK_ALLOW', '').split(',') if p.strip()],
+                                       sample_every=int(os.getenv('BLOCK_SAMPLE_EVERY', '25'))) if block_categories else None
+    
+    # Response capture: the JSON of the page's own data calls (climate, schools, scores...) fills fields without
+    # scrolling to them. CAPTURE_RESPONSES=true turns it on, CAPTURE_LOG=<file.jsonl> also keeps every body
+    capture_log = os.getenv('CAPTURE_LOG')
+    if capture_log:
+        os.makedirs(os.path.dirname(os.path.abspath(capture_log)), exist_ok=True)
+    response_capture = ResponseCapture(log_path=capture_log) if os.getenv('CAPTURE_RESPONSES', 'false').lower() == 'true' else None
+    
+    # Pipelined tabs: PREFETCH_TABS property pages (1 or 2) load in other tabs while one is extracted, see tab_prefetch.py
+    prefetch_depth = int(os.getenv('PREFETCH_TABS', '0'))
+    
+    # Browser recycling: a fresh Chrome after BROWSER_MAX_PAGES pages or once its process tree goes over
+    # BROWSER_MAX_RSS_MB (0 turns either limit off), BROWSER_MAX_CPU optionally caps the summed CPU %
+    lifecycle_settings = {'max_pages': int(os.getenv('BROWSER_MAX_PAGES', '200')),
+                          'max_rss_mb': float(os.getenv('BROWSER_MAX_RSS_MB', '3000')),
+                          'max_cpu_percent': float(os.getenv('BROWSER_MAX_CPU')) if os.getenv('BROWSER_MAX_CPU') else None,
+                          'check_every': int(os.getenv('BROWSER_CHECK_EVERY', '5'))}
+    
+    # Pool mode: POOL_WORKERS browsers in this one process share the work of every queue
+    pool_workers = int(os.getenv('POOL_WORKERS', '0'))
+    pool_rate = float(os.getenv('POOL_RATE_PER_MINUTE', '20'))  # global property page loads per minute
+    task_db = os.getenv('TASK_DB')  # shared SQLite task store -> dynamic work-stealing scheduler instead of a fixed collector
+    
+    # Adaptive pacing (page loads per minute): starts at PACE_START_RPM, speeds up towards PACE_MAX_RPM while pages
+    # load fine and backs off towards PACE_MIN_RPM on slow pages, failures and bot detection
+    pacer = get_pacer(start_rate=float(os.getenv('PACE_START_RPM', '10')),
+                      min_rate=float(os.getenv('PACE_MIN_RPM', '2')),
+                      max_rate=float(os.getenv('PACE_MAX_RPM', str(pool_rate) if pool_workers > 0 else '30')))
+    
+    # Timings: one JSON line per property (WebDriver round trips, waits, sleeps, extractors) plus histograms per
+    # city and queue in <name>_summary.json. Summarize or compare runs with `python instrumentation.py <file>`
+    timings_path = os.getenv('TIMINGS')
+    timings_summary_path = os.path.splitext(timings_path)[0] + "_summary.json" if timings_path else None
+    if timings_path:
+        os.makedirs(os.path.dirname(os.path.abspath(timings_path)), exist_ok=True)
+        timings.start(timings_path, detail=os.getenv('TIMINGS_DETAIL', 'false').lower() == 'true',
+                      queue='pool' if pool_workers > 0 else queue_id)
+        print(f"Timings: {timings_path}")
+    
+    if pool_workers > 0:
+        all_cities = [city for queue in city_queues.values() for city in queue]
+        run_pool(all_cities, pool_workers, os.path.abspath(output_base_dir), headless=headless,
+                 extraction_mode=extraction_mode, requests_per_minute=pool_rate, task_db=task_db,
+                 page_cache=page_cache, cache_mode=cache_mode, resource_blocker=resource_blocker,
+                 response_capture=response_capture, lifecycle_settings=lifecycle_settings)
+        if response_capture:
+            response_capture.close()
+        if timings_path:
+            timings.write_summary(timings_summary_path)
+            timings.stop()
+        exit(0)
     
     # Get the queue for this terminal
     my_queue = city_queues.get(queue_id, city_queues[1])
@@ -40,6 +119,14 @@ if __name__ == "__main__":
     print(f"  • Cities in queue: {len(my_queue)}")
     print(f"  • Expected properties: {expected_total}")
     print(f"  • Headless mode: {headless}")
+    print(f"  • Crawl mode: {crawl_mode}")
+    print(f"  • Extraction mode: {extraction_mode}")
+    print(f"  • Typed export: {typed_export}")
+    print(f"  • Page cache: {f'{page_cache_dir} ({cache_mode})' if page_cache else 'off'}")
+    print(f"  • Resource blocking: {', '.join(resource_blocker.categories) if resource_blocker else 'off'}")
+    print(f"  • Prefetched tabs: {prefetch_depth or 'off'}")
+    print(f"  • Browser recycling: every {lifecycle_settings['max_pages'] or '∞'} pages or above {lifecycle_settings['max_rss_mb'] or '∞'} MB")
+    print(f"  • Response capture: {('on, logged to ' + capture_log if capture_log else 'on') if response_capture else 'off'}")
     print(f"  • Output base directory: {output_base_dir}")
     print("-" * 60)
     print(f"Queue {queue_id} cities:")
@@ -51,9 +138,29 @@ if __name__ == "__main__":
     base_dir = os.path.abspath(output_base_dir)
     os.makedirs(base_dir, exist_ok=True)
     
+    if crawl_mode == 'api':
+        # no browser at all: listing records straight from the search JSON endpoint, see search_api.py
+        crawl_queue(my_queue, os.path.join(base_dir, f"queue_{queue_id}"))
+        exit(0)
+    
+    # Durable crawl state: a restarted queue resumes where it stopped instead of rescraping
+    queue_dir = os.path.join(base_dir, f"queue_{queue_id}")
+    os.makedirs(queue_dir, exist_ok=True)
+    state_db = os.getenv('STATE_DB', os.path.join(queue_dir, "crawl_state.db"))
+    crawl_state = CrawlState(state_db)
+    print(f"Crawl state: {state_db}")
+    # Completed cities are skipped on later runs: RECRAWL=true crawls every one of them again, RECRAWL_AFTER_DAYS
+    # only those completed longer ago than that
+    recrawl = os.getenv('RECRAWL', 'false').lower() == 'true'
+    recrawl_after = float(os.getenv('RECRAWL_AFTER_DAYS')) * 24 * 3600 if os.getenv('RECRAWL_AFTER_DAYS') else None
+    
     # Initialize scraper once for all cities
     try:
-        scraper = MultiPropertyZillowScraper(headless=headless)
+        scraper = MultiPropertyZillowScraper(headless=headless, extraction_mode=extraction_mode, crawl_state=crawl_state,
+                                             crawl_mode=crawl_mode, page_cache=page_cache, cache_mode=cache_mode,
+                                             resource_blocker=resource_blocker, response_capture=response_capture,
+                                             prefetch_depth=prefetch_depth,
+                                             browser_lifecycle=BrowserLifecycle(**lifecycle_settings))
     except Exception as e:
         print(f"Failed to initialize scraper: {e}")
         exit(1)
@@ -70,6 +177,14 @@ if __name__ == "__main__":
         print(f"Using optimized search URL: {search_url[:60]}...")
         print(f"🏙️ " * 20)
         
+        if crawl_state.is_city_completed(city, max_age=recrawl_after) and not recrawl:
+            print(f"✓ {city} was already completed in a previous run, skipping.")
+            cities_completed += 1
+            continue
+        if crawl_state.is_city_completed(city):
+            print(f"🔄 {city} was completed in a previous run, crawling it again.")
+            crawl_state.reset_city(city)
+        
         try:
             
             city_dir_name = city.replace('-ma', '').replace('-', '_').lower()
@@ -79,12 +194,21 @@ if __name__ == "__main__":
             
             print(f"📁 Output directory: {city_output_dir}")
             
+            if stream_output:
+                started_at = datetime.now().strftime("%Y%m%d_%H%M%S")
+                scraper.start_streaming(os.path.join(city_output_dir, f"zillow_q{queue_id}_{city_dir_name}_{started_at}.jsonl"))
+            
             # Scrape properties for this city
             print(f"\n🚀 Starting to scrape {max_properties_this_city} properties from {city}...")
-            all_properties = scraper.scrape_multiple_properties(search_url, max_properties=max_properties_this_city)
+            with timings.span('city', 'scrape_multiple_properties'):
+                scraper.scrape_multiple_properties(search_url, max_properties=max_properties_this_city, city=city)
+            properties_count = scraper.scraped_count()
+            if timings_path:
+                timings.report(f"city:{city}")
+                timings.write_summary(timings_summary_path)
             
             # Save data for this city with unique naming
-            if all_properties:
+            if properties_count:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 safe_city_name = city.replace('-ma', '').replace('-', '_').lower()
                 filename_prefix = f"zillow_q{queue_id}_{safe_city_name}_{max_properties_this_city}props_{timestamp}"
@@ -97,37 +221,46 @@ if __name__ == "__main__":
                 finally:
                     os.chdir(original_cwd)
                 
+                if typed_export != 'none':
+                    try:
+                        write_typed_dataset(scraper.scraped_properties(), os.path.join(base_dir, "typed"),
+                                            queue_id, city_dir_name, fmt=typed_export)
+                    except Exception as e:
+                        print(f" Typed export failed (JSON/CSV are saved): {e}")
+                
                 # Create city summary
                 city_summary = {
                     "queue_id": queue_id,
                     "city": city,
                     "target_properties": max_properties_this_city,
-                    "actual_properties": len(all_properties),
+                    "actual_properties": properties_count,
                     "city_index": city_index,
                     "timestamp": timestamp,
                     "json_file": json_file,
                     "csv_file": csv_file,
                     "output_directory": city_output_dir,
-                    "success_rate": (len(all_properties) / max_properties_this_city) * 100
+                    "success_rate": (properties_count / max_properties_this_city) * 100
                 }
                 
                 
                 summary_file = os.path.join(city_output_dir, f"summary_q{queue_id}_{safe_city_name}_{timestamp}.json")
                 with open(summary_file, 'w') as f:
                     json.dump(city_summary, f, indent=2)
+                crawl_state.mark_city_completed(city)
                 
                 print(f"\n{city} COMPLETED!")
                 print(f"  -> Target: {max_properties_this_city} properties")
-                print(f"   ✓ Actual: {len(all_properties)} properties")
-                print(f"    Success: {(len(all_properties)/max_properties_this_city)*100:.1f}%")
+                print(f"   ✓ Actual: {properties_count} properties")
+                print(f"    Success: {(properties_count/max_properties_this_city)*100:.1f}%")
                 print(f"   📁 Data saved to: {city_output_dir}")
                 print(f"   📄 Files: {json_file}, {csv_file}")
                 
-                total_properties_scraped += len(all_properties)
+                total_properties_scraped += properties_count
                 cities_completed += 1
                 
                 # Clear the scraper's data for next city
                 scraper.all_properties_data = []
+                scraper.sink = None
                 scraper.scraped_urls = set() 
                 
             else:
@@ -141,18 +274,20 @@ if __name__ == "__main__":
             cities_failed += 1
             
             # Try to save partial data if any
-            if hasattr(scraper, 'all_properties_data') and scraper.all_properties_data:
+            if scraper.scraped_count():
                 try:
                     original_cwd = os.getcwd()
                     os.chdir(city_output_dir)
                     scraper.save_all_properties(filename_prefix=f"zillow_{city}_error_partial")
                     os.chdir(original_cwd)
                     scraper.all_properties_data = []
+                    scraper.sink = None
                 except Exception as save_error:
                     print(f" Could not save partial data: {save_error}")
             
             # FIX 7: Longer delay after errors
-            error_delay = smart_sleep('after_error')
+            pacer.record_failure()
+            error_delay = smart_sleep('after_error', pacer)
             print(f"⏳ Error recovery delay: {error_delay:.1f} seconds...")
             time.sleep(error_delay)
         
@@ -171,7 +306,7 @@ if __name__ == "__main__":
             next_city, next_target, _ = my_queue[city_index]
             print(f"   • Next city: {next_city} (target: {next_target} properties)")
             
-            city_delay = smart_sleep('between_cities')
+            city_delay = smart_sleep('between_cities', pacer)
             print(f"\n City break: {city_delay:.1f} seconds before {next_city}...")
             time.sleep(city_delay)
     
@@ -193,6 +328,19 @@ if __name__ == "__main__":
     
     success_rate = (total_properties_scraped/expected_total)*100 if expected_total > 0 else 0
     print(f" Success rate: {success_rate:.1f}%")
+    print(f" Pacing: {pacer.summary()}")
+    if resource_blocker:
+        print(f" Resource blocking: {resource_blocker.summary()}")
+    if response_capture:
+        print(f" Response capture: {response_capture.summary()}")
+        response_capture.close()
+    if scraper.browser_lifecycle:
+        print(f" Browser lifecycle: {scraper.browser_lifecycle.summary()}")
+    if timings_path:
+        timings.report(f"queue:{queue_id}")
+        timings.write_summary(timings_summary_path)
+        timings.stop()
+        print(f" Timings: {timings_summary_path}")
     print(f" Data saved in: {base_dir}/queue_{queue_id}/")
     
     # Create overall queue summary
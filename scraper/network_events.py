@@ -0,0 +1,57 @@
+"""
+Network events of the browser, read from chromedriver's performance log.
+
+With goog:loggingPrefs performance=ALL chromedriver records every DevTools Network.* event of the page
+(requestWillBeSent, responseReceived, loadingFinished, loadingFailed...). driver.get_log('performance')
+hands them over and empties the buffer, so one caller per page reads them (the scraper) and passes the
+list on to whoever needs it: resource_blocking.py for the bytes per page, response_capture.py for the bodies.
+Every event keeps the 'webview' chromedriver logged it for (the tab's window handle), so the events of tabs
+loading side by side (tab_prefetch.py) can be told apart.
+"""
+import json
+
+
+def enable_network_events(options):
+    """Turn the performance log on, call on the ChromeOptions before the driver is started"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def read_network_events(driver):
+    """Network.* events logged since the last call, as {'method': ..., 'params': {...}, 'webview': ...} dicts"""
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        return []
+    events = []
+    for entry in entries:
+        try:
+            logged = json.loads(entry['message'])
+            message = logged['message']
+        except (KeyError, ValueError):
+            continue
+        if message.get('method', '').startswith('Network.'):
+            message['webview'] = logged.get('webview')
+            events.append(message)
+    return events
+
+
+def page_traffic(events):
+    """{'requests', 'bytes', 'blocked', 'blocked_by_type', 'bytes_by_type'} of one page's events"""
+    types = {}
+    traffic = {'requests': 0, 'bytes': 0, 'blocked': 0, 'blocked_by_type': {}, 'bytes_by_type': {}}
+    for event in events:
+        params = event.get('params', {})
+        request_id = params.get('requestId')
+        if event['method'] == 'Network.requestWillBeSent':
+            traffic['requests'] += 1
+            types[request_id] = params.get('type', 'Other')
+        elif event['method'] == 'Network.loadingFinished':
+            size = int(params.get('encodedDataLength') or 0)
+            resource_type = types.get(request_id, 'Other')
+            traffic['bytes'] += size
+            traffic['bytes_by_type'][resource_type] = traffic['bytes_by_type'].get(resource_type, 0) + size
+        elif event['method'] == 'Network.loadingFailed' and params.get('blockedReason'):
+            resource_type = params.get('type') or types.get(request_id, 'Other')
+            traffic['blocked'] += 1
+            traffic['blocked_by_type'][resource_type] = traffic['blocked_by_type'].get(resource_type, 0) + 1
+    return traffic
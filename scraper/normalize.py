@@ -0,0 +1,236 @@
+"""
+Turns the display strings of a scraped property ("$1,234", "3/100", "0.31 Acres", "Minor (3/10)", "N/A")
+into typed values, so downstream code does not have to re-parse them. None means missing.
+
+normalize_frame does a whole batch at once with vectorized string ops (Arrow backed) and returns nullable
+pandas columns, which is what the price model should be fed; typed_export.to_table writes the same frame.
+"""
+import re
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+SQFT_PER_ACRE = 43560
+
+RISK_LEVELS = ['Minimal', 'Minor', 'Moderate', 'Major', 'Severe']
+
+# Named groups for the Arrow (RE2) str.extract in normalize_frame, ZPID_REGEX also works for re (parse_zpid)
+NUMBER_REGEX = r'(?P<number>-?\d[\d,]*(?:\.\d+)?|-?\.\d+)'
+ZPID_REGEX = r'/(?P<zpid>\d+)_zpid'
+ZPID_PATTERN = re.compile(ZPID_REGEX)
+RISK_REGEX = r'(?i)(?P<level>Minimal|Minor|Moderate|Major|Severe)\s*\((?P<score>\d+)/10\)'
+
+
+def is_missing(value):
+    return value is None or value == 'N/A' or value == ''
+
+
+def parse_date(value):
+    """'05/01/2020' -> date(2020, 5, 1)"""
+    if is_missing(value):
+        return None
+    try:
+        return datetime.strptime(str(value), '%m/%d/%Y').date()
+    except ValueError:
+        return None
+
+
+def parse_timestamp(value):
+    if is_missing(value):
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def parse_zpid(url):
+    match = ZPID_PATTERN.search(url or '')
+    return int(match.group(1)) if match else None
+
+
+# ---- batch columns --------------------------------------------------------------------------------------
+
+ARROW_STRING = pd.ArrowDtype(pa.string())
+MISSING_TEXT = pa.array(['N/A', ''])
+TEXT_LIST = pa.list_(pa.string())
+HISTORY_EVENT = pa.struct([('date', pa.date32()), ('event', pa.string()), ('price', pa.int64())])
+
+LIST_COLUMNS = ['interior_features', 'other_rooms', 'appliances', 'nearby_cities']
+
+NUMERIC_COLUMNS = {
+    # column: (record key, nested key, dtype)
+    'price': ('price', None, 'Int64'),
+    'beds': ('beds', None, 'Int64'),
+    'baths': ('baths', None, 'Float64'),
+    'sqft': ('sqft', None, 'Int64'),
+    'estimated_monthly_payment': ('estimated_monthly_payment', None, 'Int64'),
+    'price_per_sqft': ('price_per_sqft', None, 'Int64'),
+    'year_built': ('year_built', None, 'Int64'),
+    'latitude': ('latitude', None, 'Float64'),
+    'longitude': ('longitude', None, 'Float64'),
+    'parking_total_spaces': ('parking', 'total_spaces', 'Int64'),
+    'parking_garage_spaces': ('parking', 'garage_spaces', 'Int64'),
+    'walk_score': ('walk_score', None, 'Int64'),
+    'bike_score': ('bike_score', None, 'Int64'),
+    'transit_score': ('transit_score', None, 'Int64'),
+    'elementary_school_distance_mi': ('elementary_school', 'distance', 'Float64'),
+    'middle_school_distance_mi': ('middle_school', 'distance', 'Float64'),
+    'high_school_distance_mi': ('high_school', 'distance', 'Float64'),
+}
+
+TEXT_COLUMNS = {
+    'url': ('url', None),
+    'image_url': ('image_url', None),
+    'address': ('address', None),
+    'region': ('region', None),
+    'utilities_electric': ('utilities', 'Electric'),
+    'utilities_sewer': ('utilities', 'Sewer'),
+    'utilities_water': ('utilities', 'Water'),
+    'parking_features': ('parking', 'parking_features'),
+    'elementary_school_name': ('elementary_school', 'name'),
+    'middle_school_name': ('middle_school', 'name'),
+    'high_school_name': ('high_school', 'name'),
+}
+
+
+class RecordColumns:
+    """Pulls fields out of a batch of records as Arrow string columns, each nested dict gathered only once"""
+    def __init__(self, records):
+        self.records = records
+        self.nested = {}
+
+    def get(self, key, subkey=None):
+        if subkey is None:
+            values = [record.get(key) for record in self.records]
+        else:
+            if key not in self.nested:
+                self.nested[key] = [value if isinstance(value, dict) else {} for value in (record.get(key) for record in self.records)]
+            values = [value.get(subkey) for value in self.nested[key]]
+        try:
+            array = pa.array(values, pa.string())
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            array = pa.array([value if value is None or isinstance(value, str) else str(value) for value in values], pa.string())
+        array = pc.if_else(pc.is_in(array, value_set=MISSING_TEXT), pa.scalar(None, pa.string()), array)
+        return pd.Series(pd.arrays.ArrowExtensionArray(array))
+
+    def text_lists(self, key):
+        """A list of strings per record, [] when the field is not a list"""
+        values = [value if isinstance(value, list) else [] for value in (record.get(key) for record in self.records)]
+        try:
+            array = pa.array(values, TEXT_LIST)
+            if array.flatten().null_count:
+                raise pa.ArrowInvalid("None items")
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            array = pa.array([[str(item) for item in value] for value in values], TEXT_LIST)
+        return pd.Series(pd.arrays.ArrowExtensionArray(array))
+
+    def history(self):
+        """property_history as a list of {date, event, price} per record, every event of the batch parsed at once"""
+        counts = []
+        events = []
+        for value in (record.get('property_history') for record in self.records):
+            record_events = [event for event in value if isinstance(event, dict)] if isinstance(value, list) else []
+            counts.append(len(record_events))
+            events.extend(record_events)
+        columns = RecordColumns(events)
+        fields = [
+            parse_distinct(columns.get('date'), parse_date, pa.date32()),
+            arrow(columns.get('event')),
+            pa.array(numbers(columns.get('price')).round().astype('Int64'), pa.int64()),
+        ]
+        offsets = pa.array(np.concatenate([[0], np.cumsum(counts, dtype=np.int32)]), pa.int32())
+        array = pa.ListArray.from_arrays(offsets, pa.StructArray.from_arrays(fields, fields=list(HISTORY_EVENT)))
+        return pd.Series(pd.arrays.ArrowExtensionArray(array))
+
+
+def arrow(column):
+    """The Arrow array behind an Arrow backed pandas column, in one chunk"""
+    array = pa.array(column.array)
+    return array.combine_chunks() if isinstance(array, pa.ChunkedArray) else array
+
+
+def parse_distinct(column, parse, arrow_type):
+    """A scalar parser applied once per distinct string of the column, dates and timestamps repeat a lot"""
+    encoded = arrow(column).dictionary_encode()
+    parsed = pa.array([parse(value) for value in encoded.dictionary.to_pylist()], arrow_type)
+    return parsed.take(encoded.indices)
+
+
+def distinct_values(column):
+    """(distinct strings as a column, indices back into it), so the regex work is done once per distinct value"""
+    encoded = arrow(column).dictionary_encode()
+    return pd.Series(pd.arrays.ArrowExtensionArray(encoded.dictionary)), encoded.indices
+
+
+def expand(distinct, indices):
+    """A column computed on distinct_values back to one row per record"""
+    return pd.Series(pd.arrays.ArrowExtensionArray(arrow(distinct).take(indices)))
+
+
+def timestamps(column):
+    """ISO timestamps cast by Arrow in one pass, parse_timestamp per distinct value when a string does not cast"""
+    try:
+        return pc.cast(arrow(column), pa.timestamp('us'))
+    except pa.ArrowInvalid:  # offsets, 'Z', compact or garbage strings: fromisoformat decides, same as before
+        return parse_distinct(column, parse_timestamp, pa.timestamp('us'))
+
+
+def numbers(column):
+    """Vectorized parse_float: first number in each string, commas dropped"""
+    distinct, indices = distinct_values(column)
+    extracted = distinct.str.extract(NUMBER_REGEX, expand=False)
+    values = extracted.str.replace(',', '', regex=False).astype(pd.ArrowDtype(pa.float64()))
+    return expand(values, indices).astype('Float64')
+
+
+def categorical(column, categories=None, ordered=False):
+    """Arrow string column -> pandas Categorical without a round trip through Python objects"""
+    array = arrow(column)
+    if categories is None:
+        encoded = array.dictionary_encode()  # categories in order of appearance, codes in the same pass
+        codes, categories = encoded.indices, encoded.dictionary.to_pylist()
+    else:
+        codes = pc.index_in(array, value_set=pa.array(categories, pa.string()))
+    return pd.Categorical.from_codes(pc.fill_null(codes, -1).to_numpy(), categories=categories, ordered=ordered)
+
+
+def normalize_frame(records):
+    """
+    Raw property_data dicts -> DataFrame of typed columns (see typed_export.SCHEMA) with nullable dtypes (Int64,
+    Float64, category, datetime64, Arrow lists), so missing values are an explicit mask instead of 'N/A'
+    strings or NaN guesses.
+    """
+    columns = RecordColumns([record for record in records if isinstance(record, dict)])
+    frame = {}
+
+    urls = columns.get('url')
+    frame['zpid'] = pd.Series(pc.cast(pc.struct_field(pc.extract_regex(arrow(urls), ZPID_REGEX), [0]), pa.int64())).astype('Int64')
+    frame['scraped_at'] = timestamps(columns.get('scraped_at')).to_pandas()
+
+    for column, (key, subkey, dtype) in NUMERIC_COLUMNS.items():
+        values = numbers(columns.get(key, subkey))
+        frame[column] = values.round().astype('Int64') if dtype == 'Int64' else values
+
+    lots = columns.get('sqft_lot')
+    in_acres = lots.str.lower().str.contains('acre', regex=False).fillna(False).astype(bool).to_numpy()
+    lot_numbers = numbers(lots)
+    frame['lot_sqft'] = lot_numbers.mask(in_acres, lot_numbers * SQFT_PER_ACRE)
+
+    for column, (key, subkey) in TEXT_COLUMNS.items():
+        frame[column] = urls if key == 'url' else columns.get(key, subkey)
+    frame['property_type'] = categorical(columns.get('property_type'))
+
+    for risk in ['flood', 'fire', 'wind', 'air', 'heat']:
+        distinct, indices = distinct_values(columns.get(f'{risk}_risk'))
+        parts = distinct.str.extract(RISK_REGEX)
+        frame[f'{risk}_risk_level'] = categorical(expand(parts['level'].str.title(), indices), RISK_LEVELS, ordered=True)
+        frame[f'{risk}_risk_score'] = expand(parts['score'].astype(pd.ArrowDtype(pa.int64())), indices).astype('Int64')
+
+    for column in LIST_COLUMNS:
+        frame[column] = columns.text_lists(column)
+    frame['property_history'] = columns.history()
+
+    return pd.DataFrame(frame)
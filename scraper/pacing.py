@@ -0,0 +1,141 @@
+"""
+Adaptive pacing instead of fixed random sleeps.
+
+Every host gets one HostPacer, shared by all scrapers (and pool workers) in the process. It is a token
+bucket whose refill rate is steered AIMD style, like TCP congestion control:
+
+  * a page that loads normally      -> additive increase of the rate (a bit faster next time)
+  * a page that loads much slower    -> multiplicative decrease (the site is straining)
+  * a failed page                    -> multiplicative decrease
+  * a block (bot detection timeout)  -> rate drops to the floor and everybody cools down for a while
+
+So the crawl speeds up while Zillow answers quickly and backs off as soon as it starts pushing back, instead
+of always paying the worst case constants. In-page pauses (scrolling, lazy loading, city breaks) are scaled
+with the current pace too, see pause().
+"""
+import time
+import random
+import threading
+from urllib.parse import urlparse
+from instrumentation import timings
+
+DEFAULT_HOST = 'www.zillow.com'
+
+
+class HostPacer:
+    def __init__(self, host, start_rate=10, min_rate=2, max_rate=30, burst=1,
+                 increase_step=0.5, decrease_factor=0.5, slow_decrease_factor=0.8, slow_factor=2.5, block_cooldown=60):
+        self.host = host
+        self.rate = float(start_rate)          # page loads per minute
+        self.start_rate = float(start_rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.burst = burst
+        self.increase_step = increase_step     # + this many loads/min after a healthy page
+        self.decrease_factor = decrease_factor # * this after a failure
+        self.slow_decrease_factor = slow_decrease_factor  # * this after a slow page
+        self.slow_factor = slow_factor         # latency this many times the average counts as congestion
+        self.block_cooldown = block_cooldown   # seconds of silence after the first block, doubles per block in a row
+
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.cooldown_until = 0.0
+        self.average_latency = None
+        self.consecutive_failures = 0
+        self.consecutive_blocks = 0
+        self.stats = {'loads': 0, 'successes': 0, 'slow': 0, 'failures': 0, 'blocks': 0, 'waited': 0.0}
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate / 60.0)
+        self.last_refill = now
+
+    def wait(self):
+        """Block until this host may get another page load"""
+        started = time.monotonic()
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.refill(now)
+                if now >= self.cooldown_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.stats['loads'] += 1
+                    self.stats['waited'] += now - started
+                    return now - started
+                # a bit of jitter so the requests don't look like a metronome
+                wait_time = max(self.cooldown_until - now, (1 - self.tokens) * 60.0 / self.rate) * random.uniform(1.0, 1.3)
+            with timings.span('sleep', 'pacer.wait'):
+                time.sleep(wait_time)
+
+    def try_wait(self):
+        """wait() without the waiting: takes the slot if one is free right now, for loads that may just as well start later"""
+        with self.lock:
+            now = time.monotonic()
+            self.refill(now)
+            if now >= self.cooldown_until and self.tokens >= 1:
+                self.tokens -= 1
+                self.stats['loads'] += 1
+                return True
+            return False
+
+    def interval(self):
+        """Current seconds between page loads"""
+        return 60.0 / self.rate
+
+    def pause(self, fraction):
+        """Sleep fraction * current interval (with jitter), for waits inside a page that should follow the pace"""
+        delay = fraction * self.interval() * random.uniform(0.8, 1.2)
+        with timings.span('sleep', 'pacer.pause'):
+            time.sleep(delay)
+        return delay
+
+    def record_success(self, latency=None):
+        with self.lock:
+            self.stats['successes'] += 1
+            self.consecutive_failures = 0
+            self.consecutive_blocks = 0
+            if latency is not None and self.average_latency and latency > self.slow_factor * self.average_latency:
+                self.stats['slow'] += 1
+                self.set_rate(self.rate * self.slow_decrease_factor)
+            else:
+                self.set_rate(self.rate + self.increase_step)
+            if latency is not None:
+                self.average_latency = latency if self.average_latency is None else 0.8 * self.average_latency + 0.2 * latency
+
+    def record_failure(self):
+        with self.lock:
+            self.stats['failures'] += 1
+            self.consecutive_failures += 1
+            self.set_rate(self.rate * self.decrease_factor)
+
+    def record_block(self):
+        """Bot detection: floor the rate and make every worker on this host sit still for a while"""
+        with self.lock:
+            self.stats['blocks'] += 1
+            self.consecutive_blocks += 1
+            self.set_rate(self.min_rate)
+            cooldown = self.block_cooldown * 2 ** (self.consecutive_blocks - 1)
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + cooldown)
+            self.tokens = 0
+        print(f"🐢 {self.host}: block signal, cooling down {cooldown:.0f}s at {self.rate:.1f} loads/min")
+
+    def set_rate(self, rate):
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+
+    def summary(self):
+        with self.lock:
+            return dict(self.stats, host=self.host, rate=round(self.rate, 2),
+                        average_latency=round(self.average_latency, 2) if self.average_latency else None)
+
+
+pacers = {}
+pacers_lock = threading.Lock()
+
+
+def get_pacer(url_or_host=DEFAULT_HOST, **settings):
+    """The shared pacer of a host. settings only apply when the pacer is created (first caller wins)."""
+    host = urlparse(url_or_host).netloc if '://' in url_or_host else url_or_host
+    with pacers_lock:
+        if host not in pacers:
+            pacers[host] = HostPacer(host, **settings)
+        return pacers[host]
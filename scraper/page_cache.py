@@ -0,0 +1,232 @@
+"""
+Record and replay cache of fetched pages.
+
+Every search and homedetails page the browser loads can be kept here (PAGE_CACHE=<dir>): the HTML is gzipped
+into blobs/<sha256>.html.gz, content addressed so the same page fetched twice is stored once, and a SQLite
+index maps (url, fetched_at) to its blob. Entries older than the TTL are dropped and the least recently used
+ones go first when the cache outgrows its size limit.
+
+Replay feeds the cached homedetails pages to the lxml engine (html_extractor.py) instead of a browser, so
+an extractor change can be checked on a whole county in seconds, and compared to an earlier run:
+
+    python page_cache.py replay data/page_cache --output replayed.jsonl [--match boston] [--workers 8]
+    python page_cache.py replay data/page_cache --expected replayed.jsonl    # which fields changed
+    python page_cache.py stats data/page_cache
+"""
+import os
+import gzip
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from html_extractor import ZillowHtmlExtractor
+
+
+def page_kind(url):
+    return 'property' if '/homedetails/' in url else 'search'
+
+
+def blob_path(root, sha256):
+    return os.path.join(root, 'blobs', sha256[:2], f"{sha256}.html.gz")
+
+
+def read_blob(root, sha256):
+    """Plain function so replay worker processes can read blobs without opening the index"""
+    try:
+        with gzip.open(blob_path(root, sha256), 'rb') as f:
+            return f.read().decode('utf-8')
+    except OSError:
+        return None
+
+
+class PageCache:
+    def __init__(self, root, max_bytes=2 * 1024 ** 3, ttl_seconds=30 * 24 * 3600, evict_every=500):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = evict_every  # puts between two eviction passes
+        self.puts = 0
+        self.local = threading.local()
+        os.makedirs(os.path.join(root, 'blobs'), exist_ok=True)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                kind TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (url, fetched_at)
+            );
+            CREATE INDEX IF NOT EXISTS pages_access ON pages (last_access);
+            CREATE INDEX IF NOT EXISTS pages_sha ON pages (sha256);
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+        """)
+
+    @property
+    def db(self):
+        # one connection per thread, same as the task store (pool workers share one cache)
+        if not hasattr(self.local, 'db'):
+            self.local.db = sqlite3.connect(os.path.join(self.root, 'index.db'), timeout=60, isolation_level=None)
+            self.local.db.execute("PRAGMA journal_mode=WAL")
+        return self.local.db
+
+    def blob_path(self, sha256):
+        return blob_path(self.root, sha256)
+
+    def put(self, url, page_html, fetched_at=None):
+        """Store one fetched page, returns its content hash"""
+        data = page_html.encode('utf-8')
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = gzip.compress(data, compresslevel=6)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(compressed)
+            os.replace(path + '.tmp', path)
+            self.db.execute("INSERT OR IGNORE INTO blobs (sha256, size) VALUES (?, ?)", (sha256, len(compressed)))
+        now = time.time()
+        self.db.execute("INSERT OR REPLACE INTO pages (url, fetched_at, kind, sha256, last_access) VALUES (?, ?, ?, ?, ?)",
+                        (url, fetched_at or now, page_kind(url), sha256, now))
+        self.puts += 1
+        if self.puts % self.evict_every == 0:
+            self.evict()
+        return sha256
+
+    def read_blob(self, sha256):
+        return read_blob(self.root, sha256)
+
+    def get(self, url, max_age=None):
+        """Newest cached HTML of a URL, None if there is none (or it is older than max_age/the TTL)"""
+        entry = self.get_entry(url, max_age)
+        return entry[1] if entry else None
+
+    def get_entry(self, url, max_age=None):
+        """(fetched_at, html) of the newest cached version of a URL, same rules as get"""
+        max_age = self.ttl_seconds if max_age is None else max_age
+        row = self.db.execute("SELECT fetched_at, sha256 FROM pages WHERE url = ? AND fetched_at >= ? ORDER BY fetched_at DESC LIMIT 1",
+                              (url, time.time() - max_age)).fetchone()
+        if row is None:
+            return None
+        self.db.execute("UPDATE pages SET last_access = ? WHERE url = ? AND fetched_at = ?", (time.time(), url, row[0]))
+        page_html = self.read_blob(row[1])
+        return (row[0], page_html) if page_html is not None else None
+
+    def entries(self, kind='property', match=None):
+        """[(url, fetched_at, sha256)] of the newest version of every cached page of a kind"""
+        query = "SELECT url, MAX(fetched_at), sha256 FROM pages WHERE kind = ?"
+        params = [kind]
+        if match:
+            query += " AND url LIKE ?"
+            params.append(f"%{match}%")
+        return self.db.execute(query + " GROUP BY url ORDER BY url", params).fetchall()
+
+    def drop_orphan_blobs(self):
+        orphans = [row[0] for row in self.db.execute(
+            "SELECT sha256 FROM blobs WHERE sha256 NOT IN (SELECT sha256 FROM pages)")]
+        for sha256 in orphans:
+            try:
+                os.remove(self.blob_path(sha256))
+            except OSError:
+                pass
+            self.db.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+        return len(orphans)
+
+    def total_bytes(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones until the blobs fit in max_bytes"""
+        self.db.execute("DELETE FROM pages WHERE fetched_at < ?", (time.time() - self.ttl_seconds,))
+        removed = self.drop_orphan_blobs()
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return removed
+        # a blob is only freed with the last page that points to it (same HTML under two URLs or fetch times)
+        references = dict(self.db.execute("SELECT sha256, COUNT(*) FROM pages GROUP BY sha256"))
+        oldest, freed = [], 0
+        for url, fetched_at, sha256, size in self.db.execute(
+                "SELECT p.url, p.fetched_at, p.sha256, b.size FROM pages p JOIN blobs b ON b.sha256 = p.sha256"
+                " ORDER BY p.last_access"):
+            oldest.append((url, fetched_at))
+            references[sha256] -= 1
+            if references[sha256] == 0:
+                freed += size
+                if freed >= excess:
+                    break
+        self.db.executemany("DELETE FROM pages WHERE url = ? AND fetched_at = ?", oldest)
+        return removed + self.drop_orphan_blobs()
+
+    def stats(self):
+        counts = dict(self.db.execute("SELECT kind, COUNT(DISTINCT url) FROM pages GROUP BY kind"))
+        return {'property_pages': counts.get('property', 0), 'search_pages': counts.get('search', 0),
+                'blobs': self.db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0],
+                'megabytes': round(self.total_bytes() / 1024 ** 2, 1)}
+
+
+def replay_entry(entry, root):
+    """Worker process: re-extract one cached homedetails page, scraped_at is the original fetch time"""
+    url, fetched_at, sha256 = entry
+    page_html = read_blob(root, sha256)
+    if page_html is None:
+        return None
+    return ZillowHtmlExtractor().extract(page_html, url=url, scraped_at=datetime.fromtimestamp(fetched_at).isoformat())
+
+
+def replay(cache, match=None, workers=None):
+    """Generator over the property_data of every cached homedetails page, extracted in parallel without a browser"""
+    entries = cache.entries('property', match)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for property_data in executor.map(replay_entry, entries, [cache.root] * len(entries), chunksize=16):
+            if property_data:
+                yield property_data
+
+
+def changed_fields(old, new):
+    return [field for field in set(old) | set(new) if field != 'scraped_at' and old.get(field) != new.get(field)]
+
+
+if __name__ == "__main__":
+    from jsonl_sink import JsonlSink, iter_records
+
+    parser = argparse.ArgumentParser(description="Inspect or replay the page cache")
+    parser.add_argument('command', choices=['replay', 'stats', 'evict'])
+    parser.add_argument('cache_dir')
+    parser.add_argument('--output', help="JSON Lines file for the replayed records")
+    parser.add_argument('--expected', help="JSON Lines of an earlier replay, report which fields changed")
+    parser.add_argument('--match', help="only URLs containing this text (e.g. a city name)")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    cache = PageCache(args.cache_dir)
+    if args.command == 'stats':
+        print(cache.stats())
+    elif args.command == 'evict':
+        print(f"Removed {cache.evict()} blobs, {cache.stats()}")
+    else:
+        expected = {record['url']: record for record in iter_records(args.expected)} if args.expected else {}
+        sink = JsonlSink(args.output) if args.output else None
+        started = time.monotonic()
+        count, changed = 0, {}
+        for property_data in replay(cache, args.match, args.workers):
+            count += 1
+            if sink:
+                sink.append(property_data)
+            if property_data['url'] in expected:
+                for field in changed_fields(expected[property_data['url']], property_data):
+                    changed[field] = changed.get(field, 0) + 1
+        if sink:
+            sink.close()
+        print(f"Replayed {count} pages in {time.monotonic() - started:.1f}s" + (f" -> {args.output}" if sink else ""))
+        if expected:
+            if changed:
+                for field, n in sorted(changed.items(), key=lambda item: -item[1]):
+                    print(f"  ⚠️ {field}: changed on {n} pages")
+            else:
+                print("  ✅ No field changed against the expected records")
@@ -0,0 +1,732 @@
+import re
+import threading
+from embedded_data import format_home_type
+
+# Regex based parsing that only needs text, no browser.
+# Both the live selenium scraper (zillow.py) and the offline engine (html_extractor.py) use these,
+# so a fix to a pattern here fixes both paths.
+#
+# Every pattern is compiled once, here. The ones that scan the whole (multi-MB) page are written in
+# lowercase and run case sensitively on a lowercased copy of the page (PagePattern/fold_case): re only
+# uses its fast literal prefix search without re.I, so each scan is several times cheaper, and the copy is
+# made once per page instead of once per pattern (per thread, pool workers each parse their own page, and
+# dropped with release_fold when the page is done). Captured text is still cut from the original page.
+# The school patterns start with a free text span (a name) or run a lazy .*? to the end of the line from
+# every school type on the page; on a page that is mostly one long line that was the catastrophic case.
+# NamePattern and SpanPattern find exactly the same matches with str.find, linear in the page.
+
+
+class PageMatch:
+    """Match on the lowercased copy, groups read from the original text (same offsets)"""
+    def __init__(self, text, match):
+        self.text = text
+        self.match = match
+
+    def group(self, index=0):
+        start, end = self.match.span(index)
+        return self.text[start:end] if start != -1 else None
+
+    def groups(self):
+        return tuple(self.group(index) for index in range(1, self.match.re.groups + 1))
+
+    def start(self, index=0):
+        return self.match.start(index)
+
+    def end(self, index=0):
+        return self.match.end(index)
+
+
+def fold_text(text):
+    """Lowercase, plus the two letters re.I also matches to ascii 's' and 'i' but that lower() keeps"""
+    lowered = text.lower()
+    if '\u017f' in lowered or '\u0131' in lowered:
+        lowered = lowered.replace('\u017f', 's').replace('\u0131', 'i')
+    return lowered
+
+
+class FoldedPage:
+    def __init__(self, text):
+        self.text = text
+        lowered = fold_text(text)
+        # a few characters lowercase to two, then the offsets would not line up: fall back to re.I
+        self.lowered = lowered if len(lowered) == len(text) else None
+
+
+_folds = threading.local()
+
+
+def fold_case(text):
+    """FoldedPage of a page, each thread keeps its last one so every parser called on the same snapshot shares it"""
+    page = getattr(_folds, 'page', None)
+    if page is None or page.text is not text:
+        page = FoldedPage(text)
+        _folds.page = page
+    return page
+
+
+def release_fold():
+    """Forget this thread's folded page, so a multi-MB page does not outlive its extraction"""
+    _folds.page = None
+
+
+class PagePattern:
+    """A lowercase pattern for page wide scans, run on fold_case(page)"""
+    def __init__(self, pattern, flags=0):
+        self.pattern = re.compile(pattern, flags)
+        self.ignorecase = re.compile(pattern, flags | re.I)
+
+    def search(self, page_text):
+        page = fold_case(page_text)
+        if page.lowered is None:
+            return self.ignorecase.search(page.text)
+        match = self.pattern.search(page.lowered)
+        return PageMatch(page.text, match) if match else None
+
+    def finditer(self, page_text):
+        page = fold_case(page_text)
+        if page.lowered is None:
+            yield from self.ignorecase.finditer(page.text)
+            return
+        for match in self.pattern.finditer(page.lowered):
+            yield PageMatch(page.text, match)
+
+    def findall(self, page_text):
+        """Like re.findall for patterns with one group, values from the original text"""
+        return [match.group(1) for match in self.finditer(page_text)]
+
+
+NAME_LETTERS = frozenset('abcdefghijklmnopqrstuvwxyz')  # what [A-Z] matches under re.I, on a folded page
+NOT_NAME_CHAR = re.compile(r'[^a-z\s]')
+
+
+def name_run_start(text, end):
+    """First letter of the run of letters and whitespace that ends at end, None if the run has no letter"""
+    start = None
+    position = end - 1
+    while position >= 0:
+        char = text[position]
+        if char in NAME_LETTERS:
+            start = position
+        elif not char.isspace():
+            break
+        position -= 1
+    return start
+
+
+class NameMatch:
+    """The name a NamePattern found, cut from the original page"""
+    def __init__(self, text, start, end):
+        self.text = text
+        self.start = start
+        self.end = end
+
+    def group(self, index=1):
+        return self.text[self.start:self.end]
+
+
+class NamePattern:
+    """
+    ([A-Z][a-zA-Z\s]+?)\s*<anchor>.*?<then> with re.I (then is optional), the school name patterns. As a regex
+    the name span is tried from every letter of the page. Here the anchor is found with str.find: the name is
+    the whole run of letters and whitespace in front of the first anchor that has at least two characters
+    of it, and then has to follow later on the anchor's line. Each run is walked once, so this is linear in
+    the page and finds exactly what the regex (kept as reference) finds.
+    """
+    def __init__(self, anchor, then=None):
+        self.anchor = anchor
+        self.then = then
+        self.reference = re.compile(rf'([A-Z][a-zA-Z\s]+?)\s*{anchor}' + (rf'.*?{then}' if then else ''), re.I)
+
+    def search(self, page_text):
+        page = fold_case(page_text)
+        if page.lowered is None:
+            return self.reference.search(page.text)
+        text = page.lowered
+        run_end = name_start = -1
+        line_end = then_at = -1
+        position = text.find(self.anchor)
+        while position != -1:
+            if position >= run_end:
+                name_start = name_run_start(text, position)
+                if name_start is None:
+                    name_start = position
+                end_match = NOT_NAME_CHAR.search(text, position)
+                run_end = end_match.start() if end_match else len(text)
+            if position >= name_start + 2:
+                if not self.then:
+                    return NameMatch(page.text, name_start, position)
+                after = position + len(self.anchor)
+                if line_end < after:
+                    line_end = text.find('\n', after)
+                    line_end = len(text) if line_end == -1 else line_end
+                if then_at < after:
+                    then_at = text.find(self.then, after)
+                    then_at = len(text) + 1 if then_at == -1 else then_at
+                if then_at + len(self.then) <= line_end:
+                    return NameMatch(page.text, name_start, position)
+            position = text.find(self.anchor, position + 1)
+        return None
+
+
+class SpanPattern:
+    """
+    findall of (?:<starts>).*?<end> with re.I, starts being literals. As a regex every start runs its .*? to
+    the end of its line, on a page that is mostly one long line that is quadratic. Here each start looks up
+    the first end match after it (kept until it is passed), and a start with none on its line skips the rest
+    of that line. Same matches as the regex (kept as reference).
+    """
+    def __init__(self, starts, end):
+        self.starts = starts
+        self.end = re.compile(end)
+        self.reference = re.compile(f"(?:{'|'.join(re.escape(start) for start in starts)}).*?{end}", re.I)
+
+    def findall(self, page_text):
+        page = fold_case(page_text)
+        if page.lowered is None:
+            return self.reference.findall(page.text)
+        text = page.lowered
+        found = []
+        next_end = None
+        position = 0
+        while True:
+            hits = [(hit, len(start)) for start in self.starts for hit in [text.find(start, position)] if hit != -1]
+            if not hits:
+                break
+            hit, length = min(hits)
+            after = hit + length
+            if next_end is None or next_end.start() < after:
+                next_end = self.end.search(text, after)
+                if next_end is None:
+                    break
+            line_end = text.find('\n', after)
+            line_end = len(text) if line_end == -1 else line_end
+            if next_end.start() < line_end:
+                found.append(page.text[next_end.start(1):next_end.end(1)])
+                position = next_end.end()
+            else:
+                position = line_end + 1
+        return found
+
+
+def first_match(patterns, text):
+    """Patterns in priority order: the first one that matches anywhere wins (not the leftmost match)"""
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return match
+    return None
+
+
+PRICE_TEXT_PATTERN = re.compile(r'^\$[\d,]+(?:\.\d{2})?$')
+
+IMAGE_PATTERNS = [PagePattern(pattern) for pattern in [
+    r'https://photos\.zillowstatic\.com/[^"\'>\s]+',
+    r'https://[^"\'>\s]*zillow[^"\'>\s]*\.jpg',
+    r'https://[^"\'>\s]*zillow[^"\'>\s]*\.webp'
+]]
+
+RISK_TYPES = {
+    'flood': 'flood_risk',
+    'fire': 'fire_risk',
+    'wind': 'wind_risk',
+    'air': 'air_risk',
+    'heat': 'heat_risk'
+}
+
+SCORE_KEYS = ['walk_score', 'bike_score', 'transit_score']
+
+
+def is_valid_zillow_image_url(url):
+    """Validate if URL is a proper Zillow image URL"""
+    if not url or len(url) < 10:
+        return False
+
+    # Must contain Zillow domain and image extension
+    has_zillow = any(pattern in url.lower() for pattern in ['zillow', 'zillowstatic'])
+    has_image_ext = any(url.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.webp', '.png'])
+
+    # Exclude obviously bad URLs
+    bad_patterns = ['icon', 'logo', 'avatar', 'blank', 'placeholder']
+    has_bad_pattern = any(bad in url.lower() for bad in bad_patterns)
+
+    return has_zillow and has_image_ext and not has_bad_pattern and len(url) > 30
+
+
+def find_image_url_in_source(page_source):
+    """Backup image search over the raw page source, returns None if nothing valid"""
+    for pattern in IMAGE_PATTERNS:
+        for match in pattern.finditer(page_source):
+            url = match.group(0)
+            if is_valid_zillow_image_url(url):
+                return url
+    return None
+
+
+def is_price_text(text):
+    return bool(PRICE_TEXT_PATTERN.match(text))
+
+
+BED_PATTERN = re.compile(r'(\d+)\s*beds?', re.I)
+BATH_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*baths?', re.I)
+SQFT_PATTERN = re.compile(r'([\d,]+)\s*sqft', re.I)
+FALLBACK_BED_PATTERN = re.compile(r'(\d+)\s*bed', re.I)
+FALLBACK_BATH_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*bath', re.I)
+
+
+def parse_bed_bath_sqft_facts(text, property_data):
+    """Beds, baths and sqft from the bed-bath-sqft-facts block"""
+    bed_match = BED_PATTERN.search(text)
+    bath_match = BATH_PATTERN.search(text)
+    sqft_match = SQFT_PATTERN.search(text)
+
+    if bed_match:
+        property_data['beds'] = bed_match.group(1)
+    if bath_match:
+        property_data['baths'] = bath_match.group(1)
+    if sqft_match:
+        property_data['sqft'] = sqft_match.group(1)
+
+
+def basic_facts_complete(property_data):
+    return (property_data['beds'] != 'N/A' and
+            property_data['baths'] != 'N/A' and
+            property_data['sqft'] != 'N/A')
+
+
+def parse_fallback_facts(text, property_data):
+    """Fill in whatever beds/baths/sqft are still missing from a generic facts container"""
+    if property_data['beds'] == 'N/A':
+        bed_match = FALLBACK_BED_PATTERN.search(text)
+        if bed_match and 1 <= int(bed_match.group(1)) <= 10:
+            property_data['beds'] = bed_match.group(1)
+
+    if property_data['baths'] == 'N/A':
+        bath_match = FALLBACK_BATH_PATTERN.search(text)
+        if bath_match and 0.5 <= float(bath_match.group(1)) <= 10:
+            property_data['baths'] = bath_match.group(1)
+
+    if property_data['sqft'] == 'N/A':
+        sqft_match = SQFT_PATTERN.search(text)
+        if sqft_match:
+            sqft_value = int(sqft_match.group(1).replace(',', ''))
+            if 300 <= sqft_value <= 20000:
+                property_data['sqft'] = sqft_match.group(1)
+
+
+SOURCE_BED_PATTERNS = [PagePattern(r'"bedrooms"[:\s]*(\d+)'), PagePattern(r'"beds"[:\s]*(\d+)')]
+SOURCE_BATH_PATTERNS = [PagePattern(r'"bathrooms"[:\s]*(\d+(?:\.\d+)?)'), PagePattern(r'"baths"[:\s]*(\d+(?:\.\d+)?)')]
+SOURCE_SQFT_PATTERNS = [PagePattern(r'"livingarea"[:\s]*(\d+)'), PagePattern(r'"floorsize"[:\s]*(\d+)')]
+
+
+def parse_facts_from_source_json(page_source, property_data):
+    """Last resort: the property JSON embedded in the page source"""
+    if property_data['beds'] == 'N/A':
+        for pattern in SOURCE_BED_PATTERNS:
+            match = pattern.search(page_source)
+            if match:
+                bed_value = int(match.group(1))
+                if 1 <= bed_value <= 10:
+                    property_data['beds'] = str(bed_value)
+                    break
+
+    if property_data['baths'] == 'N/A':
+        for pattern in SOURCE_BATH_PATTERNS:
+            match = pattern.search(page_source)
+            if match:
+                bath_value = float(match.group(1))
+                if 0.5 <= bath_value <= 10:
+                    property_data['baths'] = str(bath_value)
+                    break
+
+    if property_data['sqft'] == 'N/A':
+        for pattern in SOURCE_SQFT_PATTERNS:
+            match = pattern.search(page_source)
+            if match:
+                sqft_value = int(match.group(1))
+                if 300 <= sqft_value <= 20000:
+                    property_data['sqft'] = f"{sqft_value:,}"
+                    break
+
+
+def is_address_text(text):
+    return any(indicator in text.lower() for indicator in ['st', 'ave', 'rd', 'dr', 'ma'])
+
+
+PROPERTY_TYPE_PATTERN = PagePattern(r'(single.family|condo|townhouse|multi.family)')
+
+YEAR_PATTERNS = [PagePattern(pattern) for pattern in [
+    r'built in (\d{4})',
+    r'built[:\s]+(\d{4})',
+    r'year[:\s]+(\d{4})'
+]]
+
+PRICE_SQFT_PATTERNS = [PagePattern(pattern) for pattern in [
+    r'\$([\d,]+)/sqft',
+    r'\$([\d,]+)\s*price/sqft',
+    r'price/sqft[:\s]+\$([\d,]+)',
+    r'\$([\d,]+)\s*/\s*sqft'
+]]
+
+# The number-first patterns only start at the beginning of a number ((?<!...) lookbehind): a match that
+# starts inside a number always has one starting at its first digit too, so the leftmost match is the same,
+# but re no longer retries (and backtracks) from every digit of every number on the page.
+# (the old duplicate 'acres' and 'Lot\s*:' entries are gone, with the page lowercased they could never win)
+LOT_PATTERNS = [PagePattern(pattern) for pattern in [
+    r'(?<![\d,])([\d,]+)\s*square\s*feet\s*lot',  # "4,373 Square Feet Lot"
+    r'(?<!\d)(\d+\.?\d*)\s*acres\s*lot',          # "0.31 Acres Lot"
+    r'(?<!\d)(\d+\.?\d*)\s*acres',
+    r'lot[:\s]*([\d,.]+)\s*(sq\s*ft|sqft|square\s*feet|acres)',
+    r'(?<![\d,.])([\d,.]+)\s*(acres|sq\s*ft|sqft|square\s*feet)\s*lot',
+    r'lot\s*size[:\s]*([\d,.]+)\s*(sq\s*ft|sqft|square\s*feet|acres)',
+    r'(?<![\d,.])([\d,.]+)\s*square\s*feet\s*lot',
+    r'(?<![\d,.])([\d,.]+)\s*sq\s*ft\s*lot',
+    r'(?<![\d,.])([\d,.]+)\s*sqft\s*lot',
+    r'lot[:\s]*([\d,.]+)',
+    r'property\s*size[:\s]*([\d,.]+)\s*(sq\s*ft|sqft|square\s*feet|acres)'
+]]
+
+
+def parse_page_facts(page_text, property_data):
+    """Property type, year built, price/sqft and lot size from the whole page"""
+    type_match = PROPERTY_TYPE_PATTERN.search(page_text)
+    if type_match:
+        property_data['property_type'] = format_home_type(type_match.group(1))  # as written on the page: 'single-family', 'Single Family'
+
+    year_match = first_match(YEAR_PATTERNS, page_text)
+    if year_match:
+        property_data['year_built'] = year_match.group(1)
+
+    price_sqft_match = first_match(PRICE_SQFT_PATTERNS, page_text)
+    if price_sqft_match:
+        price_value = price_sqft_match.group(1).replace(',', '')
+        property_data['price_per_sqft'] = f"${price_value}/sqft"
+
+    lot_match = first_match(LOT_PATTERNS, page_text)
+    if lot_match:
+        if len(lot_match.groups()) == 2:
+            size = lot_match.group(1)
+            unit = lot_match.group(2)
+            if 'acres' in unit.lower():
+                property_data['sqft_lot'] = f"{size} Acres"
+            else:
+                property_data['sqft_lot'] = f"{size} sqft"
+        else:
+            size = lot_match.group(1)
+            # Check if it's "Square Feet Lot" or "Acres Lot" pattern
+            if 'square feet lot' in lot_match.group(0).lower():
+                property_data['sqft_lot'] = f"{size} sqft"
+            elif 'acres lot' in lot_match.group(0).lower():
+                property_data['sqft_lot'] = f"{size} Acres"
+            else:
+                # Default to sqft if no unit specified
+                property_data['sqft_lot'] = f"{size} sqft"
+
+
+# parse_features gets the page lowercased already, so no re.I here (it disables re's literal prefix search)
+FEATURE_PATTERNS = {
+    'interior_features': [
+        re.compile(pattern) for pattern in [
+            r'hardwood\s+floors?', r'granite\s+countertops?', r'stainless\s+steel',
+            r'tile\s+floors?', r'carpet', r'laminate', r'marble', r'walk-in\s+closet',
+            r'bay\s+window', r'skylight', r'fireplace', r'built-in\s+shelves?',
+            r'crown\s+molding', r'vaulted\s+ceiling'
+        ]
+    ],
+    'other_rooms': [
+        re.compile(pattern) for pattern in [
+            r'dining\s+room', r'family\s+room', r'living\s+room', r'bonus\s+room',
+            r'office', r'den', r'study', r'library', r'sunroom', r'basement',
+            r'attic', r'laundry\s+room', r'mud\s+room', r'pantry', r'walk-in\s+pantry'
+        ]
+    ],
+    'appliances': [
+        re.compile(pattern) for pattern in [
+            r'dishwasher', r'refrigerator', r'microwave', r'oven', r'range',
+            r'cooktop', r'disposal', r'washer', r'dryer', r'freezer',
+            r'wine\s+cooler', r'ice\s+maker'
+        ]
+    ]
+}
+
+UTILITY_PATTERNS = {
+    'Electric': re.compile(r'electric:\s*([^<\n]+)'),
+    'Sewer': re.compile(r'sewer:\s*([^<\n]+)'),
+    'Water': re.compile(r'water:\s*([^<\n]+)'),
+    'Utilities': re.compile(r'utilities for property:\s*([^<\n]+)')
+}
+
+PARKING_PATTERNS = {
+    'total_spaces': re.compile(r'total spaces:\s*(\d+)'),
+    'garage_spaces': re.compile(r'garage spaces:\s*(\d+)'),
+    'parking_features': re.compile(r'parking features:\s*([^<\n]+)'),
+    'uncovered_spaces': re.compile(r'has uncovered spaces:\s*([^<\n]+)')
+}
+
+
+def parse_features(page_text, property_data):
+    """Interior features, rooms, appliances, utilities and parking from the lowercased page source"""
+    # Single pass extraction using sets for O(1) lookups
+    found = {category: set() for category in FEATURE_PATTERNS}
+
+    for category, patterns in FEATURE_PATTERNS.items():
+        target_set = found[category]
+        max_items = 5 if category == 'interior_features' else 3
+
+        for pattern in patterns:
+            if len(target_set) >= max_items:
+                break
+            for match in pattern.finditer(page_text):
+                if len(target_set) >= max_items:
+                    break
+                target_set.add(match.group(0))
+
+    # Convert sets back to lists
+    for category, target_set in found.items():
+        property_data[category] = list(target_set)
+
+    utilities = {}
+    for utility_type, pattern in UTILITY_PATTERNS.items():
+        match = pattern.search(page_text)
+        if match:
+            utilities[utility_type] = match.group(1).strip()
+
+    property_data['utilities'] = utilities if utilities else 'N/A'
+
+    parking = {}
+    for parking_type, pattern in PARKING_PATTERNS.items():
+        match = pattern.search(page_text)
+        if match:
+            parking[parking_type] = match.group(1).strip()
+
+    property_data['parking'] = parking if parking else 'N/A'
+
+
+MONTHLY_PAYMENT_PATTERN = re.compile(r'\$[\d,]+(?:/mo|/month|\s+monthly)', re.I)
+
+
+def parse_monthly_payment(text):
+    payment_match = MONTHLY_PAYMENT_PATTERN.search(text)
+    return payment_match.group(0) if payment_match else None
+
+
+def scores_complete(property_data):
+    return all(property_data[score] != 'N/A' for score in SCORE_KEYS)
+
+
+SCORE_CONTAINER_PATTERNS = {
+    score_type: [re.compile(pattern.format(name=name), re.I) for pattern in [
+        r'{name} Score[®]?\s*(\d+)',
+        r'(\d+)\s*/?\s*100\s*{name}',
+        r'{name}\s*Score\s*(\d+)',
+        r'(\d+)\s*{name}'
+    ]]
+    for score_type, name in [('walk_score', 'Walk'), ('bike_score', 'Bike'), ('transit_score', 'Transit')]
+}
+
+
+def parse_scores_container(container_text, property_data):
+    """Walk/bike/transit scores from the scores container text"""
+    for score_type, patterns in SCORE_CONTAINER_PATTERNS.items():
+        for pattern in patterns:
+            try:
+                match = pattern.search(container_text)
+                if match:
+                    score = int(match.group(1))
+                    if 0 <= score <= 100:
+                        property_data[score_type] = f"{score}/100"
+                        break
+            except (ValueError, AttributeError):
+                continue
+
+
+SOURCE_SCORE_PATTERNS = {
+    'walk_score': PagePattern(r'(?:walk\s*score|walkability)[:\s]*(\d+)'),
+    'bike_score': PagePattern(r'(?:bike\s*score|bikeability)[:\s]*(\d+)'),
+    'transit_score': PagePattern(r'(?:transit\s*score|transit)[:\s]*(\d+)')
+}
+
+
+def parse_scores_from_source(page_source, property_data):
+    """Quick regex pass over the page source for any scores still missing"""
+    for score_type, pattern in SOURCE_SCORE_PATTERNS.items():
+        if property_data[score_type] == 'N/A':
+            try:
+                match = pattern.search(page_source)
+                if match:
+                    score = int(match.group(1))
+                    if 0 <= score <= 100:
+                        property_data[score_type] = f"{score}/100"
+            except (ValueError, AttributeError):
+                continue
+
+
+SCORE_NUMBER_PATTERN = re.compile(r'(\d+)(?:/100)?')
+
+
+def parse_score_element_text(element_text, property_data):
+    """Single element that mentions a score keyword, decide which score it is from the context"""
+    score_match = SCORE_NUMBER_PATTERN.search(element_text)
+    if score_match:
+        score = int(score_match.group(1))
+        if 0 <= score <= 100:
+            if 'walk' in element_text.lower() and property_data['walk_score'] == 'N/A':
+                property_data['walk_score'] = f"{score}/100"
+            elif 'bike' in element_text.lower() and property_data['bike_score'] == 'N/A':
+                property_data['bike_score'] = f"{score}/100"
+            elif 'transit' in element_text.lower() and property_data['transit_score'] == 'N/A':
+                property_data['transit_score'] = f"{score}/100"
+
+
+SCHOOL_TYPES = ['elementary', 'middle', 'high']
+
+# Filter out common non-school text
+SCHOOL_NAME_STOPWORDS = ['check with', 'contact', 'verify', 'call', 'please', 'applicable', 'district', 'information', 'the applicable']
+
+SCHOOL_NAME_PATTERNS = {
+    school_type: [
+        NamePattern(school_type),
+        NamePattern('school', then=school_type),
+        PagePattern(rf'{school_type}[:\s]*([a-z][a-z\s]+)'),
+    ]
+    for school_type in SCHOOL_TYPES
+}
+
+DISTANCE = r'distance:\s*(\d+\.?\d*)\s*mi'
+
+SCHOOL_DISTANCE_PATTERNS = {
+    school_type: [
+        # "Distance: X.X mi" format
+        SpanPattern([school_type], DISTANCE),
+        # Alternative formats
+        SpanPattern([school_type], r'(\d+\.?\d*)\s*mi'),
+    ]
+    for school_type in SCHOOL_TYPES
+}
+# For middle school, also try "junior" or "k-8"
+MIDDLE_SCHOOL_ALIAS_PATTERN = SpanPattern(['junior', 'k-8'], DISTANCE)
+
+
+def school_distance_patterns(school_type, school_name):
+    """Same order as always: type + 'Distance:', the found name + 'Distance:', type + any 'mi', the middle school aliases"""
+    by_type, any_mi = SCHOOL_DISTANCE_PATTERNS[school_type]
+    patterns = [by_type]
+    if school_name != 'N/A':
+        patterns.append(SpanPattern([fold_text(school_name)], DISTANCE))
+    patterns.append(any_mi)
+    if school_type == 'middle':
+        patterns.append(MIDDLE_SCHOOL_ALIAS_PATTERN)
+    return patterns
+
+
+def parse_schools(page_source, property_data):
+    """Simple text-based school name and distance extraction for each school type"""
+    for school_type in SCHOOL_TYPES:
+        school_name = 'N/A'
+        for pattern in SCHOOL_NAME_PATTERNS[school_type]:
+            name_match = pattern.search(page_source)
+            if name_match:
+                potential_name = name_match.group(1).strip()
+                if (len(potential_name) > 3 and len(potential_name) < 30 and
+                    not any(bad in potential_name.lower() for bad in SCHOOL_NAME_STOPWORDS)):
+                    school_name = potential_name
+                    break
+
+        school_distance = 'N/A'
+        for pattern in school_distance_patterns(school_type, school_name):
+            # Take the first reasonable distance
+            for distance in pattern.findall(page_source):
+                try:
+                    distance_float = float(distance)
+                    if 0.1 <= distance_float <= 50:
+                        school_distance = f"{distance} mi"
+                        break
+                except ValueError:
+                    continue
+
+            if school_distance != 'N/A':
+                break
+
+        property_data[f'{school_type}_school'] = {
+            'name': school_name,
+            'distance': school_distance
+        }
+
+
+RISK_LEVEL_PATTERN = re.compile(r'(Minimal|Minor|Moderate|Major|Severe)', re.I)
+RISK_SCORE_PATTERN = re.compile(r'(\d+)/10')
+
+
+def parse_risk_container(container_text):
+    """'Minor (3/10)' style value out of a climate risk card, None if the card is incomplete"""
+    level_match = RISK_LEVEL_PATTERN.search(container_text)
+    score_match = RISK_SCORE_PATTERN.search(container_text)
+
+    if level_match and score_match:
+        return f"{level_match.group(1).title()} ({score_match.group(1)}/10)"
+    return None
+
+
+PRICE_HISTORY_PATTERN = re.compile(r'(\d{1,2}/\d{1,2}/\d{4})\s+([A-Za-z\s]+)\s+(\$[\d,]+)')
+
+
+def parse_price_history(container_text):
+    history = []
+    history_matches = PRICE_HISTORY_PATTERN.findall(container_text)
+    for match in history_matches:
+        history.append({
+            'date': match[0],
+            'event': match[1].strip(),
+            'price': match[2]
+        })
+    return history
+
+
+REGION_PATTERNS = [PagePattern(pattern) for pattern in [
+    r'region:\s*([^<\n•]+)',
+    r'region[:\s]+([^<\n•]+)',
+    r'location[^<]*region[:\s]*([^<\n•]+)'
+]]
+REGION_CONTAINER_PATTERN = re.compile(r'Region:\s*([^•\n]+)', re.I)
+
+
+def parse_region(page_source):
+    for pattern in REGION_PATTERNS:
+        region_match = pattern.search(page_source)
+        if region_match:
+            region_text = region_match.group(1).strip()
+            if region_text and len(region_text) > 2:
+                return region_text
+    return None
+
+
+def parse_region_container(container_text):
+    region_match = REGION_CONTAINER_PATTERN.search(container_text)
+    return region_match.group(1).strip() if region_match else None
+
+
+def clean_nearby_city_links(link_texts):
+    cities = []
+    for city_text in link_texts[:5]:
+        city_name = city_text.strip().replace(' Real estate', '').strip()
+        if city_name and city_name not in cities:
+            cities.append(city_name)
+    return cities
+
+
+NEARBY_SECTION_PATTERN = PagePattern(r'nearby cities(.*?)(?=<div|</section|</footer)', re.DOTALL)
+NEARBY_CITY_PATTERN = re.compile(r'([A-Za-z\s]+?)\s+Real estate')
+
+
+def parse_nearby_cities_from_source(page_source):
+    nearby_section = NEARBY_SECTION_PATTERN.search(page_source)
+
+    cities = []
+    if nearby_section:
+        section_text = nearby_section.group(1)
+        city_matches = NEARBY_CITY_PATTERN.findall(section_text)
+
+        for city in city_matches[:5]:
+            clean_city = city.strip()
+            if clean_city and len(clean_city) > 2:
+                cities.append(clean_city)
+    return cities
@@ -0,0 +1,296 @@
+"""
+Whole page extraction in one JavaScript call.
+
+The live extract_* methods cost one WebDriver round trip per lookup: a full document translate() XPath per
+risk type, then find_element("./../../..") and .text on every match, and the same again for the scores,
+price history and nearby cities. Here one execute_async_script does it all inside the page: it scrolls the
+lazy sections in (waiting for the DOM to go quiet instead of sleeping), expands the "Show more" sections,
+pulls the embedded property JSON, runs every XPath of the lxml engine (html_extractor.py, same selectors)
+and returns the texts in one JSON payload. Python then maps that payload with the same page_patterns
+parsers, so the two engines can not drift apart; whatever is still missing is left for the live extractors.
+
+    payload = run_page_script(driver)            # None if the script failed
+    apply_page_payload(payload, property_data)
+"""
+from embedded_data import apply_property_json
+from property_record import FIELD_GROUPS, new_property_record, missing_fields, fill_missing
+from html_extractor import (
+    IMAGE_XPATHS, PRICE_XPATHS, BED_BATH_SQFT_XPATH, FACTS_FALLBACK_XPATHS, ADDRESS_XPATHS, PAYMENT_XPATH,
+    SCORES_CONTAINER_XPATHS, SCORE_KEYWORD_XPATHS, RISK_XPATHS, HISTORY_XPATH, LOCATION_XPATH,
+    NEARBY_CITIES_XPATH, NEARBY_CITY_LINKS_XPATH
+)
+from page_patterns import (
+    RISK_TYPES, is_valid_zillow_image_url, is_price_text, parse_bed_bath_sqft_facts, basic_facts_complete,
+    parse_fallback_facts, is_address_text, parse_page_facts, parse_features, parse_monthly_payment,
+    scores_complete, parse_scores_container, parse_score_element_text, parse_risk_container,
+    parse_price_history, parse_region, parse_region_container, clean_nearby_city_links
+)
+
+# name -> xpaths run in the page. limit = matches kept per xpath, up = ancestor levels whose text is returned
+# (0 = the element itself), attr = return that attribute instead, within = only search under the first
+# match of another xpath (that many levels up)
+PAGE_QUERIES = {
+    'image': {'xpaths': IMAGE_XPATHS, 'limit': 1, 'attr': 'src'},
+    'price': {'xpaths': PRICE_XPATHS, 'limit': 30},
+    'facts': {'xpaths': [BED_BATH_SQFT_XPATH], 'limit': 1},
+    'fallback_facts': {'xpaths': FACTS_FALLBACK_XPATHS, 'limit': 10},
+    'address': {'xpaths': ADDRESS_XPATHS, 'limit': 1},
+    'payment': {'xpaths': [PAYMENT_XPATH], 'limit': 30, 'up': [1]},
+    'scores': {'xpaths': SCORES_CONTAINER_XPATHS, 'limit': 1},
+    'score_keywords': {'xpaths': SCORE_KEYWORD_XPATHS, 'limit': 3},
+    'risks': {'xpaths': [RISK_XPATHS[risk_type] for risk_type in RISK_TYPES], 'limit': 10, 'up': [3]},
+    'history': {'xpaths': [HISTORY_XPATH], 'limit': 20, 'up': [1]},
+    'location': {'xpaths': [LOCATION_XPATH], 'limit': 10, 'up': [1, 2, 4]},
+    'nearby': {'xpaths': [NEARBY_CITY_LINKS_XPATH], 'limit': 5, 'within': {'xpath': NEARBY_CITIES_XPATH, 'up': 2}},
+}
+
+# the parts of the embedded property JSON that apply_property_json reads, the rest stays in the browser
+PROPERTY_KEYS = ['price', 'bedrooms', 'bathrooms', 'livingArea', 'lotAreaValue', 'lotAreaUnits', 'lotSize', 'yearBuilt',
+                 'homeType', 'address', 'hiResImageLink', 'desktopWebHdpImageLink', 'mediumImageLink', 'responsivePhotos',
+                 'originalPhotos', 'resoFacts', 'priceHistory', 'schools', 'climate', 'walkScore',
+                 'transitScore', 'bikeScore', 'parentRegion']
+
+PAGE_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const queries = arguments[0];
+const propertyKeys = arguments[1];
+const settings = arguments[2];
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+const textOf = node => node ? (node.innerText || node.textContent || '').trim() : '';
+const up = (node, levels) => {
+    for (let i = 0; i < levels && node; i++) node = node.parentElement;
+    return node;
+};
+// a <script> whose JSON happens to contain the text would drag the whole body along, those are skipped
+const HIDDEN = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT']);
+const select = (xpath, context) => {
+    const found = document.evaluate(xpath, context || document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const nodes = [];
+    for (let i = 0; i < found.snapshotLength; i++) {
+        const node = found.snapshotItem(i);
+        if (node.nodeType === Node.ELEMENT_NODE && !HIDDEN.has(node.tagName)) nodes.push(node);
+    }
+    return nodes;
+};
+
+// same signal as readiness.wait_for_quiet: document complete, no new requests or DOM nodes for quietMs
+const settle = async timeout => {
+    const deadline = Date.now() + timeout;
+    let last = null;
+    let lastChange = Date.now();
+    while (Date.now() < deadline) {
+        const activity = performance.getEntriesByType('resource').length + ':' + document.getElementsByTagName('*').length;
+        if (activity !== last) {
+            last = activity;
+            lastChange = Date.now();
+        } else if (document.readyState === 'complete' && Date.now() - lastChange >= settings.quietMs) {
+            return true;
+        }
+        await sleep(50);
+    }
+    return false;
+};
+
+// embedded_data.find_property_json, but only the keys we map travel back over the wire
+const embeddedProperty = () => {
+    const parse = value => {
+        if (typeof value !== 'string') return value;
+        try { return JSON.parse(value); } catch (error) { return null; }
+    };
+    const fromCache = cache => {
+        cache = parse(cache);
+        if (!cache || typeof cache !== 'object') return null;
+        for (const entry of Object.values(cache)) {
+            if (entry && entry.property && typeof entry.property === 'object') return entry.property;
+        }
+        return null;
+    };
+    let prop = null;
+    const nextData = document.getElementById('__NEXT_DATA__');
+    if (nextData) {
+        const data = parse(nextData.textContent);
+        const componentProps = data && data.props && data.props.pageProps && data.props.pageProps.componentProps;
+        prop = componentProps ? fromCache(componentProps.gdpClientCache) : null;
+    }
+    const apollo = document.getElementById('hdpApolloPreloadedData');
+    if (!prop && apollo) {
+        const data = parse(apollo.textContent);
+        prop = data ? fromCache(data.apiCache) : null;
+    }
+    if (!prop) return null;
+    const picked = {};
+    for (const key of propertyKeys) {
+        if (prop[key] === undefined) continue;
+        picked[key] = /Photos$/.test(key) && Array.isArray(prop[key]) ? prop[key].slice(0, 1) : prop[key];
+    }
+    return picked;
+};
+
+const run = query => query.xpaths.map(xpath => {
+    let context = document;
+    if (query.within) {
+        context = up(select(query.within.xpath)[0], query.within.up);
+        if (!context) return [];
+    }
+    return select(xpath, context).slice(0, query.limit).map(node =>
+        query.attr ? node.getAttribute(query.attr) : (query.up || [0]).map(levels => textOf(up(node, levels))));
+});
+
+(async () => {
+    const scrollY = window.scrollY;
+    for (const fraction of settings.fractions) {
+        window.scrollTo(0, document.body.scrollHeight * fraction);
+        await settle(settings.stepTimeoutMs);
+    }
+    let expanded = 0;
+    document.querySelectorAll('button').forEach(button => {
+        if (button.textContent.includes('Show more')) {
+            button.click();
+            expanded++;
+        }
+    });
+    if (expanded) await settle(settings.stepTimeoutMs);
+
+    const payload = {property: embeddedProperty(), text: document.body ? document.body.innerText : '', sections: {}};
+    for (const [name, query] of Object.entries(queries)) payload.sections[name] = run(query);
+    window.scrollTo(0, scrollY);
+    done(payload);
+})().catch(error => done({error: String(error)}));
+"""
+
+
+def run_page_script(driver, fractions=(0.5, 0.65, 1), quiet_ms=400, step_timeout_ms=2000, script_timeout=30):
+    """The whole page as one payload dict (property, text, sections), None when the script fails"""
+    settings = {'fractions': list(fractions), 'quietMs': quiet_ms, 'stepTimeoutMs': step_timeout_ms}
+    try:
+        driver.set_script_timeout(script_timeout)
+        payload = driver.execute_async_script(PAGE_SCRIPT, PAGE_QUERIES, PROPERTY_KEYS, settings)
+    except Exception as e:
+        print(f"  - Page script failed: {e}")
+        return None
+    if not isinstance(payload, dict) or 'sections' not in payload:
+        print(f"  - Page script failed: {payload.get('error') if isinstance(payload, dict) else payload}")
+        return None
+    return payload
+
+
+# Each function below is the payload version of the html_extractor method of the same group
+
+def payload_image(sections, text, property_data):
+    for images in sections['image']:
+        if images and images[0] and is_valid_zillow_image_url(images[0]):
+            property_data['image_url'] = images[0]
+            return
+
+
+def payload_basic_info(sections, text, property_data):
+    for prices in sections['price']:
+        price = next((texts[0] for texts in prices if is_price_text(texts[0])), None)
+        if price:
+            property_data['price'] = price
+            break
+
+    if sections['facts'][0]:
+        parse_bed_bath_sqft_facts(sections['facts'][0][0][0], property_data)
+
+    if not basic_facts_complete(property_data):
+        for containers in sections['fallback_facts']:
+            for texts in containers:
+                parse_fallback_facts(texts[0], property_data)
+                if basic_facts_complete(property_data):
+                    break
+            if basic_facts_complete(property_data):
+                break
+
+    for headings in sections['address']:
+        if headings:
+            if is_address_text(headings[0][0]):
+                property_data['address'] = headings[0][0]
+                break
+
+    parse_page_facts(text, property_data)
+
+
+def payload_features(sections, text, property_data):
+    parse_features(text.lower(), property_data)
+    for texts in sections['payment'][0]:
+        payment = parse_monthly_payment(texts[0])
+        if payment:
+            property_data['estimated_monthly_payment'] = payment
+            break
+
+
+def payload_scores(sections, text, property_data):
+    for containers in sections['scores']:
+        if containers:
+            parse_scores_container(containers[0][0], property_data)
+            break
+
+    if not scores_complete(property_data):
+        for elements in sections['score_keywords']:
+            for texts in elements:
+                parse_score_element_text(texts[0], property_data)
+
+
+def payload_risks(sections, text, property_data):
+    for risk_key, containers in zip(RISK_TYPES.values(), sections['risks']):
+        for texts in containers:
+            risk_value = parse_risk_container(texts[0])
+            if risk_value:
+                property_data[risk_key] = risk_value
+                break
+
+
+def payload_history(sections, text, property_data):
+    history = []
+    for texts in sections['history'][0]:
+        history.extend(parse_price_history(texts[0]))
+        if len(history) >= 5:
+            break
+    property_data['property_history'] = history
+
+
+def payload_nearby(sections, text, property_data):
+    region = parse_region(text)
+    if not region:
+        for texts in sections['location'][0]:
+            for level_text in texts:
+                region = parse_region_container(level_text)
+                if region:
+                    break
+            if region:
+                break
+    if region:
+        property_data['region'] = region
+
+    property_data['nearby_cities'] = clean_nearby_city_links([texts[0] for texts in sections['nearby'][0]])
+
+
+# schools are not here: the school markup has no stable container, they come from the embedded JSON or
+# the live extractor (page source patterns)
+PAYLOAD_EXTRACTORS = [
+    ('image', payload_image),
+    ('basic_info', payload_basic_info),
+    ('features', payload_features),
+    ('scores', payload_scores),
+    ('risks', payload_risks),
+    ('history', payload_history),
+    ('nearby', payload_nearby),
+]
+
+
+def apply_page_payload(payload, property_data):
+    """Embedded JSON first, then the DOM texts fill what it did not have. Returns the groups still missing."""
+    if payload.get('property'):
+        apply_property_json(payload['property'], property_data)
+    for group, extractor in PAYLOAD_EXTRACTORS:
+        if not missing_fields(property_data, group):
+            continue
+        try:
+            fallback_data = new_property_record(property_data['url'], property_data['scraped_at'])
+            extractor(payload['sections'], payload.get('text') or '', fallback_data)
+            fill_missing(property_data, fallback_data, group)
+        except Exception as e:
+            print(f"  - Error in {extractor.__name__}: {e}")
+    return [group for group in FIELD_GROUPS if missing_fields(property_data, group)]
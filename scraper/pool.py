@@ -0,0 +1,333 @@
+"""
+Pool mode: one command, N browsers in one process.
+
+Instead of starting eight terminals with different QUEUE_IDs, a collector browser walks the search pages
+of every city (get_all_links) and pushes the homedetails URLs onto one shared work queue. N worker
+browsers pull from that queue, so nobody sits idle while another queue still has a big county left.
+Results are collected centrally and saved per city at the end, same files as the terminal mode.
+
+Every worker is a thread that owns its own MultiPropertyZillowScraper (chromedriver calls release the GIL,
+the actual work happens in the Chrome processes, so threads are enough to keep all cores busy).
+
+With a TaskStore (TASK_DB) there is no collector: search pages and properties are both tasks in the
+shared SQLite store and every worker pulls whatever is next, see task_store.py.
+"""
+import os
+import json
+import time
+import queue
+import random
+import threading
+from datetime import datetime
+from zillow import MultiPropertyZillowScraper, save_properties
+from task_store import TaskStore
+from listings import search_result_count
+from tiling import overflow_tiles
+from pacing import get_pacer
+from instrumentation import timings
+from browser_lifecycle import BrowserLifecycle
+
+
+STOP = None  # sentinel on the work queue, one per worker
+
+
+class ScraperPool:
+    def __init__(self, num_workers, headless=False, extraction_mode='live', requests_per_minute=20, max_restarts=3,
+                 page_cache=None, cache_mode='record', resource_blocker=None, response_capture=None,
+                 lifecycle_settings=None):
+        self.num_workers = num_workers
+        self.headless = headless
+        self.extraction_mode = extraction_mode
+        self.page_cache = page_cache  # one PageCache shared by every worker (per thread connections)
+        self.cache_mode = cache_mode
+        self.resource_blocker = resource_blocker  # shared too, it only holds the patterns and the byte counters
+        self.response_capture = response_capture
+        self.lifecycle_settings = lifecycle_settings  # BrowserLifecycle keyword arguments, every browser gets its own
+        # every worker's scraper shares this pacer (one token bucket per host), requests_per_minute is its ceiling
+        self.pacer = get_pacer(max_rate=requests_per_minute, start_rate=min(10, requests_per_minute))
+        self.max_restarts = max_restarts
+
+        self.work_queue = queue.Queue()
+        self.results = {}          # city -> list of property_data
+        self.targets = {}          # city -> max properties
+        self.seen_urls = set()     # de-dup across pages and cities
+        self.failed_urls = []
+        self.live_workers = num_workers  # workers still taking items, the collector stops producing at 0
+        self.lock = threading.Lock()
+
+    def new_scraper(self):
+        return MultiPropertyZillowScraper(headless=self.headless, extraction_mode=self.extraction_mode,
+                                          page_cache=self.page_cache, cache_mode=self.cache_mode,
+                                          resource_blocker=self.resource_blocker, response_capture=self.response_capture,
+                                          browser_lifecycle=BrowserLifecycle(**self.lifecycle_settings) if self.lifecycle_settings else None)
+
+    def city_is_full(self, city):
+        with self.lock:
+            return len(self.results.get(city, [])) >= self.targets[city]
+
+    def retire_worker(self):
+        with self.lock:
+            self.live_workers -= 1
+
+    def no_workers_left(self):
+        with self.lock:
+            return self.live_workers <= 0
+
+    def collect_links(self, cities):
+        """Producer: walk the search pages of every city and feed the homedetails URLs to the workers"""
+        scraper = None
+        try:
+            scraper = self.new_scraper()
+            for city, max_properties, search_url in cities:
+                if self.no_workers_left():
+                    print("[collector] Every worker retired, stopping")
+                    break
+                print(f"[collector] Collecting links for {city} (target {max_properties})")
+                timings.set_context(city=city)
+                queued = 0
+                for current_page, links in scraper.iterate_search_pages(search_url):
+                    for url in links:
+                        with self.lock:
+                            if url in self.seen_urls:
+                                continue
+                            self.seen_urls.add(url)
+                        self.work_queue.put((city, url))
+                        queued += 1
+                    print(f"[collector] {city} page {current_page}: {queued} links queued")
+
+                    # a few spare links per city in case some properties fail
+                    if queued >= max_properties * 1.2 or self.city_is_full(city) or self.no_workers_left():
+                        break
+                    scraper.recycle_browser_if_needed()
+        except Exception as e:
+            print(f"[collector] Stopped: {e}")
+        finally:
+            for _ in range(self.num_workers):
+                self.work_queue.put(STOP)
+            if scraper:
+                try:
+                    scraper.driver.quit()
+                except Exception:
+                    pass
+
+    def restart_driver(self, scraper, worker_id):
+        print(f"[worker {worker_id}] Browser unhealthy, restarting...")
+        scraper.restart_browser('unhealthy')
+
+    def worker(self, worker_id):
+        """Consumer: scrape properties from the shared queue until the collector says stop"""
+        try:
+            scraper = self.new_scraper()
+        except Exception as e:
+            print(f"[worker {worker_id}] Failed to start browser: {e}")
+            self.retire_worker()
+            return
+
+        restarts = 0
+        try:
+            while True:
+                item = self.work_queue.get()
+                if item is STOP:
+                    break
+                city, url = item
+
+                if self.city_is_full(city):
+                    continue
+
+                # health check before every property, a dead browser gets replaced instead of failing the rest
+                if not scraper.check_driver_health():
+                    if restarts >= self.max_restarts:
+                        print(f"[worker {worker_id}] Too many restarts, handing {url} back and retiring.")
+                        self.work_queue.put(item)
+                        break
+                    restarts += 1
+                    try:
+                        self.restart_driver(scraper, worker_id)
+                    except Exception as e:
+                        print(f"[worker {worker_id}] Restart failed: {e}")
+                        self.work_queue.put(item)
+                        break
+                scraper.recycle_browser_if_needed()  # worn out (pages, memory) but alive: replaced between two properties
+
+                try:
+                    timings.set_context(city=city)
+                    property_data = scraper.scrape_property_in_new_tab(url)
+                except Exception as e:
+                    print(f"[worker {worker_id}] ❌ Error scraping {url}: {e}")
+                    property_data = None
+
+                with self.lock:
+                    if property_data:
+                        self.results.setdefault(city, []).append(property_data)
+                        print(f"[worker {worker_id}] ✅ {city}: {len(self.results[city])}/{self.targets[city]}")
+                    else:
+                        self.failed_urls.append(url)
+        finally:
+            self.retire_worker()
+            try:
+                scraper.driver.quit()
+            except Exception:
+                pass
+
+    def store_worker(self, worker_id, store):
+        """Worker for the task store: claim, run, report, repeat until no city needs anything anymore"""
+        try:
+            scraper = self.new_scraper()
+        except Exception as e:
+            print(f"[worker {worker_id}] Failed to start browser: {e}")
+            return
+
+        restarts = 0
+        try:
+            while True:
+                task = store.claim(worker_id)
+                if task is None:
+                    # other workers may still be expanding search pages
+                    if not store.has_unfinished_work():
+                        break
+                    time.sleep(5)
+                    continue
+
+                if not scraper.check_driver_health():
+                    if restarts >= self.max_restarts:
+                        print(f"[worker {worker_id}] Too many restarts, retiring.")
+                        store.release(task)  # never attempted, another worker takes it without losing a try
+                        break
+                    restarts += 1
+                    try:
+                        self.restart_driver(scraper, worker_id)
+                    except Exception as e:
+                        print(f"[worker {worker_id}] Restart failed: {e}")
+                        store.release(task)
+                        break
+                scraper.recycle_browser_if_needed()
+
+                try:
+                    timings.set_context(city=task['city'])
+                    if task['kind'] == 'search_page':
+                        links = scraper.collect_page_links(task['url'])
+                        if links is None:
+                            store.fail(task)
+                        else:
+                            tile_urls = []
+                            if task['page'] == 1:
+                                tile_urls = overflow_tiles(task['url'], search_result_count(scraper.driver.page_source))
+                            added = store.complete_search_page(task, links, tile_urls)
+                            print(f"[worker {worker_id}] {task['city']} page {task['page']}: {added} new properties queued"
+                                  + (f", split into {len(tile_urls)} map tiles" if tile_urls else ""))
+                    else:
+                        property_data = scraper.scrape_property_in_new_tab(task['url'])
+                        if property_data:
+                            store.complete_property(task, property_data)
+                            print(f"[worker {worker_id}] ✅ {task['city']}: {task['url']}")
+                        else:
+                            store.fail(task)
+                except Exception as e:
+                    print(f"[worker {worker_id}] ❌ Error on {task['url']}: {e}")
+                    store.fail(task)
+        finally:
+            try:
+                scraper.driver.quit()
+            except Exception:
+                pass
+
+    def run_from_store(self, store):
+        workers = [threading.Thread(target=self.store_worker, args=(i + 1, store), name=f"worker-{i + 1}")
+                   for i in range(self.num_workers)]
+        for worker in workers:
+            worker.start()
+            time.sleep(random.uniform(1, 3))
+        for worker in workers:
+            worker.join()
+
+        # the store is shared with other processes, so report everything it has, not only our share
+        self.targets = {}
+        self.results = {}
+        for city, counts in store.progress().items():
+            self.targets[city] = counts['target']
+            self.results[city] = list(store.iter_results(city))
+        self.failed_urls = store.failed_urls()
+        return self.results
+
+    def run(self, cities):
+        """cities: list of (city, max_properties, search_url) like the city_queues entries"""
+        self.targets = {city: max_properties for city, max_properties, _ in cities}
+
+        collector = threading.Thread(target=self.collect_links, args=(cities,), name="collector")
+        workers = [threading.Thread(target=self.worker, args=(i + 1,), name=f"worker-{i + 1}")
+                   for i in range(self.num_workers)]
+
+        collector.start()
+        for worker in workers:
+            worker.start()
+            time.sleep(random.uniform(1, 3))  # don't launch all the browsers at the same instant
+
+        collector.join()
+        for worker in workers:
+            worker.join()
+
+        self.collect_unclaimed()
+        return self.results
+
+    def collect_unclaimed(self):
+        """Items handed back by a retiring worker after the STOP sentinels (or after every worker retired) are never
+        picked up again, count them as failed instead of losing them"""
+        while True:
+            try:
+                item = self.work_queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not STOP and not self.city_is_full(item[0]):
+                self.failed_urls.append(item[1])
+
+    def save_results(self, base_dir):
+        """Same per-city JSON/CSV files and summary as the terminal mode, under base_dir/pool/"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        summary = {"workers": self.num_workers, "cities": [], "failed_urls": self.failed_urls}
+
+        for city, properties in self.results.items():
+            safe_city_name = city.replace('-ma', '').replace('-', '_').lower()
+            city_output_dir = os.path.join(base_dir, "pool", safe_city_name)
+            os.makedirs(city_output_dir, exist_ok=True)
+
+            prefix = os.path.join(city_output_dir, f"zillow_pool_{safe_city_name}_{self.targets[city]}props")
+            json_file, csv_file = save_properties(properties, filename_prefix=prefix)
+            summary["cities"].append({
+                "city": city,
+                "target_properties": self.targets[city],
+                "actual_properties": len(properties),
+                "json_file": json_file,
+                "csv_file": csv_file
+            })
+
+        summary_path = os.path.join(base_dir, f"pool_summary_{timestamp}.json")
+        with open(summary_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Pool summary: {summary_path}")
+        return summary_path
+
+
+def run_pool(cities, num_workers, base_dir, headless=False, extraction_mode='live', requests_per_minute=20, task_db=None,
+             page_cache=None, cache_mode='record', resource_blocker=None, response_capture=None, lifecycle_settings=None):
+    print(f"Starting pool mode: {num_workers} workers, {len(cities)} cities, {requests_per_minute} page loads/min")
+    pool = ScraperPool(num_workers, headless=headless, extraction_mode=extraction_mode,
+                       requests_per_minute=requests_per_minute, page_cache=page_cache, cache_mode=cache_mode,
+                       resource_blocker=resource_blocker, response_capture=response_capture,
+                       lifecycle_settings=lifecycle_settings)
+    if task_db:
+        # dynamic scheduling through the shared store, other processes can join with the same TASK_DB
+        store = TaskStore(task_db)
+        for city, max_properties, search_url in cities:
+            store.add_city(city, max_properties, search_url)
+        results = pool.run_from_store(store)
+    else:
+        results = pool.run(cities)
+    total = sum(len(properties) for properties in results.values())
+    print(f"\nPool finished: {total} properties across {len(results)} cities ({len(pool.failed_urls)} failed)")
+    print(f"Pacing: {pool.pacer.summary()}")
+    if resource_blocker:
+        print(f"Resource blocking: {resource_blocker.summary()}")
+    if response_capture:
+        print(f"Response capture: {response_capture.summary()}")
+    pool.save_results(base_dir)
+    return results
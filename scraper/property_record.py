@@ -0,0 +1,75 @@
+from datetime import datetime
+
+
+def new_property_record(url, scraped_at=None):
+    """Empty property_data dict with every field we scrape set to its 'not found' value"""
+    return {
+        'url': url,
+        'image_url': 'N/A',
+        'scraped_at': scraped_at or datetime.now().isoformat(),
+
+        'price': 'N/A',
+        'beds': 'N/A',
+        'baths': 'N/A',
+        'sqft': 'N/A',
+        'sqft_lot': 'N/A',
+        'address': 'N/A',
+        'estimated_monthly_payment': 'N/A',
+        'property_type': 'N/A',
+        'price_per_sqft': 'N/A',
+        'year_built': 'N/A',
+        'region': 'N/A',
+
+        'interior_features': [],
+        'other_rooms': [],
+        'appliances': [],
+        'utilities': 'N/A',
+        'parking': 'N/A',
+
+        'walk_score': 'N/A',
+        'bike_score': 'N/A',
+        'transit_score': 'N/A',
+
+        'elementary_school': {'name': 'N/A', 'distance': 'N/A'},
+        'middle_school': {'name': 'N/A', 'distance': 'N/A'},
+        'high_school': {'name': 'N/A', 'distance': 'N/A'},
+
+        'flood_risk': 'N/A',
+        'fire_risk': 'N/A',
+        'wind_risk': 'N/A',
+        'air_risk': 'N/A',
+        'heat_risk': 'N/A',
+
+        'nearby_cities': [],
+        'property_history': 'N/A'
+    }
+
+
+# Which fields each extractor fills. Used to skip (or only fill gaps with) an extractor
+# when the structured data already gave us its fields.
+FIELD_GROUPS = {
+    'image': ['image_url'],
+    'basic_info': ['price', 'beds', 'baths', 'sqft', 'sqft_lot', 'address', 'property_type', 'price_per_sqft', 'year_built'],
+    'features': ['interior_features', 'other_rooms', 'appliances', 'utilities', 'parking', 'estimated_monthly_payment'],
+    'scores': ['walk_score', 'bike_score', 'transit_score'],
+    'schools': ['elementary_school', 'middle_school', 'high_school'],
+    'risks': ['flood_risk', 'fire_risk', 'wind_risk', 'air_risk', 'heat_risk'],
+    'history': ['property_history'],
+    'nearby': ['nearby_cities', 'region'],
+}
+
+
+def is_missing(value):
+    if isinstance(value, dict) and 'name' in value:
+        return value['name'] == 'N/A'
+    return value in ('N/A', None, [], {})
+
+
+def missing_fields(property_data, group):
+    return [field for field in FIELD_GROUPS[group] if is_missing(property_data[field])]
+
+
+def fill_missing(property_data, fallback_data, group):
+    """Copy over only the fields of a group that are still missing"""
+    for field in missing_fields(property_data, group):
+        property_data[field] = fallback_data[field]
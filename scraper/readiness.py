@@ -0,0 +1,90 @@
+"""
+Event driven page readiness: wait for a concrete condition and return the moment it holds, instead of
+sleeping a fixed worst case and then scanning. Every check is one small execute_script round trip polled
+every POLL seconds; the timeout is only the fallback when the condition never shows up.
+
+Conditions:
+  * embedded data   - the __NEXT_DATA__ / hdpApolloPreloadedData script is in the DOM (all facts are there)
+  * section text    - a visible element (not a <script>) contains one of the given texts
+  * quiet           - document complete and neither the resource timing count (network) nor the DOM size
+                      changed for a short window; this is the network idle signal the page itself exposes,
+                      so it works the same with or without CDP
+"""
+import time
+from selenium.webdriver.support.ui import WebDriverWait
+from instrumentation import timings
+
+POLL = 0.1
+
+EMBEDDED_DATA_SCRIPT = """
+return !!(document.getElementById('__NEXT_DATA__') || document.getElementById('hdpApolloPreloadedData'));
+"""
+
+PROPERTY_PAGE_SCRIPT = """
+return !!(document.getElementById('__NEXT_DATA__') || document.getElementById('hdpApolloPreloadedData')
+          || document.querySelector('[data-testid="price"], h1'));
+"""
+
+SECTION_TEXT_SCRIPT = """
+for (const text of arguments[0]) {
+    const hit = document.evaluate("//body//*[not(self::script) and not(self::style)][contains(text(), " + JSON.stringify(text) + ")]",
+                                  document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (hit) return true;
+}
+return false;
+"""
+
+ACTIVITY_SCRIPT = """
+return [document.readyState, performance.getEntriesByType('resource').length, document.getElementsByTagName('*').length];
+"""
+
+
+def wait_until(driver, script, timeout, *args, name='condition'):
+    """Poll a JS condition, True as soon as it returns truthy, False after timeout"""
+    try:
+        with timings.span('wait', name):
+            WebDriverWait(driver, timeout, poll_frequency=POLL).until(lambda d: d.execute_script(script, *args))
+        return True
+    except Exception:
+        return False
+
+
+def has_section_text(driver, texts):
+    try:
+        return bool(driver.execute_script(SECTION_TEXT_SCRIPT, list(texts)))
+    except Exception:
+        return False
+
+
+def wait_for_property_page(driver, timeout=10):
+    """Property page usable: embedded data or at least the header/price rendered"""
+    return wait_until(driver, PROPERTY_PAGE_SCRIPT, timeout, name='property_page')
+
+
+def wait_for_embedded_data(driver, timeout=10):
+    return wait_until(driver, EMBEDDED_DATA_SCRIPT, timeout, name='embedded_data')
+
+
+def wait_for_section_text(driver, texts, timeout=3):
+    return wait_until(driver, SECTION_TEXT_SCRIPT, timeout, list(texts), name='section_text')
+
+
+def wait_for_quiet(driver, timeout=3, quiet=0.4):
+    """Document complete and no new requests or DOM nodes for `quiet` seconds (lazy loading has settled)"""
+    deadline = time.monotonic() + timeout
+    last_activity = None
+    last_change = time.monotonic()
+    while time.monotonic() < deadline:
+        try:
+            state, resources, nodes = driver.execute_script(ACTIVITY_SCRIPT)
+        except Exception:
+            return False
+        now = time.monotonic()
+        if (resources, nodes) != last_activity:
+            last_activity = (resources, nodes)
+            last_change = now
+        elif state == 'complete' and now - last_change >= quiet:
+            return True
+        with timings.span('wait', 'quiet'):
+            time.sleep(POLL)
+    return False
@@ -0,0 +1,125 @@
+"""
+Resource blocking for the property tabs.
+
+A homedetails page pulls a few MB of photos, map tiles, fonts, videos and ad/analytics scripts, and we keep
+none of it: the one image we store is the src attribute of the first photo, readable from the DOM or the
+page source without downloading it. ResourceBlocker tells Chrome (CDP Network.setBlockedURLs) to drop those
+requests before they leave the browser, per tab, right after the tab is opened.
+
+setBlockedURLs only takes wildcard patterns to block, it has no exceptions. So the allowlist works on the
+patterns: a block pattern that overlaps an allow pattern is not installed. The categories below are scoped
+to hosts on purpose (zillowstatic photos, google maps, tracker domains), a bare '*.png*' would also catch the
+PerimeterX challenge and leave the tab stuck on the captcha wall.
+
+Bytes saved can not be measured on a blocked page (what was not loaded has no size), so every sample_every-th
+page is loaded unblocked as a reference: saved = average unblocked page weight - what this page loaded.
+The per page numbers come from the performance log, see network_events.py.
+
+    blocker = ResourceBlocker(['images', 'fonts', 'media', 'maps', 'trackers'])
+    sampled = blocker.apply(driver)              # after switch_to.new_window, before driver.get
+    blocker.record_page(url, read_network_events(driver), sampled)
+"""
+import fnmatch
+import threading
+from network_events import page_traffic
+
+BLOCK_CATEGORIES = {
+    'images': ['*photos.zillowstatic.com/*', '*zillowstatic.com/*.jpg*', '*zillowstatic.com/*.jpeg*',
+               '*zillowstatic.com/*.png*', '*zillowstatic.com/*.webp*', '*zillowstatic.com/*.gif*',
+               '*zillowstatic.com/*.svg*', '*maps.googleapis.com/maps/api/staticmap*', '*streetviewpixels*'],
+    'fonts': ['*zillowstatic.com/*.woff*', '*zillowstatic.com/*.ttf*', '*fonts.googleapis.com/*', '*fonts.gstatic.com/*'],
+    'media': ['*zillowstatic.com/*.mp4*', '*zillowstatic.com/*.webm*', '*zillowstatic.com/*.m3u8*',
+              '*my.matterport.com/*', '*youtube.com/embed/*', '*ytimg.com/*'],
+    'maps': ['*maps.googleapis.com/*', '*maps.gstatic.com/*', '*khms*.googleapis.com/*', '*api.mapbox.com/*'],
+    'trackers': ['*google-analytics.com/*', '*googletagmanager.com/*', '*googleadservices.com/*', '*doubleclick.net/*',
+                 '*googlesyndication.com/*', '*connect.facebook.net/*', '*facebook.com/tr*', '*bat.bing.com/*',
+                 '*hotjar.com/*', '*cdn.segment.com/*', '*api.segment.io/*', '*nr-data.net/*', '*js-agent.newrelic.com/*',
+                 '*optimizely.com/*', '*adsrvr.org/*', '*amazon-adsystem.com/*', '*criteo.com/*', '*criteo.net/*',
+                 '*taboola.com/*', '*outbrain.com/*', '*quantserve.com/*', '*scorecardresearch.com/*',
+                 '*pinterest.com/ct*', '*analytics.tiktok.com/*', '*sc-static.net/*', '*clarity.ms/*'],
+}
+
+# never blocked: the bot check (a blocked PerimeterX script looks like a bot) and zillow's own pages/API
+DEFAULT_ALLOW = ['*perimeterx.net/*', '*px-cdn.net/*', '*px-cloud.net/*', '*pxchk.net/*', '*zillow.com/graphql*',
+                 '*zillow.com/homedetails/*']
+
+
+def patterns_overlap(first, second):
+    """Could one URL match both wildcard patterns? (checked on the literal parts, good enough for host patterns)"""
+    return (fnmatch.fnmatchcase(first.replace('*', ''), second) or fnmatch.fnmatchcase(second.replace('*', ''), first)
+            or first == second)
+
+
+def block_patterns(categories, allow=None):
+    """The URL patterns of the given categories, minus the ones overlapping the allowlist"""
+    allow = DEFAULT_ALLOW + list(allow or [])
+    patterns = []
+    for category in categories:
+        if category not in BLOCK_CATEGORIES:
+            raise ValueError(f"Unknown block category '{category}', pick from {', '.join(BLOCK_CATEGORIES)}")
+        for pattern in BLOCK_CATEGORIES[category]:
+            if pattern not in patterns and not any(patterns_overlap(pattern, allowed) for allowed in allow):
+                patterns.append(pattern)
+    return patterns
+
+
+class ResourceBlocker:
+    def __init__(self, categories=tuple(BLOCK_CATEGORIES), allow=None, extra_patterns=None, sample_every=25):
+        self.categories = list(categories)
+        self.patterns = block_patterns(self.categories, allow) + list(extra_patterns or [])
+        self.sample_every = sample_every  # every n-th page loads unblocked to measure full page weight, 0 = never
+        self.lock = threading.Lock()  # one blocker is shared by every pool worker
+        self.applied = 0
+        self.pages = 0
+        self.loaded_bytes = 0
+        self.blocked_requests = 0
+        self.saved_bytes = 0
+        self.sample_pages = 0
+        self.sample_bytes = 0
+
+    def apply(self, driver):
+        """Install the block list on the current tab. Returns True if this page is an unblocked sample."""
+        with self.lock:
+            self.applied += 1
+            sample = bool(self.sample_every) and self.applied % self.sample_every == 0
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': [] if sample else self.patterns})
+        except Exception as e:
+            print(f"  - Could not set blocked URLs: {e}")
+        return sample
+
+    def full_page_bytes(self):
+        """Average weight of an unblocked page, None until the first sample"""
+        return self.sample_bytes / self.sample_pages if self.sample_pages else None
+
+    def record_page(self, url, events, sampled=False):
+        """Account one page from its network events, prints and returns its traffic dict"""
+        traffic = page_traffic(events)
+        with self.lock:
+            if sampled:
+                self.sample_pages += 1
+                self.sample_bytes += traffic['bytes']
+                traffic['saved'] = 0
+            else:
+                full = self.full_page_bytes()
+                traffic['saved'] = max(0, int(full - traffic['bytes'])) if full is not None else None
+                self.pages += 1
+                self.loaded_bytes += traffic['bytes']
+                self.blocked_requests += traffic['blocked']
+                self.saved_bytes += traffic['saved'] or 0
+        if sampled:
+            print(f"  🧱 Unblocked sample page: {traffic['bytes'] / 1024 ** 2:.2f} MB in {traffic['requests']} requests")
+        else:
+            saved = f", ~{traffic['saved'] / 1024 ** 2:.2f} MB saved" if traffic['saved'] is not None else ''
+            print(f"  🧱 {traffic['bytes'] / 1024 ** 2:.2f} MB loaded, {traffic['blocked']} requests blocked{saved}")
+        return traffic
+
+    def summary(self):
+        with self.lock:
+            full = self.full_page_bytes()
+            return {'categories': self.categories, 'patterns': len(self.patterns), 'pages': self.pages,
+                    'blocked_requests': self.blocked_requests,
+                    'loaded_mb_per_page': round(self.loaded_bytes / self.pages / 1024 ** 2, 3) if self.pages else None,
+                    'unblocked_mb_per_page': round(full / 1024 ** 2, 3) if full is not None else None,
+                    'sample_pages': self.sample_pages, 'saved_mb': round(self.saved_bytes / 1024 ** 2, 1)}
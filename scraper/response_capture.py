@@ -0,0 +1,148 @@
+"""
+The JSON the property page fetches for itself, read off the wire.
+
+Climate risks, schools, price history and walk scores are not all in the server rendered HTML, the page
+asks zillow's GraphQL API for them once the section scrolls into view or the page settles. Up to now the
+extractors scrolled to each section and slept until the front-end rendered what that call returned. Here we
+take the call's response body itself: the performance log (network_events.py) lists every
+Network.responseReceived of the tab, and for the JSON ones coming from the data endpoints one
+Network.getResponseBody returns the body Chrome still has buffered. The bodies are kept per property, mapped
+with the same apply_property_json as the embedded JSON, and the live extractors only run for what is left.
+
+    capture = ResponseCapture(log_path='data/responses.jsonl')   # log_path optional, keeps every body
+    capture.enable(driver)                                       # per tab, before driver.get
+    responses = capture.capture(driver, events, page_url)
+    apply_captured_responses(responses, property_data)
+"""
+import json
+import base64
+import fnmatch
+import threading
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+from embedded_data import loads, apply_property_json
+from property_record import FIELD_GROUPS, new_property_record, missing_fields, fill_missing
+from jsonl_sink import JsonlSink
+
+# the data calls of a homedetails page, everything else (scripts, images, the document) is never fetched
+CAPTURE_URL_PATTERNS = ['*zillow.com/graphql*', '*zillow.com/zg-graph*', '*zillow.com/homedetails/*api*',
+                        '*zillow.com/ajax/*']
+
+
+class ResponseCapture:
+    def __init__(self, url_patterns=CAPTURE_URL_PATTERNS, max_body_bytes=5 * 1024 ** 2, max_responses=40, log_path=None):
+        self.url_patterns = list(url_patterns)
+        self.max_body_bytes = max_body_bytes  # bigger bodies are skipped (getResponseBody ships them base64 over WebDriver)
+        self.max_responses = max_responses    # per page
+        self.sink = JsonlSink(log_path) if log_path else None
+        self.lock = threading.Lock()  # one capture is shared by every pool worker
+        self.pages = 0
+        self.responses = 0
+        self.failed = 0
+
+    def enable(self, driver):
+        """Network domain on for the current tab, with a buffer large enough to still hold the bodies when we ask"""
+        try:
+            driver.execute_cdp_cmd('Network.enable', {'maxTotalBufferSize': 64 * 1024 ** 2,
+                                                      'maxResourceBufferSize': self.max_body_bytes})
+        except Exception as e:
+            print(f"  - Could not enable response capture: {e}")
+
+    def wanted(self, response):
+        mime_type = (response.get('mimeType') or '').lower()
+        return 'json' in mime_type and any(fnmatch.fnmatchcase(response.get('url', ''), pattern) for pattern in self.url_patterns)
+
+    def capture(self, driver, events, page_url=None):
+        """JSON bodies of the page's finished data calls, as [{'url', 'operation', 'status', 'data'}]"""
+        requests, candidates, finished = {}, {}, {}
+        for event in events:
+            params = event.get('params', {})
+            request_id = params.get('requestId')
+            if event['method'] == 'Network.requestWillBeSent':
+                requests[request_id] = params.get('request') or {}
+            elif event['method'] == 'Network.responseReceived' and self.wanted(params.get('response') or {}):
+                candidates[request_id] = params['response']
+            elif event['method'] == 'Network.loadingFinished':
+                finished[request_id] = int(params.get('encodedDataLength') or 0)
+
+        responses = []
+        failed = 0
+        for request_id, response in candidates.items():
+            if len(responses) >= self.max_responses:
+                break
+            if request_id not in finished or finished[request_id] > self.max_body_bytes:
+                continue  # still loading (its section was never reached) or too big
+            try:
+                body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                text = base64.b64decode(body['body']) if body.get('base64Encoded') else body['body']
+                data = loads(text)
+            except Exception:
+                failed += 1  # evicted from the buffer, or not JSON after all
+                continue
+            responses.append({'url': response['url'], 'operation': operation_name(response['url'], requests.get(request_id)),
+                              'status': response.get('status'), 'data': data})
+
+        with self.lock:
+            self.pages += 1
+            self.responses += len(responses)
+            self.failed += failed
+            if self.sink and responses:
+                self.sink.append({'url': page_url, 'captured_at': datetime.now().isoformat(), 'responses': responses})
+        if responses:
+            print(f"  📡 Captured {len(responses)} data responses ({', '.join(sorted({r['operation'] or '?' for r in responses}))})")
+        return responses
+
+    def close(self):
+        if self.sink:
+            self.sink.close()
+
+    def summary(self):
+        with self.lock:
+            return {'pages': self.pages, 'responses': self.responses, 'failed': self.failed,
+                    'per_page': round(self.responses / self.pages, 1) if self.pages else 0}
+
+
+def operation_name(url, request=None):
+    """GraphQL operationName from the query string or the POST body, None for other calls"""
+    names = parse_qs(urlparse(url).query).get('operationName')
+    if names:
+        return names[0]
+    try:
+        return json.loads((request or {}).get('postData') or '{}').get('operationName')
+    except (ValueError, AttributeError):
+        return None
+
+
+def find_properties(data, depth=0):
+    """Every dict under a 'property' key (GraphQL answers {'data': {'property': {...}}}), a few levels deep"""
+    found = []
+    if depth > 4:
+        return found
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key == 'property' and isinstance(value, dict):
+                found.append(value)
+            elif isinstance(value, (dict, list)):
+                found.extend(find_properties(value, depth + 1))
+    elif isinstance(data, list):
+        for value in data[:20]:
+            found.extend(find_properties(value, depth + 1))
+    return found
+
+
+def apply_captured_responses(responses, property_data):
+    """Fill the fields still missing from the captured bodies. Returns the groups that got something."""
+    captured_data = new_property_record(property_data['url'], property_data['scraped_at'])
+    for response in responses:
+        for prop in find_properties(response['data']):
+            try:
+                apply_property_json(prop, captured_data)
+            except Exception as e:
+                print(f"  - Error mapping {response['operation'] or response['url']}: {e}")
+    filled = []
+    for group in FIELD_GROUPS:
+        before = len(missing_fields(property_data, group))
+        fill_missing(property_data, captured_data, group)
+        if len(missing_fields(property_data, group)) < before:
+            filled.append(group)
+    return filled
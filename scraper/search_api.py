@@ -0,0 +1,176 @@
+"""
+HTTP level search crawler: talks to the JSON endpoint the Zillow front end itself uses for the result list,
+no browser at all.
+
+The searchQueryState of every city_queues URL (mapBounds, regionSelection, filterState) goes as-is into a
+PUT to /async-create-search-page-state; the answer carries listResults (the same entries listings.py maps
+from __NEXT_DATA__) and the total result count. Requests go over one pooled requests.Session (keep-alive,
+gzip) and are paced by the shared HostPacer of the host.
+
+The site never serves more than MAX_PAGES pages per search, so when a search reports more results than
+that, its mapBounds get split into four quadrants (tiling.py, same as the browser crawl) and each one is
+crawled (recursively) on its own. zpids are de-duplicated across quadrants.
+
+    python search_api.py --queue 1 --output data/api                 # real site
+    python fixture_server.py --port 8765 &                           # offline stand-in
+    python search_api.py --queue 1 --base-url http://127.0.0.1:8765 --output /tmp/api
+"""
+import os
+import time
+import argparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from search_urls import get_search_state
+from listings import list_result_record
+from jsonl_sink import JsonlSink
+from pacing import get_pacer
+from tiling import MAX_PAGES, split_bounds, needs_split
+
+ZILLOW_BASE_URL = 'https://www.zillow.com'
+SEARCH_ENDPOINT = '/async-create-search-page-state'
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+    'Content-Type': 'application/json',
+}
+
+
+class BlockedError(Exception):
+    pass
+
+
+class SearchApiClient:
+    def __init__(self, base_url=ZILLOW_BASE_URL, timeout=20, pool_size=4, start_rate=10, max_rate=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.pacer = get_pacer(self.base_url, start_rate=start_rate, max_rate=max_rate)
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504], allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.request_id = 0
+
+    def fetch_page(self, search_state, page=1):
+        """One result page: {'results': [...], 'total': int, 'pages': int}"""
+        state = dict(search_state)
+        state['pagination'] = {'currentPage': page} if page > 1 else {}
+        self.request_id += 1
+        body = {'searchQueryState': state, 'wants': {'cat1': ['listResults'], 'cat2': ['total']},
+                'requestId': self.request_id, 'isDebugRequest': False}
+
+        self.pacer.wait()
+        started = time.monotonic()
+        try:
+            response = self.session.put(self.base_url + SEARCH_ENDPOINT, json=body, timeout=self.timeout)
+        except requests.RequestException:
+            self.pacer.record_failure()
+            raise
+        if response.status_code in (403, 429):
+            self.pacer.record_block()
+            raise BlockedError(f"HTTP {response.status_code} from {SEARCH_ENDPOINT}")
+        if response.status_code != 200:
+            self.pacer.record_failure()
+            response.raise_for_status()
+        self.pacer.record_success(time.monotonic() - started)
+
+        cat1 = response.json().get('cat1') or {}
+        search_list = cat1.get('searchList') or {}
+        return {
+            'results': (cat1.get('searchResults') or {}).get('listResults') or [],
+            'total': search_list.get('totalResultCount', 0),
+            'pages': search_list.get('totalPages', 1),
+        }
+
+    def search(self, search_state, limit=None, seen=None):
+        """
+        Yields listResults entries of a search, splitting its mapBounds into quadrants while it has more
+        results than MAX_PAGES can show. seen (a set of zpids) is shared across the whole recursion.
+        """
+        seen = set() if seen is None else seen
+        first = self.fetch_page(search_state, 1)
+        per_page = max(len(first['results']), 1)
+        bounds = search_state.get('mapBounds')
+
+        # only split when the capped pages can not hold what we still need
+        reachable = MAX_PAGES * per_page
+        still_needed = limit - len(seen) if limit else first['total']
+        if still_needed > reachable and needs_split(bounds, first['total'], reachable):
+            print(f"  🔀 {first['total']} results > {MAX_PAGES} pages, splitting into quadrants")
+            for quadrant in split_bounds(bounds):
+                for result in self.search(dict(search_state, mapBounds=quadrant), limit, seen):
+                    yield result
+                if limit and len(seen) >= limit:
+                    return
+            return
+
+        page, payload = 1, first
+        while True:
+            for result in payload['results']:
+                zpid = str(result.get('zpid') or result.get('detailUrl'))
+                if zpid in seen:
+                    continue
+                seen.add(zpid)
+                yield result
+                if limit and len(seen) >= limit:
+                    return
+            page += 1
+            if page > min(payload['pages'], MAX_PAGES) or not payload['results']:
+                return
+            payload = self.fetch_page(search_state, page)
+
+
+def crawl_city(client, search_url, max_properties, jsonl_path):
+    """Crawl one city_queues entry into a JSON Lines file, returns the number of records"""
+    sink = JsonlSink(jsonl_path)
+    try:
+        for result in client.search(get_search_state(search_url), limit=max_properties):
+            if result.get('detailUrl'):
+                sink.append(list_result_record(result))
+    finally:
+        sink.close()
+    return sink.count
+
+
+def crawl_queue(cities, output_dir, base_url=ZILLOW_BASE_URL, start_rate=10, max_rate=30):
+    """Same layout as the browser queue: <output_dir>/<city>/zillow_api_<city>_<timestamp>.jsonl"""
+    client = SearchApiClient(base_url, start_rate=min(start_rate, max_rate), max_rate=max_rate)
+    total = 0
+    for city, max_properties, search_url in cities:
+        city_dir_name = city.replace('-ma', '').replace('-', '_').lower()
+        city_output_dir = os.path.join(output_dir, city_dir_name)
+        os.makedirs(city_output_dir, exist_ok=True)
+        jsonl_path = os.path.join(city_output_dir, f"zillow_api_{city_dir_name}_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+
+        print(f"\n🌐 {city}: target {max_properties}")
+        try:
+            count = crawl_city(client, search_url, max_properties, jsonl_path)
+        except BlockedError as e:
+            print(f"  ❌ Blocked on {city}: {e}")
+            break
+        except requests.RequestException as e:
+            print(f"  ❌ {city} failed: {e}")
+            continue
+        total += count
+        print(f"  ✅ {city}: {count} properties -> {jsonl_path}")
+    print(f"\nDone: {total} properties, pacing {client.pacer.summary()}")
+    return total
+
+
+if __name__ == "__main__":
+    from city_queues import city_queues
+
+    parser = argparse.ArgumentParser(description="Crawl the search JSON endpoint for a queue of cities")
+    parser.add_argument('--queue', type=int, default=1, help="city_queues id")
+    parser.add_argument('--base-url', default=ZILLOW_BASE_URL, help="site root, point it at fixture_server.py to test offline")
+    parser.add_argument('--output', default=os.path.join('data', 'api'))
+    parser.add_argument('--start-rpm', type=float, default=10, help="initial request rate (requests/minute)")
+    parser.add_argument('--max-rpm', type=float, default=30, help="ceiling of the adaptive request rate")
+    args = parser.parse_args()
+
+    crawl_queue(city_queues[args.queue], os.path.join(args.output, f"queue_{args.queue}"), args.base_url,
+                args.start_rpm, args.max_rpm)
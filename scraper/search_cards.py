@@ -0,0 +1,98 @@
+"""
+Harvest a whole search result page in one JavaScript round trip.
+
+The old get_all_links did find_element + smooth scrollIntoView + a 5 s WebDriverWait per card (and ran into
+that timeout on every ad slot). Here one execute_async_script walks the result list inside the browser:
+cards whose anchor is not rendered yet get scrolled into view (instantly) and polled for a few frames, ads
+simply have no homedetails anchor and are skipped. What comes back is one JSON array with the link, zpid
+and the card level facts for every listing.
+"""
+
+RESULT_LIST_XPATH = '/html/body/div[1]/div/div[2]/div/div/div[1]/div[1]/ul'
+
+HARVEST_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const listXpath = arguments[0];
+const perCardTimeout = arguments[1];
+
+const list = document.evaluate(listXpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+             || document.querySelector('#grid-search-results ul, ul.photo-cards');
+const items = list ? Array.from(list.children) : [];
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+const text = (root, selectors) => {
+    for (const selector of selectors) {
+        const node = root.querySelector(selector);
+        if (node && node.textContent.trim()) return node.textContent.trim();
+    }
+    return null;
+};
+
+(async () => {
+    const cards = [];
+    const seen = new Set();
+    const scrollY = window.scrollY;
+    for (const item of items) {
+        let anchor = item.querySelector('a[href*="/homedetails/"]');
+        if (!anchor && item.querySelector('article, [data-test="property-card"]')) {
+            // lazy placeholder: bring it into view and give it a few frames to render
+            item.scrollIntoView({block: 'center'});
+            const deadline = Date.now() + perCardTimeout;
+            while (!anchor && Date.now() < deadline) {
+                await sleep(25);
+                anchor = item.querySelector('a[href*="/homedetails/"]');
+            }
+        }
+        if (!anchor || seen.has(anchor.href)) continue;
+        seen.add(anchor.href);
+
+        const details = Array.from(item.querySelectorAll('ul[class*="HomeDetailsList"] li, [data-test="property-card-details"] li'))
+                             .map(li => li.textContent.trim());
+        const zpid = (anchor.href.match(/\\/(\\d+)_zpid/) || [])[1] || null;
+        cards.push({
+            url: anchor.href,
+            zpid: zpid,
+            price: text(item, ['[data-test="property-card-price"]', 'span[class*="PropertyCardWrapper__StyledPriceLine"]']),
+            address: text(item, ['address', '[data-test="property-card-addr"]']),
+            details: details,
+            status: text(item, ['[class*="StyledPropertyCardBadge"]', '[class*="StatusBadge"]']),
+            image_url: (item.querySelector('img') || {}).src || null
+        });
+    }
+    window.scrollTo(0, scrollY);
+    done(cards);
+})().catch(error => done({error: String(error)}));
+"""
+
+
+def parse_card_details(details):
+    """['3 bds', '2 ba', '1,640 sqft', ...] -> {'beds': '3', 'baths': '2', 'sqft': '1,640'}"""
+    facts = {}
+    for detail in details or []:
+        value, _, unit = detail.replace('\xa0', ' ').strip().partition(' ')
+        unit = unit.lower()
+        if unit.startswith(('bd', 'bed')):
+            facts['beds'] = value
+        elif unit.startswith(('ba', 'bath')):
+            facts['baths'] = value
+        elif unit.startswith('sqft'):
+            facts['sqft'] = value
+    return facts
+
+
+def harvest_search_cards(driver, per_card_timeout_ms=1500, script_timeout=60):
+    """
+    Every listing card of the loaded search page as a dict (url, zpid, price, address, beds, baths, sqft,
+    status, image_url). Returns None when the script fails, so the caller can fall back to the slow path.
+    """
+    try:
+        driver.set_script_timeout(script_timeout)
+        cards = driver.execute_async_script(HARVEST_SCRIPT, RESULT_LIST_XPATH, per_card_timeout_ms)
+    except Exception as e:
+        print(f"  - Batch link harvest failed: {e}")
+        return None
+    if not isinstance(cards, list):
+        print(f"  - Batch link harvest failed: {cards.get('error') if isinstance(cards, dict) else cards}")
+        return None
+    for card in cards:
+        card.update(parse_card_details(card.pop('details', None)))
+    return cards
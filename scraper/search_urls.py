@@ -0,0 +1,43 @@
+import json
+from urllib.parse import urlsplit, urlunsplit, parse_qs, urlencode
+
+# Helpers for the Zillow search URLs in city_queues.
+# Everything about a search (map bounds, region, filters, page) lives in the JSON of the
+# searchQueryState query parameter, so we decode it, change it and encode it back.
+
+
+def get_search_state(search_url):
+    query = parse_qs(urlsplit(search_url).query)
+    if 'searchQueryState' not in query:
+        return {}
+    return json.loads(query['searchQueryState'][0])
+
+
+def with_search_state(search_url, search_state):
+    parts = urlsplit(search_url)
+    query = parse_qs(parts.query)
+    query['searchQueryState'] = [json.dumps(search_state, separators=(',', ':'))]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query, doseq=True), parts.fragment))
+
+
+def get_page_number(search_url):
+    return get_search_state(search_url).get('pagination', {}).get('currentPage', 1)
+
+
+def with_page(search_url, page):
+    """Same search, jump straight to a result page (page 1 has no currentPage, like the site does it)"""
+    state = get_search_state(search_url)
+    state['pagination'] = {'currentPage': page} if page > 1 else {}
+    return with_search_state(search_url, state)
+
+
+def get_map_bounds(search_url):
+    """{'west', 'east', 'south', 'north'} or None"""
+    return get_search_state(search_url).get('mapBounds')
+
+
+def with_map_bounds(search_url, bounds):
+    state = get_search_state(search_url)
+    state['mapBounds'] = dict(bounds)
+    state['pagination'] = {}
+    return with_search_state(search_url, state)
@@ -0,0 +1,184 @@
+"""
+Pipelined property tabs: the next page loads while the current one is extracted.
+
+The serial loop leaves one side idle all the time: Chrome waits while Python runs the extractors, Python waits
+while Chrome loads the page. TabPrefetcher keeps a small fixed set of tabs (depth + 1) in one browser. When a
+page is ready and its extraction is about to start, the next URL is already sent off to a free tab with a
+script triggered navigation (location.href in a setTimeout, so WebDriver does not wait for that load), and
+we switch straight back. By the time the extraction is done the next page is mostly there.
+
+Every load still takes a slot from the shared pacer first. Prefetches use try_wait(), so a prefetch never
+holds up the extraction: no slot, no prefetch, the page is loaded the normal (blocking) way later. Tabs are
+reused page after page and recycled (closed, a fresh one opened) after recycle_after pages or an error; every
+tab is closed and the search tab is back in front when the generator ends, also when the caller breaks out.
+
+    for url, property_data, error in TabPrefetcher(scraper, depth=1).scrape(urls):
+        ...
+"""
+import time
+from collections import deque
+from instrumentation import timings
+from readiness import wait_for_property_page
+
+# started after the script returned, so the WebDriver call does not wait for the navigation
+START_LOAD_SCRIPT = "const url = arguments[0]; window.setTimeout(() => { window.location.href = url; }, 0);"
+
+# load time of the page itself (navigation timing), the pacer's health signal; null while it is still loading
+LOAD_SECONDS_SCRIPT = """
+const navigation = performance.getEntriesByType('navigation')[0];
+return navigation && navigation.loadEventEnd ? navigation.loadEventEnd / 1000 : null;
+"""
+
+
+class TabPrefetcher:
+    def __init__(self, scraper, depth=1, recycle_after=25):
+        self.scraper = scraper
+        self.driver = scraper.driver
+        self.depth = depth                  # pages loading in the background while one is extracted
+        self.recycle_after = recycle_after  # pages per tab before it is closed and replaced
+        self.free_tabs = []                 # handles sitting on about:blank, waiting for their next page
+        self.in_flight = deque()            # (url, handle, started, result) in URL order, result set when already known
+        self.tab_pages = {}                 # handle -> pages it has loaded
+        self.home = None
+
+    def scrape(self, property_urls):
+        """(url, property_data, error) per URL, in order"""
+        positions = {url: i + 1 for i, url in enumerate(property_urls)}
+        pending = deque(property_urls)
+        self.home = self.driver.current_window_handle
+        try:
+            while pending or self.in_flight:
+                if not self.in_flight:
+                    self.start_load(pending, block=True)
+                self.prefetch(pending)
+                if not self.in_flight:
+                    continue
+
+                property_url, handle, started, result = self.in_flight.popleft()
+                print(f"\n--> Processing link {positions[property_url]} / {len(property_urls)}")
+                if result is None:
+                    with timings.property(property_url):
+                        result = self.extract(property_url, handle, started, pending)
+                yield result
+        finally:
+            self.close()
+
+    def loading(self):
+        return sum(1 for _, handle, _, result in self.in_flight if result is None)
+
+    def start_load(self, pending, block):
+        """
+        Send the next pending URL to a free tab. False when the pacer has no slot for it right now. Cached pages
+        (PAGE_CACHE_MODE=replay) and URLs whose load could not be started go into in_flight as finished results,
+        so they come out in their place.
+        """
+        while pending:
+            cached_data = self.scraper.replay_cached_page(pending[0])
+            if cached_data:
+                property_url = pending.popleft()
+                self.in_flight.append((property_url, None, None, (property_url, cached_data, None)))
+                continue
+            if block:
+                self.scraper.pacer.wait()
+            elif not self.scraper.pacer.try_wait():
+                return False
+            property_url = pending.popleft()
+            handle = None
+            try:
+                handle = self.free_tabs.pop() if self.free_tabs else self.open_tab()
+                self.driver.switch_to.window(handle)
+                self.scraper.start_page_traffic(handle)
+                self.driver.execute_script(START_LOAD_SCRIPT, property_url)
+            except Exception as e:
+                self.scraper.pacer.record_failure()
+                if handle:
+                    self.recycle(handle)
+                self.in_flight.append((property_url, None, None, (property_url, None, e)))
+                return True
+            self.in_flight.append((property_url, handle, time.monotonic(), None))
+            return True
+        return False
+
+    def prefetch(self, pending):
+        """Top the pipeline up without waiting on the pacer, then go back to the page being extracted"""
+        current = self.scraper.page_tab
+        limit = self.depth if current else self.depth + 1  # the page being extracted holds a tab too
+        started = False
+        while pending and self.loading() < limit and self.start_load(pending, block=False):
+            started = True
+        if started and current:
+            self.driver.switch_to.window(current)
+
+    def extract(self, property_url, handle, started, pending):
+        self.scraper.page_tab = handle
+        try:
+            self.driver.switch_to.window(handle)
+            wait_for_property_page(self.driver)
+            latency = self.load_seconds(started)
+            self.prefetch(pending)  # the next page loads while this one is extracted
+            property_data = self.scraper.extract_loaded_property(property_url, latency)
+        except Exception as e:
+            self.scraper.pacer.record_failure()
+            self.recycle(handle)
+            return property_url, None, e
+        finally:
+            self.scraper.page_tab = None
+        self.release(handle)
+        return property_url, property_data, None
+
+    def load_seconds(self, started):
+        """The page's own load time, wall time since the load started would also count the extraction it overlapped"""
+        try:
+            seconds = self.driver.execute_script(LOAD_SECONDS_SCRIPT)
+        except Exception:
+            seconds = None
+        return seconds if seconds else time.monotonic() - started
+
+    def open_tab(self):
+        self.driver.switch_to.new_window('tab')
+        handle = self.driver.current_window_handle
+        self.tab_pages[handle] = 0
+        return handle
+
+    def release(self, handle):
+        """
+        Done with the page in this tab (it is the current one). Back to about:blank so the next page can not be
+        mistaken for this one while it is still loading, or closed after recycle_after pages.
+        """
+        self.tab_pages[handle] += 1
+        if self.tab_pages[handle] >= self.recycle_after:
+            self.recycle(handle)
+            return
+        try:
+            self.driver.get('about:blank')
+            self.free_tabs.append(handle)
+        except Exception:
+            self.recycle(handle)
+
+    def recycle(self, handle):
+        """Close a tab (its renderer memory goes with it), a fresh one is opened when one is needed"""
+        self.tab_pages.pop(handle, None)
+        self.scraper.tab_traffic.pop(handle, None)
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+            self.driver.switch_to.window(self.home)
+        except Exception as e:
+            print(f"  - Could not close tab: {e}")
+
+    def close(self):
+        """Close every tab we opened (and the prefetches nobody wants any more), back to the search tab"""
+        for handle in list(self.tab_pages):
+            self.scraper.tab_traffic.pop(handle, None)
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception:
+                continue
+        self.free_tabs = []
+        self.in_flight.clear()
+        self.tab_pages = {}
+        try:
+            self.driver.switch_to.window(self.home)
+        except Exception as e:
+            print(f"  - Could not switch back to the search tab: {e}")
@@ -0,0 +1,204 @@
+"""
+Shared on-disk task store for the dynamic scheduler.
+
+The static city_queues split means a queue with one big county runs for hours after the others are done.
+Here the work is broken into small tasks instead:
+    - search_page: one search URL + page number, running it adds the property tasks it finds (and the next page).
+                   A first page that reports more results than 20 pages can show adds one first-page task per
+                   map quadrant instead (tiling.py), so big counties get covered past the pagination cap.
+    - property:    one homedetails URL
+All of them live in one SQLite file, so any number of workers (threads in pool mode, or several terminals
+pointing at the same TASK_DB) pull the next task when they are idle. A worker always takes work from the
+city with the largest remaining backlog, so the big counties get spread over everybody and the total
+wall clock tracks total work / workers instead of the slowest queue.
+"""
+import json
+import time
+import sqlite3
+import threading
+from search_urls import with_page
+from tiling import MAX_PAGES
+
+
+class TaskStore:
+    def __init__(self, path, max_attempts=3, lease_seconds=600):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds  # a 'running' task older than this belonged to a crashed worker
+        self.local = threading.local()
+        self.create_tables()
+
+    @property
+    def db(self):
+        # one connection per thread, sqlite handles the locking between threads and processes
+        if not hasattr(self.local, 'db'):
+            self.local.db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self.local.db.execute("PRAGMA journal_mode=WAL")
+        return self.local.db
+
+    def create_tables(self):
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS cities (
+                city TEXT PRIMARY KEY,
+                target INTEGER NOT NULL,
+                search_url TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                city TEXT NOT NULL,
+                url TEXT NOT NULL UNIQUE,
+                page INTEGER,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, city);
+            CREATE TABLE IF NOT EXISTS results (
+                url TEXT PRIMARY KEY,
+                city TEXT NOT NULL,
+                data TEXT NOT NULL,
+                scraped_at TEXT
+            );
+        """)
+
+    def transaction(self):
+        """BEGIN IMMEDIATE so two workers can never claim the same task"""
+        return Transaction(self.db)
+
+    def add_city(self, city, target, search_url):
+        """Register a city and seed its first search page. Safe to call again on a restart."""
+        with self.transaction() as db:
+            db.execute("INSERT OR IGNORE INTO cities (city, target, search_url) VALUES (?, ?, ?)",
+                       (city, target, search_url))
+            self.insert_task(db, 'search_page', city, with_page(search_url, 1), 1)
+
+    def insert_task(self, db, kind, city, url, page):
+        cursor = db.execute("INSERT OR IGNORE INTO tasks (kind, city, url, page, updated_at) VALUES (?, ?, ?, ?, ?)",
+                            (kind, city, url, page, time.time()))
+        return cursor.rowcount
+
+    def remaining_sql(self):
+        # backlog of a city = target minus what is already scraped
+        return """
+            SELECT c.city, c.target - (SELECT COUNT(*) FROM results r WHERE r.city = c.city) AS remaining
+            FROM cities c
+        """
+
+    def claim(self, worker_id):
+        """
+        Hand out the next task, taken from the city with the biggest remaining backlog. None if nothing is left.
+        Search pages go first inside a city: each one only unlocks the next page, so expanding them early
+        keeps enough property tasks around for everybody else.
+        """
+        now = time.time()
+        with self.transaction() as db:
+            # crashed workers: give their tasks back
+            db.execute("UPDATE tasks SET status = 'pending' WHERE status = 'running' AND updated_at < ?",
+                       (now - self.lease_seconds,))
+
+            row = db.execute(f"""
+                SELECT t.id, t.kind, t.city, t.url, t.page
+                FROM tasks t JOIN ({self.remaining_sql()}) b ON b.city = t.city
+                WHERE t.status = 'pending' AND b.remaining > 0
+                ORDER BY b.remaining DESC,
+                         CASE t.kind WHEN 'search_page' THEN 0 ELSE 1 END,
+                         t.page, t.id
+                LIMIT 1
+            """).fetchone()
+            if row is None:
+                return None
+
+            db.execute("UPDATE tasks SET status = 'running', worker = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                       (str(worker_id), now, row[0]))
+            return {'id': row[0], 'kind': row[1], 'city': row[2], 'url': row[3], 'page': row[4]}
+
+    def complete_search_page(self, task, property_urls, tile_urls=()):
+        """
+        Queue the properties found on a search page, and the next page if the city still needs more.
+        tile_urls (first page of an overflowing search) replace the next page: each gets its own page 1 task.
+        Property URLs are unique in the table, so listings that show up in two overlapping tiles are queued once.
+        """
+        with self.transaction() as db:
+            added = 0
+            for url in property_urls:
+                added += self.insert_task(db, 'property', task['city'], url, task['page'])
+
+            target = db.execute("SELECT target FROM cities WHERE city = ?", (task['city'],)).fetchone()[0]
+            queued = db.execute("SELECT COUNT(*) FROM tasks WHERE kind = 'property' AND city = ? AND status != 'failed'",
+                                (task['city'],)).fetchone()[0]
+            if tile_urls:
+                for tile_url in tile_urls:
+                    self.insert_task(db, 'search_page', task['city'], with_page(tile_url, 1), 1)
+            elif property_urls and task['page'] < MAX_PAGES and queued < target:
+                # task['url'] is this tile's search, the next page keeps its mapBounds
+                next_page = task['page'] + 1
+                self.insert_task(db, 'search_page', task['city'], with_page(task['url'], next_page), next_page)
+
+            self.mark(db, task, 'done')
+            return added
+
+    def complete_property(self, task, property_data):
+        with self.transaction() as db:
+            db.execute("INSERT OR REPLACE INTO results (url, city, data, scraped_at) VALUES (?, ?, ?, ?)",
+                       (task['url'], task['city'], json.dumps(property_data), property_data.get('scraped_at')))
+            self.mark(db, task, 'done')
+
+    def fail(self, task):
+        """Back to pending for another try (maybe by another worker), or failed for good after max_attempts"""
+        with self.transaction() as db:
+            attempts = db.execute("SELECT attempts FROM tasks WHERE id = ?", (task['id'],)).fetchone()[0]
+            self.mark(db, task, 'failed' if attempts >= self.max_attempts else 'pending')
+
+    def release(self, task):
+        """Back to pending without using up an attempt, for a task the worker never got to run"""
+        with self.transaction() as db:
+            db.execute("UPDATE tasks SET status = 'pending', worker = NULL, attempts = attempts - 1, updated_at = ? WHERE id = ?",
+                       (time.time(), task['id']))
+
+    def mark(self, db, task, status):
+        db.execute("UPDATE tasks SET status = ?, updated_at = ? WHERE id = ?", (status, time.time(), task['id']))
+
+    def has_unfinished_work(self):
+        """Pending or running tasks for a city that still needs properties (running ones may add more)"""
+        row = self.db.execute(f"""
+            SELECT COUNT(*) FROM tasks t JOIN ({self.remaining_sql()}) b ON b.city = t.city
+            WHERE t.status IN ('pending', 'running') AND b.remaining > 0
+        """).fetchone()
+        return row[0] > 0
+
+    def progress(self):
+        """{city: {'target', 'scraped', 'pending', 'failed'}}"""
+        progress = {}
+        for city, target in self.db.execute("SELECT city, target FROM cities"):
+            counts = dict(self.db.execute("SELECT status, COUNT(*) FROM tasks WHERE city = ? AND kind = 'property' GROUP BY status", (city,)))
+            scraped = self.db.execute("SELECT COUNT(*) FROM results WHERE city = ?", (city,)).fetchone()[0]
+            progress[city] = {'target': target, 'scraped': scraped,
+                              'pending': counts.get('pending', 0), 'failed': counts.get('failed', 0)}
+        return progress
+
+    def iter_results(self, city=None):
+        query = "SELECT data FROM results" + (" WHERE city = ?" if city else "")
+        for (data,) in self.db.execute(query, (city,) if city else ()):
+            yield json.loads(data)
+
+    def failed_urls(self):
+        """URLs of the tasks that ran out of attempts, search pages and properties"""
+        return [row[0] for row in self.db.execute("SELECT url FROM tasks WHERE status = 'failed' ORDER BY id")]
+
+    def cities(self):
+        return [row[0] for row in self.db.execute("SELECT city FROM cities")]
+
+
+class Transaction:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
@@ -0,0 +1,95 @@
+"""
+Map bounds tiling, to get past the 20 page pagination ceiling.
+
+Zillow never serves more than MAX_PAGES result pages per search (~820 listings), whatever the total says,
+so everything past that in a big county is simply never reached. Every city_queues URL already carries a
+mapBounds box in its searchQueryState: when a search reports more results than fit in MAX_PAGES pages, the
+box is cut into four quadrants (same URL, other mapBounds) and each quadrant is checked again, until every
+tile fits under the cap. The tiles are then crawled like any other search URL.
+
+Listings on a tile border can show up in two tiles, so callers de-duplicate by zpid (listings.listing_key).
+
+    plan_tiles(search_url, count_results)   # count_results(url) -> totalResultCount of that search
+    plan_tiles(search_url, count_results, total=...)   # total of search_url already read from its first page
+"""
+from search_urls import get_map_bounds, with_map_bounds
+from listings import listing_key
+
+MAX_PAGES = 20  # Zillow stops paginating after page 20
+RESULTS_PER_PAGE = 41
+TILE_CAPACITY = MAX_PAGES * RESULTS_PER_PAGE
+MIN_TILE_SPAN = 0.002  # degrees (~200 m), a box this small is not split anymore even if it still overflows
+
+
+def split_bounds(bounds):
+    """mapBounds -> its four quadrants"""
+    mid_lng = (bounds['west'] + bounds['east']) / 2
+    mid_lat = (bounds['south'] + bounds['north']) / 2
+    return [
+        {'west': bounds['west'], 'east': mid_lng, 'south': mid_lat, 'north': bounds['north']},
+        {'west': mid_lng, 'east': bounds['east'], 'south': mid_lat, 'north': bounds['north']},
+        {'west': bounds['west'], 'east': mid_lng, 'south': bounds['south'], 'north': mid_lat},
+        {'west': mid_lng, 'east': bounds['east'], 'south': bounds['south'], 'north': mid_lat},
+    ]
+
+
+def can_split(bounds):
+    return bool(bounds) and min(bounds['east'] - bounds['west'], bounds['north'] - bounds['south']) > MIN_TILE_SPAN
+
+
+def needs_split(bounds, total, capacity=TILE_CAPACITY):
+    """More results than the capped pages can show, and a box big enough to cut"""
+    return total is not None and total > capacity and can_split(bounds)
+
+
+def quadrant_urls(search_url):
+    """The same search restricted to each quadrant of its mapBounds ([] when the URL has no bounds)"""
+    bounds = get_map_bounds(search_url)
+    if not bounds:
+        return []
+    return [with_map_bounds(search_url, quadrant) for quadrant in split_bounds(bounds)]
+
+
+def overflow_tiles(search_url, total, capacity=TILE_CAPACITY):
+    """Quadrant URLs when this search overflows the cap, [] when it fits (one level, for the task store)"""
+    if needs_split(get_map_bounds(search_url), total, capacity):
+        return quadrant_urls(search_url)
+    return []
+
+
+def plan_tiles(search_url, count_results, capacity=TILE_CAPACITY, total=None):
+    """
+    [(tile_url, total), ...] covering the search, every tile under capacity. Empty tiles are dropped.
+    A tile whose count can not be read (count_results returned None) is kept as it is.
+    total: the count of search_url when the caller already has it, count_results is then only called for quadrants.
+    """
+    if total is None:
+        total = count_results(search_url)
+    if not needs_split(get_map_bounds(search_url), total, capacity):
+        return [(search_url, total)] if total != 0 else []
+    print(f"  🔀 {total} results > {capacity}, splitting into quadrants")
+    tiles = []
+    for tile_url in quadrant_urls(search_url):
+        tiles.extend(plan_tiles(tile_url, count_results, capacity))
+    return tiles
+
+
+def new_links(links, seen_keys):
+    """Links not seen in an earlier (overlapping) tile, seen_keys is updated with their zpids"""
+    fresh = []
+    for url in links:
+        key = listing_key(url)
+        if key not in seen_keys:
+            seen_keys.add(key)
+            fresh.append(url)
+    return fresh
+
+
+def tile_position(tile_index, page):
+    """(tile, page) as one increasing number for the crawl state's last_page (tile 0 keeps the plain page numbers)"""
+    return tile_index * MAX_PAGES + page
+
+
+def split_position(position):
+    """Inverse of tile_position -> (tile_index, page)"""
+    return (position - 1) // MAX_PAGES, (position - 1) % MAX_PAGES + 1
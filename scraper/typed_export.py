@@ -0,0 +1,148 @@
+"""
+Typed columnar export (Parquet or Arrow IPC), partitioned by queue and county.
+
+The CSV is all display strings ("$1,234", "3/100", "0.31 Acres", "Minor (3/10)", "N/A"). Here every column
+has a real type: numbers for price/sqft/lot (normalized to sqft), integer scores, categorical risk levels and
+list columns for features, nearby cities and the price history. Loading every queue for modelling is then
+one read:
+
+    import pyarrow.dataset as ds
+    df = ds.dataset("data/typed", format="parquet", partitioning="hive").to_table().to_pandas()
+
+Run directly to (re)build it from an existing output tree:
+
+    python typed_export.py data --output data/typed [--format arrow]
+"""
+import os
+import re
+import json
+import glob
+import argparse
+import pyarrow as pa
+import pyarrow.dataset as ds
+from normalize import normalize_frame, HISTORY_EVENT
+from jsonl_sink import iter_records
+
+CATEGORY = pa.dictionary(pa.int8(), pa.string())
+ORDERED_CATEGORY = pa.dictionary(pa.int8(), pa.string(), ordered=True)  # risk levels, Minimal < ... < Severe
+
+SCHEMA = pa.schema(
+    [
+        ('zpid', pa.int64()),
+        ('url', pa.string()),
+        ('scraped_at', pa.timestamp('us')),
+        ('image_url', pa.string()),
+
+        ('price', pa.int64()),
+        ('beds', pa.int16()),
+        ('baths', pa.float32()),
+        ('sqft', pa.int32()),
+        ('lot_sqft', pa.float64()),
+        ('address', pa.string()),
+        ('estimated_monthly_payment', pa.int32()),
+        ('property_type', CATEGORY),
+        ('price_per_sqft', pa.int32()),
+        ('year_built', pa.int16()),
+        ('region', pa.string()),
+        ('latitude', pa.float64()),
+        ('longitude', pa.float64()),
+
+        ('interior_features', pa.list_(pa.string())),
+        ('other_rooms', pa.list_(pa.string())),
+        ('appliances', pa.list_(pa.string())),
+        ('utilities_electric', pa.string()),
+        ('utilities_sewer', pa.string()),
+        ('utilities_water', pa.string()),
+        ('parking_total_spaces', pa.int16()),
+        ('parking_garage_spaces', pa.int16()),
+        ('parking_features', pa.string()),
+
+        ('walk_score', pa.int8()),
+        ('bike_score', pa.int8()),
+        ('transit_score', pa.int8()),
+
+        ('nearby_cities', pa.list_(pa.string())),
+        ('property_history', pa.list_(HISTORY_EVENT)),
+    ]
+    + [field for school in ['elementary_school', 'middle_school', 'high_school']
+       for field in [(f'{school}_name', pa.string()), (f'{school}_distance_mi', pa.float32())]]
+    + [field for risk in ['flood', 'fire', 'wind', 'air', 'heat']
+       for field in [(f'{risk}_risk_level', ORDERED_CATEGORY), (f'{risk}_risk_score', pa.int8())]]
+)
+
+FORMATS = {'parquet': 'parquet', 'arrow': 'ipc'}
+
+
+def to_table(records):
+    """Raw property_data dicts -> typed Arrow table, every column built by normalize_frame"""
+    records = [record for record in records if isinstance(record, dict)]
+    if not records:
+        return SCHEMA.empty_table()  # an empty or failed city
+    frame = normalize_frame(records)
+    # no pandas metadata: it names ArrowDtypes (list<item: string>[pyarrow]) that to_pandas() can not rebuild
+    return pa.Table.from_pandas(frame[SCHEMA.names], schema=SCHEMA, preserve_index=False).replace_schema_metadata(None)
+
+
+def write_typed_dataset(records, root, queue, county, fmt='parquet'):
+    """
+    Write one city into the hive partitioned dataset at root/queue=<id>/county=<name>/.
+    Re-exporting a city replaces its partition instead of appending duplicates.
+    """
+    table = to_table(records)
+    if table.num_rows == 0:
+        return 0
+    table = table.append_column('queue', pa.array([int(queue)] * table.num_rows, pa.int16()))
+    table = table.append_column('county', pa.array([county] * table.num_rows, pa.string()))
+
+    ds.write_dataset(
+        table, root,
+        format=FORMATS[fmt],
+        partitioning=ds.partitioning(pa.schema([('queue', pa.int16()), ('county', pa.string())]), flavor='hive'),
+        existing_data_behavior='delete_matching',
+        basename_template='part-{i}.' + ('parquet' if fmt == 'parquet' else 'arrow'),
+    )
+    print(f"🧱 Typed {fmt} export: {table.num_rows} rows -> {root}/queue={queue}/county={county}")
+    return table.num_rows
+
+
+def load_typed_dataset(root, fmt='parquet'):
+    """All queues and counties as one pandas DataFrame"""
+    return ds.dataset(root, format=FORMATS[fmt], partitioning='hive').to_table().to_pandas()
+
+
+def latest_city_output(city_dir):
+    """Newest full output of a city directory: the .jsonl log if there is one, else the .json export"""
+    candidates = [path for path in glob.glob(os.path.join(city_dir, 'zillow_q*'))
+                  if path.endswith(('.jsonl', '.json'))]
+    if not candidates:
+        return None
+    candidates.sort(key=lambda path: (os.path.getmtime(path), path.endswith('.jsonl')))
+    return candidates[-1]
+
+
+def read_records(path):
+    if path.endswith('.jsonl'):
+        return list(iter_records(path))
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the typed columnar dataset from a scraper output tree")
+    parser.add_argument('data_dir', help="output tree with queue_<id>/<city>/ folders")
+    parser.add_argument('--output', default=None, help="dataset root (default: <data_dir>/typed)")
+    parser.add_argument('--format', choices=list(FORMATS), default='parquet')
+    args = parser.parse_args()
+
+    root = args.output or os.path.join(args.data_dir, 'typed')
+    total = 0
+    for queue_dir in sorted(glob.glob(os.path.join(args.data_dir, 'queue_*'))):
+        match = re.search(r'queue_(\d+)$', queue_dir)
+        if not match or not os.path.isdir(queue_dir):
+            continue
+        for city_dir in sorted(glob.glob(os.path.join(queue_dir, '*'))):
+            path = latest_city_output(city_dir) if os.path.isdir(city_dir) else None
+            if path:
+                total += write_typed_dataset(read_records(path), root, match.group(1), os.path.basename(city_dir), args.format)
+
+    print(f"Done: {total} rows in {root}")
@@ -1,5 +1,8 @@
 import time
 import json
+import copy
+import itertools
+from contextlib import closing
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -11,11 +14,33 @@ from selenium.webdriver.common.action_chains import ActionChains
 import pandas as pd
 from datetime import datetime
 import random
-import re
 import os
 import undetected_chromedriver as uc
 from webdriver_manager.chrome import ChromeDriverManager
 import glob
+from property_record import FIELD_GROUPS, new_property_record, missing_fields, fill_missing
+from embedded_data import extract_embedded_property
+from search_urls import with_page
+from jsonl_sink import JsonlSink, iter_records, export_json, export_csv
+from html_extractor import ZillowHtmlExtractor
+from page_script import run_page_script, apply_page_payload
+from pacing import get_pacer
+from instrumentation import timings
+from network_events import enable_network_events, read_network_events
+from response_capture import apply_captured_responses
+from tab_prefetch import TabPrefetcher
+from search_cards import harvest_search_cards
+from listings import listing_records, search_result_count
+from tiling import MAX_PAGES, plan_tiles, new_links, tile_position, split_position
+from readiness import wait_for_property_page, wait_for_embedded_data, wait_for_section_text, wait_for_quiet, has_section_text
+from page_patterns import (
+    RISK_TYPES, is_valid_zillow_image_url, find_image_url_in_source, is_price_text,
+    parse_bed_bath_sqft_facts, basic_facts_complete, parse_fallback_facts, parse_facts_from_source_json,
+    is_address_text, parse_page_facts, parse_features, parse_monthly_payment,
+    scores_complete, parse_scores_container, parse_scores_from_source, parse_score_element_text,
+    parse_schools, parse_risk_container, parse_price_history,
+    parse_region, parse_region_container, clean_nearby_city_links, parse_nearby_cities_from_source, release_fold
+)
 
 # Using multiple user agents on a randomized way
 USER_AGENTS = [
@@ -29,12 +54,47 @@ USER_AGENTS = [
 # Main class for Scraper :)   ~Vraj
 
 class MultiPropertyZillowScraper:
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, extraction_mode='live', crawl_state=None, crawl_mode='full', page_cache=None,
+                 cache_mode='record', driver=None, resource_blocker=None,
+                 response_capture=None, prefetch_depth=0, browser_lifecycle=None):
         self.all_properties_data = []
         self.scraped_urls = set() # just to keep a track of scraped urls in a set to avoid duplicates
         self.last_scraped_url = None  # Track last scraped URL to avoid duplicates
         self.archived_data = []
-        self.setup_driver(headless)        
+        self.page_snapshot = None  # HTML of the current property page, shared by every extractor
+        self.scrolled_depth = 0  # deepest scroll position (fraction of page height) reached on the current page
+        # 'live' reads every field through the driver, 'offline' only loads the page and parses the HTML with lxml,
+        # 'structured' maps the embedded property JSON and uses the live extractors only as fallbacks,
+        # 'script' reads the whole page in one in-browser script call (page_script.py), same fallbacks
+        self.extraction_mode = extraction_mode
+        self.html_extractor = ZillowHtmlExtractor()
+        self.crawl_state = crawl_state  # optional CrawlState, makes a city resumable after a crash
+        # 'full' opens every property page, 'listing' only keeps what the search pages show (see listings.py)
+        self.crawl_mode = crawl_mode
+        self.sink = None  # optional JsonlSink, see start_streaming
+        self.search_cards = {}  # url -> card level facts (price, beds, address...) from the search result pages
+        # optional PageCache: 'record' keeps every loaded page, 'replay' also extracts cached property pages
+        # with the lxml engine instead of opening them (misses still go to the browser and get recorded)
+        self.page_cache = page_cache
+        self.cache_mode = cache_mode
+        self.pacer = get_pacer()  # shared adaptive pacing for zillow.com, see pacing.py
+        # optional ResourceBlocker: property tabs skip photos, fonts, maps and trackers (see resource_blocking.py)
+        self.resource_blocker = resource_blocker
+        # optional ResponseCapture: the JSON bodies of the page's own data calls fill fields before any scrolling
+        self.response_capture = response_capture
+        self.captured_responses = []  # bodies captured on the current property page
+        self.page_tab = None  # window handle of the property page being extracted
+        self.tab_traffic = {}  # window handle -> Network.* events of its page and whether it loads unblocked
+        # pipelined mode: this many property pages load in other tabs while one is extracted (see tab_prefetch.py)
+        self.prefetch_depth = prefetch_depth
+        # optional BrowserLifecycle: recycles the browser after N pages or above a memory ceiling (browser_lifecycle.py)
+        self.browser_lifecycle = browser_lifecycle
+        self.browser_generation = 0  # +1 per browser restart, so a suspended search page walk knows its tab is gone
+        self.headless = headless
+        if driver is not None:
+            self.driver = driver  # an already running (or stand-in) driver, e.g. benchmark.py's FixtureDriver
+        else:
+            self.setup_driver(headless)
            
     def setup_driver(self, headless):
         try:
@@ -59,6 +119,8 @@ class MultiPropertyZillowScraper:
             options.add_argument(f'--user-agent={random.choice(USER_AGENTS)}')
             options.add_argument("--no-sandbox")
             options.add_argument("--disable-dev-shm-usage")
+            if self.resource_blocker or self.response_capture:
+                enable_network_events(options)  # bytes per page and captured responses come from the performance log
 
             self.driver = uc.Chrome(options=options, version_main=None)
             
@@ -69,9 +131,14 @@ class MultiPropertyZillowScraper:
             
             options.add_argument("--no-sandbox")
             options.add_argument("--disable-dev-shm-usage")
+            if self.resource_blocker or self.response_capture:
+                enable_network_events(options)
             
             service = Service(ChromeDriverManager().install())
             self.driver = webdriver.Chrome(service=service, options=options)
+        timings.instrument_driver(self.driver)  # no-op unless TIMINGS is set
+        if self.browser_lifecycle:
+            self.browser_lifecycle.watch(self.driver)
 
     def check_driver_health(self):
         """A simple check to see if the driver is still responsive."""
@@ -84,7 +151,71 @@ class MultiPropertyZillowScraper:
             # This will catch errors if the browser has crashed or closed.
             return False
         
-    def scrape_multiple_properties(self, search_url, max_properties=50):
+    def take_page_snapshot(self):
+        """Pull the whole page HTML once over the wire and keep it for all extractors"""
+        self.page_snapshot = self.driver.page_source
+        return self.page_snapshot
+
+    def get_page_source(self):
+        """Return the shared page snapshot, only asking the driver again when the DOM has changed"""
+        if self.page_snapshot is None:
+            return self.take_page_snapshot()
+        return self.page_snapshot
+
+    def recycle_browser_if_needed(self):
+        """Replace the browser when the lifecycle manager says it is worn out. Call it between two search pages."""
+        reason = self.browser_lifecycle.recycle_reason() if self.browser_lifecycle else None
+        if not reason:
+            return False
+        print(f"♻️ Recycling the browser after {reason}, scraped URLs and progress are kept")
+        self.restart_browser(reason)
+        return True
+
+    def restart_browser(self, reason='restart'):
+        """Quit the browser (and whatever of its process tree survives that), start a fresh one"""
+        processes = self.browser_lifecycle.retire(reason) if self.browser_lifecycle else []
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"  - Browser quit warning: {e}")
+        if processes:
+            leftovers = self.browser_lifecycle.kill_leftovers(processes)
+            if leftovers:
+                print(f"  - Terminated {leftovers} Chrome processes that outlived quit()")
+        self.setup_driver(self.headless)
+        self.browser_generation += 1
+        self.tab_traffic = {}
+        self.page_tab = None
+        self.invalidate_page_snapshot()
+
+    def invalidate_page_snapshot(self):
+        """Call this whenever an extractor changes the DOM (clicks, lazy loaded sections)"""
+        self.page_snapshot = None
+        release_fold()
+
+    def scroll_page(self, fraction):
+        """
+        Scroll to a fraction of the page height. Zillow lazy loads sections as we go down, so the
+        snapshot is only stale when we reach further down than we have been before on this page.
+        """
+        self.driver.execute_script(f"window.scrollTo(0, document.body.scrollHeight * {fraction});")
+        if fraction > self.scrolled_depth:
+            self.scrolled_depth = fraction
+            self.invalidate_page_snapshot()
+
+    def reveal_section(self, fraction, texts, timeout=3):
+        """
+        Make sure a lazy loaded section (found by its heading texts) is in the DOM. Already there -> no scroll
+        and no wait at all; otherwise scroll to it and return as soon as it renders, timeout as the fallback.
+        """
+        if has_section_text(self.driver, texts):
+            return True
+        self.scroll_page(fraction)
+        found = wait_for_section_text(self.driver, texts, timeout)
+        self.invalidate_page_snapshot()
+        return found
+
+    def scrape_multiple_properties(self, search_url, max_properties=50, city=None):
         """Switched to a tab-based model for faster, more stable scraping."""
         """Initially the method was to click on each element and scrape from that property. But the website is structured in a way that 
             if you click it and it fails once, the loaded content (properties on the main page) changes. So we have no way to track all of them.
@@ -95,129 +226,388 @@ class MultiPropertyZillowScraper:
             One of the major reason to use the new tab technique was to not to disturb the website's main page loaded content.
         """
         print(f"Starting to scrape {max_properties} properties from search results...")
-        
-        self.driver.get(search_url)
-        time.sleep(random.uniform(3.5, 5.5)) # trying to keep more time delay
+        city = city or search_url
+        timings.set_context(city=city)
         
         # few variables to track the progress
         properties_scraped = 0
-        current_page = 1
         consecutive_failures = 0
+        start_position = 1
+        pages = None
         
-        # the mian while loop that will run for each page.
-        while properties_scraped < max_properties:
-            print(f"\n=== PROCESSING PAGE {current_page} ===")
-            
-            try:
-                # Wait for the main property list to be ready
-                WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.XPATH, '/html/body/div[1]/div/div[2]/div/div/div[1]/div[1]/ul'))
-                )
-                print("--------------------Search results loaded----------------------")
-            except:
-                print("Likely Bot Detection. Search results failed to load. Stopping.")
-                break
-            
-            # Scroll to ensure all list items are in the DOM
-            print("Loading all properties on page...")
-            self.scroll_to_load_all_properties()
-            time.sleep(random.uniform(2,4))
-
-            # Get the count and collect all property URLs from the page first
-            property_count = self.get_property_count()
-            all_links_on_page = self.get_all_links(property_count)
-            print(f"Found {property_count} list items. Collected {len(all_links_on_page)} unique property links to process.")
-
-            # just to test all the links
-            # for i in all_links_on_page:
-            #     print(i)
-
-            #Get the handle of our main "home base" tab
-            original_window = self.driver.current_window_handle
+        if self.crawl_state:
+            # Resume: reload what was scraped before the restart, finish the links that were still pending
+            # and then continue from the last search page we had reached
+            for previous_property in self.crawl_state.done_properties(city):
+                self.record_property(previous_property)
+                properties_scraped += 1
+            if properties_scraped:
+                self.scraped_urls.update(self.crawl_state.done_urls(city))
+                print(f"♻️ Resuming {city}: {properties_scraped} properties already scraped")
+            
+            start_position = self.crawl_state.last_page(city)
+            pending_urls = self.crawl_state.pending_urls(city)
+        
+        if properties_scraped >= max_properties:
+            print(f"Reached target of {max_properties} properties.")
+            return self.all_properties_data
+        
+        self.recycle_browser_if_needed()  # cheapest moment, nothing is open yet
+        
+        # big counties have more results than 20 pages can show, so the search is cut into map tiles that each fit
+        if self.crawl_state and pending_urls and self.crawl_mode != 'listing':
+            # listing mode needs the search page itself, reloading start_position brings its pending links back anyway
+            pages = itertools.chain([(start_position, pending_urls)], self.iterate_city_pages(search_url, city, start_position))
+        
+        # the mian loop that will run for each page (current_page counts on across the tiles)
+        for current_page, all_links_on_page in pages or self.iterate_city_pages(search_url, city, start_position):
+            if self.crawl_state:
+                self.crawl_state.record_discovered(city, all_links_on_page, current_page)
+            consecutive_failures = 0
 
-            #  Loop through the collected links
-            for i, property_url in enumerate(all_links_on_page):
-                
-                # Stop if we've reached our target
+            if self.crawl_mode == 'listing':
+                properties_scraped += self.record_listing_page(all_links_on_page, city, max_properties - properties_scraped)
+                print(f"  📋 Page {current_page}: {properties_scraped} listings so far")
                 if properties_scraped >= max_properties:
                     print(f"Reached target of {max_properties} properties.")
                     break
-                
-                print(f"\n--> Processing link {i + 1} / {len(all_links_on_page)} (Total Scraped So Far: {properties_scraped})")
-                
-                #Efficiency check: skip if we have already scraped this URL from a previous page
+                self.recycle_browser_if_needed()
+                continue
+
+            #  Loop through the collected links, skipping what an earlier page (or run) already did
+            property_urls = []
+            for property_url in all_links_on_page:
                 if property_url in self.scraped_urls:
                     print(f"  - Skipping duplicate URL found on a previous page: {property_url}")
-                    continue
-
-                try:
-                    # Open a new tab
-                    time.sleep(random.uniform(3,6)) # Wait for the new page to load
-                    self.driver.switch_to.new_window('tab')
-                    
-                    # Navigate to the property URL in the new tab
-                    self.driver.get(property_url)
-                    time.sleep(1)
-
-                    # Scrape all the data from the new tab -> Main function that scrapes data
-                    property_data = self.extract_complete_property_data()
+                elif self.crawl_state and self.crawl_state.should_skip(property_url):
+                    print(f"  - Skipping URL already done (or failed too often) before the restart: {property_url}")
+                else:
+                    property_urls.append(property_url)
 
-                    if property_data:
-                        self.all_properties_data.append(property_data)
+            # Scrape all the data in a new tab -> Main function that scrapes data (closing() shuts prefetched tabs
+            # down when we stop early)
+            with closing(self.scrape_properties(property_urls)) as results:
+                for property_url, property_data, error in results:
+                    if error:
+                        print(f"  ❌ An error occurred while scraping {property_url}: {error}")
+                        if self.crawl_state:
+                            self.crawl_state.mark_failed(property_url, city)
+                        consecutive_failures += 1
+                        if consecutive_failures >= 5:
+                            print(" Too many consecutive failures. Stopping scrape.")
+                            # This break will exit the for loop
+                            break
+                    elif property_data:
+                        self.record_property(property_data)
                         self.scraped_urls.add(property_url) # Add to our set of scraped URLs
+                        if self.crawl_state:
+                            self.crawl_state.mark_done(property_url, city, property_data)
                         properties_scraped += 1
                         consecutive_failures = 0
                         print(f"  ✅ Successfully scraped property {properties_scraped}")
                         
-                        # Save a checkpoint every 5 properties
-                        if properties_scraped % 10 == 0:
+                        # Save a checkpoint every 5 properties (when streaming, the JSON Lines log already is one)
+                        if properties_scraped % 10 == 0 and not self.sink:
                             self.save_progress_checkpoint("current_scrape", properties_scraped)
-                
-                except Exception as e:
-                    print(f"  ❌ An error occurred while scraping {property_url}: {e}")
-                    consecutive_failures += 1
-                    if consecutive_failures >= 5:
-                        print(" Too many consecutive failures. Stopping scrape.")
-                        # This break will exit the for loop
-                        break 
-                
-                finally:
-                    # It ensures we always clean up our tabs.
-                    # Close the current (property) tab
-                    self.driver.close()
-                    
-                    # Switch focus back to the original "home base" tab
-                    self.driver.switch_to.window(original_window)
-                    
-                    # A brief pause to ensure stability
-                    time.sleep(random.uniform(0.5, 1.5))
+                    elif self.crawl_state:
+                        self.crawl_state.mark_failed(property_url, city)
+
+                    # Stop if we've reached our target
+                    if properties_scraped >= max_properties:
+                        print(f"Reached target of {max_properties} properties.")
+                        break
             
             # Check if we need to stop due to reaching the max properties or too many failures
             if properties_scraped >= max_properties or consecutive_failures >= 5:
                 break
             
+            # a worn out browser is replaced here, between two search pages: the next one is then opened by URL
+            self.recycle_browser_if_needed()
+        
+        print(f"\n Scraping completed! Total properties successfully scraped: {properties_scraped}")
+        return self.all_properties_data
+
+    def record_listing_page(self, links, city, limit):
+        """Listing mode: records for a whole search page straight from its payload/cards, no detail tabs"""
+        links = [url for url in links
+                 if url not in self.scraped_urls and not (self.crawl_state and self.crawl_state.should_skip(url))][:limit]
+        if not links:
+            return 0
+        for url, property_data in zip(links, listing_records(links, self.driver.page_source, self.search_cards)):
+            self.record_property(property_data)
+            self.scraped_urls.add(url)
+            if self.crawl_state:
+                self.crawl_state.mark_done(url, city, property_data)
+        return len(links)
+
+    def count_search_results(self, search_url):
+        """Load a search page and read its totalResultCount (None if the page does not have it)"""
+        self.pacer.wait()
+        started = time.monotonic()
+        self.driver.get(search_url)
+        if not wait_for_embedded_data(self.driver):
+            self.pacer.record_failure()
+            return None
+        self.pacer.record_success(time.monotonic() - started)
+        return search_result_count(self.driver.page_source)
+
+    def plan_city_tiles(self, search_url, city, total=None):
+        """
+        Tile URLs of a city, planned once and kept in the crawl state so a restart walks the same tiles.
+        total is the result count of the search's first page when the caller has already loaded it.
+        """
+        if self.crawl_state:
+            saved = self.crawl_state.tiles(city)
+            if saved:
+                return saved
+        tile_urls = [tile_url for tile_url, _ in plan_tiles(search_url, self.count_search_results, total=total)]
+        if len(tile_urls) > 1:
+            print(f"🗺️ {city}: split into {len(tile_urls)} map tiles")
+        if self.crawl_state:
+            self.crawl_state.save_tiles(city, tile_urls)
+        return tile_urls
+
+    def iterate_city_pages(self, search_url, city, start_position=1):
+        """
+        (position, links) of every search page of a city, see iterate_tiles. A city without saved tiles starts on
+        its plain search: the first page carries the result count, so only a search that overflows the 20 page cap
+        costs the extra loads of planning tiles, and its first page is then walked again inside the tiles.
+        """
+        saved = self.crawl_state.tiles(city) if self.crawl_state else None
+        if saved or start_position > 1:
+            yield from self.iterate_tiles(saved or self.plan_city_tiles(search_url, city), start_position)
+            return
+        seen_keys = set()
+        for page, links in self.iterate_search_pages(search_url):
+            if page == 1:
+                total = search_result_count(self.driver.page_source)
+                tile_urls = self.plan_city_tiles(search_url, city, total) if total is not None else [search_url]
+                if tile_urls != [search_url]:
+                    # overflowing (or empty): the tiles cover this first page again
+                    yield from self.iterate_tiles(tile_urls)
+                    return
+                if self.crawl_state and total is None:
+                    self.crawl_state.save_tiles(city, tile_urls)
+            yield page, new_links(links, seen_keys)
+
+    def iterate_tiles(self, tile_urls, start_position=1):
+        """
+        iterate_search_pages over every tile, yields (position, links) where position = tile_position(tile, page).
+        Listings already seen in an earlier tile (tile borders overlap) are left out.
+        """
+        start_tile, start_page = split_position(start_position)
+        seen_keys = set()
+        for tile_index, tile_url in enumerate(tile_urls):
+            if tile_index < start_tile:
+                continue
+            if len(tile_urls) > 1:
+                print(f"\n🗺️ Tile {tile_index + 1}/{len(tile_urls)}")
+            first_page = start_page if tile_index == start_tile else 1
+            for page, links in self.iterate_search_pages(tile_url, first_page):
+                yield tile_position(tile_index, page), new_links(links, seen_keys)
+
+    def iterate_search_pages(self, search_url, start_page=1):
+        """
+        Walks the search result pages and yields (page number, homedetails links) for each one.
+        The search page stays open in the current tab, so the caller can scrape the links in other tabs
+        before asking for the next page. start_page > 1 jumps straight to that page (used when resuming).
+        """
+        self.pacer.wait()
+        self.driver.get(with_page(search_url, start_page) if start_page > 1 else search_url)
+        self.pacer.pause(0.25)
+        
+        current_page = start_page
+        while True:
+            print(f"\n=== PROCESSING PAGE {current_page} ===")
+            
+            with timings.span('search', 'read_search_results'):
+                all_links_on_page = self.read_search_results()
+            if all_links_on_page is None:
+                return
+
+            search_window = self.driver.current_window_handle
+            browser_generation = self.browser_generation
+            yield current_page, all_links_on_page
+            
             # After processing all links on this page, go to the next page
             print("\nFinished all links on this page. Attempting to navigate to the next page...")
-            time.sleep(5)
             try:
-                if current_page >= 20:
-                    print(f"⚠️ Reached Zillow's maximum page limit (20). Stopping pagination.")
-                    break
-                elif self.go_to_next_page():
+                if current_page >= MAX_PAGES:
+                    print(f"⚠️ Reached Zillow's maximum page limit ({MAX_PAGES}). Stopping pagination.")
+                    return
+                if self.browser_generation != browser_generation:
+                    # the browser was recycled meanwhile, its search tab is gone: open the next page by URL
+                    current_page += 1
+                    self.pacer.wait()
+                    self.driver.get(with_page(search_url, current_page))
+                    self.pacer.pause(0.25)
+                    continue
+                self.driver.switch_to.window(search_window)
+                self.pacer.wait()
+                with timings.span('search', 'go_to_next_page'):
+                    moved = self.go_to_next_page()
+                if moved:
                     current_page += 1
-                    consecutive_failures = 0
-                    time.sleep(random.uniform(2.5, 3.5))
                 else:
                     print("❌ No more pages available. End of results.")
-                    break
+                    return
             except Exception as e:
                 print(f"❌ Page navigation failed: {e}")
-                break
+                return
+
+    def read_search_results(self):
+        """Wait for the result list of the loaded search page, lazy load it and collect the links. None on bot detection."""
+        started = time.monotonic()
+        try:
+            # Wait for the main property list to be ready
+            WebDriverWait(self.driver, 15).until(
+                EC.presence_of_element_located((By.XPATH, '/html/body/div[1]/div/div[2]/div/div/div[1]/div[1]/ul'))
+            )
+            print("--------------------Search results loaded----------------------")
+            self.pacer.record_success(time.monotonic() - started)
+            if self.browser_lifecycle:
+                self.browser_lifecycle.page_done()
+        except:
+            print("Likely Bot Detection. Search results failed to load. Stopping.")
+            self.pacer.record_block()
+            return None
         
-        print(f"\n Scraping completed! Total properties successfully scraped: {properties_scraped}")
-        return self.all_properties_data
+        # Scroll to ensure all list items are in the DOM
+        print("Loading all properties on page...")
+        self.scroll_to_load_all_properties()
+        self.pacer.pause(0.25)
+
+        # Get the count and collect all property URLs from the page first
+        property_count = self.get_property_count()
+        all_links_on_page = self.get_all_links(property_count)
+        print(f"Found {property_count} list items. Collected {len(all_links_on_page)} unique property links to process.")
+        if self.page_cache:
+            self.page_cache.put(self.driver.current_url, self.driver.page_source)
+        return all_links_on_page
+
+    def collect_page_links(self, page_url):
+        """Load one search result page directly by URL (page number is in the searchQueryState) and return its links"""
+        self.pacer.wait()
+        self.driver.get(page_url)
+        return self.read_search_results()
+
+    def scrape_properties(self, property_urls):
+        """(url, property_data, error) for every URL: one tab after the other, or pipelined through a TabPrefetcher"""
+        if self.prefetch_depth:
+            yield from TabPrefetcher(self, depth=self.prefetch_depth).scrape(property_urls)
+            return
+        for i, property_url in enumerate(property_urls):
+            print(f"\n--> Processing link {i + 1} / {len(property_urls)}")
+            try:
+                result = (property_url, self.scrape_property_in_new_tab(property_url), None)
+            except Exception as e:
+                result = (property_url, None, e)
+            yield result
+
+    def replay_cached_page(self, property_url):
+        """Replay mode: the cached page through the lxml engine, None when it has to be loaded"""
+        if self.page_cache and self.cache_mode == 'replay':
+            cached = self.page_cache.get_entry(property_url)
+            if cached:
+                fetched_at, cached_html = cached
+                print(f"  ♻️ Replaying cached page: {property_url}")
+                # scraped_at is when the page was fetched, same as page_cache.replay, so the newest record still wins
+                return self.html_extractor.extract(cached_html, url=property_url,
+                                                   scraped_at=datetime.fromtimestamp(fetched_at).isoformat())
+        return None
+
+    def scrape_property_in_new_tab(self, property_url):
+        """Open the property in a new tab, extract everything, and always close the tab and switch back"""
+        with timings.property(property_url):  # one JSON line of timings per property (TIMINGS)
+            cached_data = self.replay_cached_page(property_url)
+            if cached_data:
+                return cached_data
+
+            original_window = self.driver.current_window_handle
+            self.pacer.wait()
+            try:
+                self.driver.switch_to.new_window('tab')
+                self.page_tab = self.start_page_traffic()
+            
+                # Navigate to the property URL in the new tab, the load time is the pacer's health signal
+                started = time.monotonic()
+                self.driver.get(property_url)
+                wait_for_property_page(self.driver)
+                return self.extract_loaded_property(property_url, time.monotonic() - started)
+            except Exception:
+                self.pacer.record_failure()
+                raise
+            finally:
+                # It ensures we always clean up our tabs.
+                self.driver.close()
+                self.driver.switch_to.window(original_window)
+
+    def extract_loaded_property(self, property_url, latency):
+        """Extract the property page in the current tab and tell the pacer how it went"""
+        property_data = self.extract_complete_property_data()
+        if self.browser_lifecycle:
+            self.browser_lifecycle.page_done()
+        if self.page_cache and property_data:
+            self.page_cache.put(property_url, self.get_page_source())
+        self.finish_page_traffic(property_url)
+        if not property_data:
+            self.pacer.record_failure()
+        elif len(missing_fields(property_data, 'basic_info')) == len(FIELD_GROUPS['basic_info']):
+            # not a single fact on the page: that is the captcha wall, not a listing
+            self.pacer.record_block()
+        else:
+            self.pacer.record_success(latency)
+        return property_data
+
+    def start_page_traffic(self, tab=None):
+        """
+        A property page is about to load in the current tab: forget the tab's earlier events, set up capture and
+        the block list (both are per tab). Returns the tab's handle (None when nothing listens to the network).
+        """
+        if not (self.resource_blocker or self.response_capture):
+            return tab
+        tab = tab or self.driver.current_window_handle
+        self.collect_network_events()  # whatever is logged so far belongs to the pages before
+        self.tab_traffic[tab] = {'events': [], 'sampled': False}
+        if self.response_capture:
+            self.response_capture.enable(self.driver)
+        if self.resource_blocker:
+            self.tab_traffic[tab]['sampled'] = self.resource_blocker.apply(self.driver)
+        return tab
+
+    def collect_network_events(self):
+        """Network events of the current page so far (the performance log is drained on every call, so the
+        events of the other tabs are filed under their own page)"""
+        if not (self.resource_blocker or self.response_capture):
+            return []
+        for event in read_network_events(self.driver):
+            tab = event['webview'] if event['webview'] in self.tab_traffic else self.page_tab
+            if tab in self.tab_traffic:
+                self.tab_traffic[tab]['events'].append(event)
+        return self.tab_traffic.get(self.page_tab, {}).get('events', [])
+
+    def finish_page_traffic(self, property_url):
+        if not self.resource_blocker:
+            self.tab_traffic.pop(self.page_tab, None)
+            return
+        events = self.collect_network_events()
+        sampled = self.tab_traffic.pop(self.page_tab, {}).get('sampled', False)
+        traffic = self.resource_blocker.record_page(property_url, events, sampled)
+        timings.count('network_bytes', traffic['bytes'])
+        timings.count('blocked_requests', traffic['blocked'])
 
     def get_all_links(self, property_count):
+        """All homedetails links of the loaded search page, harvested in one JS round trip (card facts kept in search_cards)"""
+        cards = harvest_search_cards(self.driver)
+        if cards:
+            for card in cards:
+                self.search_cards[card['url']] = card
+            return [card['url'] for card in cards]
+        
+        print("  - Falling back to card by card link collection")
+        return self.get_links_one_by_one(property_count)
+
+    def get_links_one_by_one(self, property_count):
         print("We are now inside the get_all_links function.")
         all_property_links = []
 
@@ -264,7 +654,7 @@ class MultiPropertyZillowScraper:
             for i in range(5):  # 5 scroll steps
                 scroll_position = (i + 1) * 800  # Scroll 800px each time
                 self.driver.execute_script(f"window.scrollTo(0, {scroll_position});")
-                time.sleep(random.uniform(5, 7))
+                self.pacer.pause(0.3)
                 
                 # Check if more properties loaded
                 current_count = len(self.driver.find_elements(By.XPATH, '/html/body/div[1]/div/div[2]/div/div/div[1]/div[1]/ul/li'))
@@ -274,13 +664,13 @@ class MultiPropertyZillowScraper:
             
             # Scroll back to top
             self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(2) 
+            self.pacer.pause(0.2)
             
             final_count = len(self.driver.find_elements(By.XPATH, '/html/body/div[1]/div/div[2]/div/div/div[1]/div[1]/ul/li'))
             print(f"  Total properties loaded: {final_count}")
             
             # more time delay because zillow uses lazy loading feature.
-            time.sleep(7)
+            self.pacer.pause(0.5)
             
             return final_count
             
@@ -325,7 +715,8 @@ class MultiPropertyZillowScraper:
 
             # Scroll the button into view to ensure it's clickable.
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_button)
-            time.sleep(random.uniform(0.5,1))  # A brief pause after scrolling.
+            with timings.span('sleep', 'next_page'):
+                time.sleep(random.uniform(0.5,1))  # A brief pause after scrolling.
 
             # Use a JavaScript click, which is often more reliable than a standard .click().
             self.driver.execute_script("arguments[0].click();", next_button)
@@ -350,6 +741,29 @@ class MultiPropertyZillowScraper:
             print(f" An unexpected error occurred in go_to_next_page: {e}")
             return False
              
+    def start_streaming(self, jsonl_path):
+        """Append every property to a JSON Lines log as soon as it is scraped instead of keeping the city in memory"""
+        if self.sink:
+            self.sink.close()
+        self.sink = JsonlSink(jsonl_path)
+        print(f"📝 Streaming properties to {jsonl_path}")
+
+    def record_property(self, property_data):
+        if self.sink:
+            self.sink.append(property_data)
+        else:
+            self.all_properties_data.append(property_data)
+
+    def scraped_count(self):
+        return self.sink.count if self.sink else len(self.all_properties_data)
+
+    def scraped_properties(self):
+        """Everything scraped for the current city, from the log when streaming"""
+        if self.sink:
+            self.sink.sync()
+            return iter_records(self.sink.path) if self.sink.count else iter([])  # no log file without a record
+        return iter(self.all_properties_data)
+
     def save_progress_checkpoint(self, county_name, current_count):
         """Save progress with better file management"""
         if len(self.all_properties_data) % 50 == 0 and len(self.all_properties_data) > 0:  # Every 50 instead of 10
@@ -378,89 +792,65 @@ class MultiPropertyZillowScraper:
         """Extract all property data from current property page - optimized version"""
         try:
             print("Starting property data extraction...")
+
+            self.captured_responses = []
+            if self.extraction_mode == 'offline':
+                return self.extract_with_html_parser()
+
+            # One snapshot of the settled page for all the extractors below (script mode only pulls it if a fallback needs it)
+            self.scrolled_depth = 0
+            if self.extraction_mode == 'script':
+                self.invalidate_page_snapshot()
+            else:
+                self.take_page_snapshot()
             
-            property_data = {
-                'url': self.driver.current_url,
-                'image_url': 'N/A',
-                'scraped_at': datetime.now().isoformat(),
-                
-                'price': 'N/A',
-                'beds': 'N/A', 
-                'baths': 'N/A',
-                'sqft': 'N/A',
-                'sqft_lot': 'N/A',
-                'address': 'N/A',
-                'estimated_monthly_payment': 'N/A',
-                'property_type': 'N/A',
-                'price_per_sqft': 'N/A',
-                'year_built': 'N/A',
-                'region':'N/A',
-                
-                'interior_features': [],
-                'other_rooms': [],
-                'appliances': [],
-                'utilities': 'N/A',
-                'parking': 'N/A',
-                
-                'walk_score':'N/A',
-                'bike_score':'N/A',
-                'transit_score':'N/A',
-                
-                'elementary_school': {'name': 'N/A', 'distance': 'N/A'},
-                'middle_school': {'name': 'N/A', 'distance': 'N/A'},
-                'high_school': {'name': 'N/A','distance': 'N/A'},
-    
-                'flood_risk': 'N/A',
-                'fire_risk': 'N/A',
-                'wind_risk':'N/A',
-                'air_risk':'N/A',
-                'heat_risk': 'N/A',
+            property_data = new_property_record(self.driver.current_url)
 
-                'nearby_cities': [],
-                'property_history': 'N/A'
-            }
+            # (field group, extractor, done message, error label)
+            extractors = [
+                ('image', self.extract_property_image_url, '- Property Image URL Scraping done', 'image URL'),
+                ('basic_info', self.extract_price_and_basic_info, '- Basic Information Scraping Done', 'basic info'),
+                ('features', self.extract_property_features_detailed, '- Property Features Scraping done', 'features'),
+                ('scores', self.extract_neighborhood_scores_detailed, '- Neighbourhood Features Scraping done', 'features'),
+                ('schools', self.extract_schools_detailed, '- School Features Scraping done', 'features'),
+                ('risks', self.extract_environmental_risks, '- Environmental Features Scraping done', 'features'),
+                ('history', self.extract_market_data_detailed, '- Market Features Scraping done', 'features'),
+                ('nearby', self.extract_nearby_cities, '- Nearby Cities Features Scraping done', 'features'),
+            ]
+
+            # Structured mode: one parse of the embedded property JSON, the extractors below only fill the gaps
+            structured = False
+            if self.extraction_mode == 'structured':
+                try:
+                    with timings.span('extract', 'embedded_json'):
+                        structured = extract_embedded_property(self.get_page_source(), property_data)
+                    print(f"- Embedded JSON {'parsed' if structured else 'not found, using page extractors'}")
+                except Exception as e:
+                    print(f"  - Error in embedded JSON: {e}")
+            elif self.extraction_mode == 'script':
+                structured = self.extract_with_page_script(property_data)
+
+            # The page's own data calls (GraphQL) that already came back: fill from them, scroll only for the rest
+            if self.response_capture:
+                structured = self.extract_from_captured_responses(property_data) or structured
 
             # calling all the functions for data scraping
-            try:
-                self.extract_property_image_url(property_data)
-                print('- Property Image URL Scraping done')
-            except Exception as e:
-                print(f"  - Error in image URL: {e}")
-            try:
-                self.extract_price_and_basic_info(property_data)
-                print('- Basic Information Scraping Done')
-            except Exception as e:
-                print(f"  - Error in basic info: {e}")
-            try:
-                self.extract_property_features_detailed(property_data)
-                print('- Property Features Scraping done')
-            except Exception as e:
-                print(f"  - Error in features: {e}")
-            try:
-                self.extract_neighborhood_scores_detailed(property_data)
-                print('- Neighbourhood Features Scraping done')
-            except Exception as e:
-                print(f"  - Error in features: {e}")
-            try:
-                self.extract_schools_detailed(property_data)
-                print('- School Features Scraping done')
-            except Exception as e:
-                print(f"  - Error in features: {e}")
-            try:
-                self.extract_environmental_risks(property_data)
-                print('- Environmental Features Scraping done')
-            except Exception as e:
-                print(f"  - Error in features: {e}")
-            try:
-                self.extract_market_data_detailed(property_data)
-                print('- Market Features Scraping done')
-            except Exception as e:
-                print(f"  - Error in features: {e}")
-            try:
-                self.extract_nearby_cities(property_data)
-                print('- Nearby Cities Features Scraping done')
-            except Exception as e:
-                print(f"  - Error in features: {e}")
+            for group, extractor, done_message, error_label in extractors:
+                try:
+                    if structured:
+                        if not missing_fields(property_data, group):
+                            continue
+                        # extractors reset their fields first, so run them on a copy and only take what is missing
+                        fallback_data = copy.deepcopy(property_data)
+                        with timings.span('extract', extractor.__name__):
+                            extractor(fallback_data)
+                        fill_missing(property_data, fallback_data, group)
+                    else:
+                        with timings.span('extract', extractor.__name__):
+                            extractor(property_data)
+                    print(done_message)
+                except Exception as e:
+                    print(f"  - Error in {error_label}: {e}")
             
             print("Property data extraction completed!")
             return property_data
@@ -469,6 +859,58 @@ class MultiPropertyZillowScraper:
             print(f"Error in extraction: {e}")
             return None
     
+    def extract_with_page_script(self, property_data):
+        """
+        Script mode: one execute_async_script scrolls the lazy sections in, reads the embedded JSON and every
+        section and returns them together. False when the script failed, then every live extractor runs.
+        """
+        with timings.span('extract', 'page_script'):
+            payload = run_page_script(self.driver)
+        if payload is None:
+            return False
+        self.scrolled_depth = 1  # the script has been down to the bottom, the lazy sections are loaded
+        with timings.span('extract', 'apply_page_payload'):
+            still_missing = apply_page_payload(payload, property_data)
+        print("- Page script done" + (f", live fallbacks for: {', '.join(still_missing)}" if still_missing else ""))
+        return True
+
+    def extract_from_captured_responses(self, property_data):
+        """Fill what the captured JSON bodies have (see response_capture.py), True if that filled anything"""
+        with timings.span('extract', 'captured_responses'):
+            self.captured_responses = self.response_capture.capture(self.driver, self.collect_network_events(),
+                                                                    property_data['url'])
+            filled = apply_captured_responses(self.captured_responses, property_data)
+        if filled:
+            print(f"- Captured responses filled: {', '.join(filled)}")
+        return bool(filled)
+
+    def extract_with_html_parser(self):
+        """
+        Offline mode: the browser only loads the page, then one snapshot of the fully loaded
+        page goes to the lxml engine which does all the extraction without any more round trips.
+        """
+        url = self.driver.current_url
+        
+        # walk down the page so the lazy loaded sections (scores, schools, climate risks) are in the DOM
+        self.scrolled_depth = 0
+        for fraction in (0.5, 0.65, 1):
+            self.scroll_page(fraction)
+            wait_for_quiet(self.driver, timeout=2)
+        
+        # expand the collapsed fact sections in one go
+        self.driver.execute_script(
+            "document.querySelectorAll('button').forEach(b => { if (b.textContent.includes('Show more')) b.click(); });"
+        )
+        wait_for_quiet(self.driver, timeout=1, quiet=0.2)
+        
+        page_html = self.take_page_snapshot()
+        with timings.span('extract', 'html_parser'):
+            property_data = self.html_extractor.extract(page_html, url=url)
+        if self.response_capture:
+            self.extract_from_captured_responses(property_data)  # the scrolling above triggered the lazy data calls
+        print("Property data extraction completed! (html parser)")
+        return property_data
+
     def extract_property_image_url(self, property_data):
         """Extract first property image URL - SAFE approach"""
         try:
@@ -509,24 +951,13 @@ class MultiPropertyZillowScraper:
             
             #  Search page source for image URLs (backup)
             try:
-                page_source = self.driver.page_source
-                
-                # Look for Zillow image URL patterns in page source
-                image_patterns = [
-                    r'https://photos\.zillowstatic\.com/[^"\'>\s]+',
-                    r'https://[^"\'>\s]*zillow[^"\'>\s]*\.jpg',
-                    r'https://[^"\'>\s]*zillow[^"\'>\s]*\.webp'
-                ]
+                page_source = self.get_page_source()
                 
-                for pattern in image_patterns:
-                    matches = re.findall(pattern, page_source, re.I)
-                    if matches:
-                        # Take first valid image URL
-                        for url in matches:
-                            if self.is_valid_zillow_image_url(url):
-                                property_data['image_url'] = url
-                                print(f" Found image URL via page source: {url[:50]}...")
-                                return
+                url = find_image_url_in_source(page_source)
+                if url:
+                    property_data['image_url'] = url
+                    print(f" Found image URL via page source: {url[:50]}...")
+                    return
                                 
             except Exception as e:
                 print(f" Page source image search failed: {e}")
@@ -539,28 +970,7 @@ class MultiPropertyZillowScraper:
 
     def is_valid_zillow_image_url(self, url):
         """Validate if URL is a proper Zillow image URL"""
-        if not url or len(url) < 10:
-            return False
-            
-        # Check for Zillow image patterns
-        valid_patterns = [
-            'photos.zillowstatic.com',
-            'zillow.com',
-            '.jpg',
-            '.jpeg',
-            '.webp',
-            '.png'
-        ]
-        
-        # Must contain Zillow domain and image extension
-        has_zillow = any(pattern in url.lower() for pattern in ['zillow', 'zillowstatic'])
-        has_image_ext = any(url.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.webp', '.png'])
-        
-        # Exclude obviously bad URLs
-        bad_patterns = ['icon', 'logo', 'avatar', 'blank', 'placeholder']
-        has_bad_pattern = any(bad in url.lower() for bad in bad_patterns)
-        
-        return has_zillow and has_image_ext and not has_bad_pattern and len(url) > 30
+        return is_valid_zillow_image_url(url)
 
     def extract_price_and_basic_info(self, property_data):
         self.extract_price_advanced(property_data)
@@ -585,8 +995,7 @@ class MultiPropertyZillowScraper:
                 
                 for element in elements:
                     text = element.text.strip()
-                    price_match = re.match(r'^\$[\d,]+(?:\.\d{2})?$', text)
-                    if price_match:
+                    if is_price_text(text):
                         property_data['price'] = text
                         return
             except:
@@ -602,27 +1011,13 @@ class MultiPropertyZillowScraper:
             # Strategy 1: Use the data-testid we discovered (most reliable)
             try:
                 element = self.driver.find_element(By.CSS_SELECTOR, '[data-testid="bed-bath-sqft-facts"]')
-                text = element.text.strip()
-                
-                # Extract beds, baths, sqft from the structured text
-                bed_match = re.search(r'(\d+)\s*beds?', text, re.I)
-                bath_match = re.search(r'(\d+(?:\.\d+)?)\s*baths?', text, re.I)
-                sqft_match = re.search(r'([\d,]+)\s*sqft', text, re.I)
-                
-                if bed_match:
-                    property_data['beds'] = bed_match.group(1)
-                if bath_match:
-                    property_data['baths'] = bath_match.group(1)
-                if sqft_match:
-                    property_data['sqft'] = sqft_match.group(1)
+                parse_bed_bath_sqft_facts(element.text.strip(), property_data)
                     
             except Exception as e:
                 print(f"Primary strategy failed: {e}")
             
             # Strategy 2: Fallback to other elements if primary failed
-            if (property_data['beds'] == 'N/A' or 
-                property_data['baths'] == 'N/A' or 
-                property_data['sqft'] == 'N/A'):
+            if not basic_facts_complete(property_data):
                 
                 print("Primary strategy incomplete, trying fallback...")
                 
@@ -638,75 +1033,24 @@ class MultiPropertyZillowScraper:
                     try:
                         elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
                         for element in elements:
-                            text = element.text.strip()
-                            
-                            if property_data['beds'] == 'N/A':
-                                bed_match = re.search(r'(\d+)\s*bed', text, re.I)
-                                if bed_match and 1 <= int(bed_match.group(1)) <= 10:
-                                    property_data['beds'] = bed_match.group(1)
-                            
-                            if property_data['baths'] == 'N/A':
-                                bath_match = re.search(r'(\d+(?:\.\d+)?)\s*bath', text, re.I)
-                                if bath_match and 0.5 <= float(bath_match.group(1)) <= 10:
-                                    property_data['baths'] = bath_match.group(1)
-                            
-                            if property_data['sqft'] == 'N/A':
-                                sqft_match = re.search(r'([\d,]+)\s*sqft', text, re.I)
-                                if sqft_match:
-                                    sqft_value = int(sqft_match.group(1).replace(',', ''))
-                                    if 300 <= sqft_value <= 20000:
-                                        property_data['sqft'] = sqft_match.group(1)
+                            parse_fallback_facts(element.text.strip(), property_data)
                             
                             # Break if we found everything
-                            if (property_data['beds'] != 'N/A' and 
-                                property_data['baths'] != 'N/A' and 
-                                property_data['sqft'] != 'N/A'):
+                            if basic_facts_complete(property_data):
                                 break
                         
-                        if (property_data['beds'] != 'N/A' and 
-                            property_data['baths'] != 'N/A' and 
-                            property_data['sqft'] != 'N/A'):
+                        if basic_facts_complete(property_data):
                             break
                             
                     except Exception as e:
                         continue
             
             # Strategy 3: Page source JSON as last resort
-            if (property_data['beds'] == 'N/A' or 
-                property_data['baths'] == 'N/A' or 
-                property_data['sqft'] == 'N/A'):
+            if not basic_facts_complete(property_data):
                 
                 print("Trying JSON extraction from page source...")
                 try:
-                    page_source = self.driver.page_source
-                    
-                    if property_data['beds'] == 'N/A':
-                        for pattern in [r'"bedrooms"[:\s]*(\d+)', r'"beds"[:\s]*(\d+)']:
-                            match = re.search(pattern, page_source, re.I)
-                            if match:
-                                bed_value = int(match.group(1))
-                                if 1 <= bed_value <= 10:
-                                    property_data['beds'] = str(bed_value)
-                                    break
-                    
-                    if property_data['baths'] == 'N/A':
-                        for pattern in [r'"bathrooms"[:\s]*(\d+(?:\.\d+)?)', r'"baths"[:\s]*(\d+(?:\.\d+)?)']:
-                            match = re.search(pattern, page_source, re.I)
-                            if match:
-                                bath_value = float(match.group(1))
-                                if 0.5 <= bath_value <= 10:
-                                    property_data['baths'] = str(bath_value)
-                                    break
-                    
-                    if property_data['sqft'] == 'N/A':
-                        for pattern in [r'"livingArea"[:\s]*(\d+)', r'"floorSize"[:\s]*(\d+)']:
-                            match = re.search(pattern, page_source, re.I)
-                            if match:
-                                sqft_value = int(match.group(1))
-                                if 300 <= sqft_value <= 20000:
-                                    property_data['sqft'] = f"{sqft_value:,}"
-                                    break
-                                    
+                    parse_facts_from_source_json(self.get_page_source(), property_data)
                 except Exception as e:
                     print(f"JSON extraction failed: {e}")
             
@@ -720,80 +1064,14 @@ class MultiPropertyZillowScraper:
                 try:
                     element = self.driver.find_element(By.CSS_SELECTOR, selector)
                     text = element.text.strip()
-                    if any(indicator in text.lower() for indicator in ['st', 'ave', 'rd', 'dr', 'ma']):
+                    if is_address_text(text):
                         property_data['address'] = text
                         break
                 except:
                     continue
             
             # Page source extraction for other data
-            page_text = self.driver.page_source
-            
-            type_match = re.search(r'(single.family|condo|townhouse|multi.family)', page_text, re.I)
-            if type_match:
-                property_data['property_type'] = type_match.group(1)
-            
-            year_patterns = [
-                r'Built in (\d{4})',
-                r'built[:\s]+(\d{4})',
-                r'year[:\s]+(\d{4})'
-            ]
-            for pattern in year_patterns:
-                year_match = re.search(pattern, page_text, re.I)
-                if year_match:
-                    property_data['year_built'] = year_match.group(1)
-                    break
-            
-            price_sqft_patterns = [
-                r'\$([\d,]+)/sqft',
-                r'\$([\d,]+)\s*price/sqft',
-                r'price/sqft[:\s]+\$([\d,]+)',
-                r'\$([\d,]+)\s*/\s*sqft'
-            ]
-            for pattern in price_sqft_patterns:
-                price_sqft_match = re.search(pattern, page_text, re.I)
-                if price_sqft_match:
-                    price_value = price_sqft_match.group(1).replace(',', '')
-                    property_data['price_per_sqft'] = f"${price_value}/sqft"
-                    break
-            
-            lot_patterns = [
-                r'([\d,]+)\s*Square\s*Feet\s*Lot',  # "4,373 Square Feet Lot"
-                r'(\d+\.?\d*)\s*Acres\s*Lot',       # "0.31 Acres Lot"
-                r'(\d+\.?\d*)\s*Acres',
-                r'(\d+\.?\d*)\s*acres',
-                r'lot[:\s]*([\d,.]+)\s*(sq\s*ft|sqft|square\s*feet|acres)',
-                r'([\d,.]+)\s*(acres|sq\s*ft|sqft|square\s*feet)\s*lot',
-                r'lot\s*size[:\s]*([\d,.]+)\s*(sq\s*ft|sqft|square\s*feet|acres)',
-                r'([\d,.]+)\s*square\s*feet\s*lot',
-                r'([\d,.]+)\s*sq\s*ft\s*lot',
-                r'([\d,.]+)\s*sqft\s*lot',
-                r'lot[:\s]*([\d,.]+)',
-                r'Lot\s*:\s*([\d,.]+)',
-                r'Property\s*size[:\s]*([\d,.]+)\s*(sq\s*ft|sqft|square\s*feet|acres)'
-            ]
-            
-            for pattern in lot_patterns:
-                lot_match = re.search(pattern, page_text, re.I)
-                if lot_match:
-                    if len(lot_match.groups()) == 2:
-                        size = lot_match.group(1)
-                        unit = lot_match.group(2)
-                        if 'acres' in unit.lower():
-                            property_data['sqft_lot'] = f"{size} Acres"
-                        else:
-                            property_data['sqft_lot'] = f"{size} sqft"
-                    else:
-                        size = lot_match.group(1)
-                        # Check if it's "Square Feet Lot" or "Acres Lot" pattern
-                        if 'square feet lot' in lot_match.group(0).lower():
-                            property_data['sqft_lot'] = f"{size} sqft"
-                        elif 'acres lot' in lot_match.group(0).lower():
-                            property_data['sqft_lot'] = f"{size} Acres"
-                        else:
-                            # Default to sqft if no unit specified
-                            property_data['sqft_lot'] = f"{size} sqft"
-                    break
+            parse_page_facts(self.get_page_source(), property_data)
                             
         except Exception as e:
             print(f"❌ Basic info extraction failed: {e}")
@@ -801,102 +1079,24 @@ class MultiPropertyZillowScraper:
     def extract_property_features_detailed(self, property_data):
         try:
             print("  - Scrolling to middle of page...")
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            time.sleep(random.uniform(1, 2))
+            self.reveal_section(0.5, ['Show more', 'Interior', 'Appliances'], timeout=2)
             
             print("  - Looking for expandable buttons...")
             expandable_buttons = self.driver.find_elements(By.XPATH, "//button[contains(text(), 'Show more')]")
             for button in expandable_buttons:
                 try:
                     self.driver.execute_script("arguments[0].click();", button)
-                    time.sleep(0.5)
                 except:
                     pass
 
+            # expanded sections are not in the snapshot yet, wait once for all of them to render
+            if expandable_buttons:
+                wait_for_quiet(self.driver, timeout=1.5, quiet=0.2)
+                self.invalidate_page_snapshot()
+
             print("  - Extracting features from page source...")
-            page_text = self.driver.page_source.lower()  # Convert to lowercase once
-            
-            # Compile all regex patterns once for better performance
-            compiled_patterns = {
-                'interior_features': [
-                    re.compile(pattern, re.I) for pattern in [
-                        r'hardwood\s+floors?', r'granite\s+countertops?', r'stainless\s+steel', 
-                        r'tile\s+floors?', r'carpet', r'laminate', r'marble', r'walk-in\s+closet', 
-                        r'bay\s+window', r'skylight', r'fireplace', r'built-in\s+shelves?', 
-                        r'crown\s+molding', r'vaulted\s+ceiling'
-                    ]
-                ],
-                'other_rooms': [
-                    re.compile(pattern, re.I) for pattern in [
-                        r'dining\s+room', r'family\s+room', r'living\s+room', r'bonus\s+room', 
-                        r'office', r'den', r'study', r'library', r'sunroom', r'basement', 
-                        r'attic', r'laundry\s+room', r'mud\s+room', r'pantry', r'walk-in\s+pantry'
-                    ]
-                ],
-                'appliances': [
-                    re.compile(pattern, re.I) for pattern in [
-                        r'dishwasher', r'refrigerator', r'microwave', r'oven', r'range', 
-                        r'cooktop', r'disposal', r'washer', r'dryer', r'freezer', 
-                        r'wine\s+cooler', r'ice\s+maker'
-                    ]
-                ]
-            }
-            
-            # Single pass extraction using sets for O(1) lookups
-            interior_features = set()
-            other_rooms = set()
-            appliances = set()
-            
-            # Process each category in one pass
-            for category, patterns in compiled_patterns.items():
-                target_set = locals()[category]  # Get the corresponding set
-                max_items = 5 if category == 'interior_features' else 3
-                
-                for pattern in patterns:
-                    if len(target_set) >= max_items:
-                        break
-                    matches = pattern.findall(page_text)
-                    for match in matches:
-                        if len(target_set) >= max_items:
-                            break
-                        target_set.add(match.lower())
-            
-            # Convert sets back to lists
-            property_data['interior_features'] = list(interior_features)
-            property_data['other_rooms'] = list(other_rooms)
-            property_data['appliances'] = list(appliances)
-            
-            # Utilities extraction - compile patterns once and search once
-            utilities = {}
-            utility_compiled_patterns = {
-                'Electric': re.compile(r'Electric:\s*([^<\n]+)', re.I),
-                'Sewer': re.compile(r'Sewer:\s*([^<\n]+)', re.I),
-                'Water': re.compile(r'Water:\s*([^<\n]+)', re.I),
-                'Utilities': re.compile(r'Utilities for property:\s*([^<\n]+)', re.I)
-            }
-            
-            for utility_type, pattern in utility_compiled_patterns.items():
-                match = pattern.search(page_text)
-                if match:
-                    utilities[utility_type] = match.group(1).strip()
-            
-            property_data['utilities'] = utilities if utilities else 'N/A'
-            
-            # Parking extraction - compile patterns once
-            parking = {}
-            parking_compiled_patterns = {
-                'total_spaces': re.compile(r'Total spaces:\s*(\d+)', re.I),
-                'garage_spaces': re.compile(r'Garage spaces:\s*(\d+)', re.I),
-                'parking_features': re.compile(r'Parking features:\s*([^<\n]+)', re.I),
-                'uncovered_spaces': re.compile(r'Has uncovered spaces:\s*([^<\n]+)', re.I)
-            }
-            
-            for parking_type, pattern in parking_compiled_patterns.items():
-                match = pattern.search(page_text)
-                if match:
-                    parking[parking_type] = match.group(1).strip()
-            
-            property_data['parking'] = parking if parking else 'N/A'
+            page_text = self.get_page_source().lower()  # Convert to lowercase once
+            parse_features(page_text, property_data)
             print("  - Features extraction completed")
             
         except Exception as e:
@@ -914,11 +1114,9 @@ class MultiPropertyZillowScraper:
             for element in payment_elements:
                 try:
                     container = element.find_element(By.XPATH, "./..")
-                    container_text = container.text
-                    
-                    payment_match = re.search(r'\$[\d,]+(?:/mo|/month|\s+monthly)', container_text, re.I)
-                    if payment_match:
-                        property_data['estimated_monthly_payment'] = payment_match.group(0)
+                    payment = parse_monthly_payment(container.text)
+                    if payment:
+                        property_data['estimated_monthly_payment'] = payment
                         break
                         
                 except:
@@ -942,9 +1140,8 @@ class MultiPropertyZillowScraper:
             property_data['bike_score'] = 'N/A'
             property_data['transit_score'] = 'N/A'
             
-            # Quick scroll to scores section (around 60-70% down the page)
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.65);")
-            time.sleep(random.uniform(1.5, 2))  # Wait for content to load
+            # Scores section sits around 60-70% down the page, only scroll there if it is not rendered yet
+            self.reveal_section(0.65, ['Walk Score', 'Bike Score', 'Transit Score'])
             
             # Strategy 1: Use the specific container you found
             try:
@@ -968,85 +1165,23 @@ class MultiPropertyZillowScraper:
                         continue
                 
                 if scores_container:
-                    container_text = scores_container.text
-                    
                     # Extract all scores from the container text at once
-                    score_patterns = {
-                        'walk_score': [
-                            r'Walk Score[®]?\s*(\d+)',
-                            r'(\d+)\s*/?\s*100\s*Walk',
-                            r'Walk\s*Score\s*(\d+)',
-                            r'(\d+)\s*Walk'
-                        ],
-                        'bike_score': [
-                            r'Bike Score[®]?\s*(\d+)',
-                            r'(\d+)\s*/?\s*100\s*Bike',
-                            r'Bike\s*Score\s*(\d+)',
-                            r'(\d+)\s*Bike'
-                        ],
-                        'transit_score': [
-                            r'Transit Score[®]?\s*(\d+)',
-                            r'(\d+)\s*/?\s*100\s*Transit',
-                            r'Transit\s*Score\s*(\d+)',
-                            r'(\d+)\s*Transit'
-                        ]
-                    }
-                    
-                    # Extract scores efficiently
-                    for score_type, patterns in score_patterns.items():
-                        for pattern in patterns:
-                            try:
-                                match = re.search(pattern, container_text, re.I)
-                                if match:
-                                    score = int(match.group(1))
-                                    if 0 <= score <= 100:
-                                        property_data[score_type] = f"{score}/100"
-                                        break
-                            except (ValueError, AttributeError):
-                                continue
-                        
-                        # Stop looking for this score if we found it
-                        if property_data[score_type] != 'N/A':
-                            continue
+                    parse_scores_container(scores_container.text, property_data)
                 
             except Exception as e:
                 print(f"    Container approach failed: {e}")
             
             # Strategy 2: Quick direct search if container approach failed
-            if (property_data['walk_score'] == 'N/A' or 
-                property_data['bike_score'] == 'N/A' or 
-                property_data['transit_score'] == 'N/A'):
+            if not scores_complete(property_data):
                 
                 try:
-                    # Get page source once for fast regex search
-                    page_source = self.driver.page_source
-                    
-                    # Quick regex patterns for remaining scores
-                    remaining_patterns = {
-                        'walk_score': r'(?:Walk\s*Score|Walkability)[:\s]*(\d+)',
-                        'bike_score': r'(?:Bike\s*Score|Bikeability)[:\s]*(\d+)',
-                        'transit_score': r'(?:Transit\s*Score|Transit)[:\s]*(\d+)'
-                    }
-                    
-                    for score_type, pattern in remaining_patterns.items():
-                        if property_data[score_type] == 'N/A':
-                            try:
-                                match = re.search(pattern, page_source, re.I)
-                                if match:
-                                    score = int(match.group(1))
-                                    if 0 <= score <= 100:
-                                        property_data[score_type] = f"{score}/100"
-                            except (ValueError, AttributeError):
-                                continue
+                    parse_scores_from_source(self.get_page_source(), property_data)
                                 
                 except Exception as e:
                     print(f"    Page source search failed: {e}")
             
             # Strategy 3: Ultra-quick element search for any remaining missing scores
-            missing_scores = [score for score in ['walk_score', 'bike_score', 'transit_score'] 
-                            if property_data[score] == 'N/A']
-            
-            if missing_scores:
+            if not scores_complete(property_data):
                 try:
                     # Look for any elements containing score keywords
                     score_keywords = ['walk', 'bike', 'transit', 'score']
@@ -1056,19 +1191,7 @@ class MultiPropertyZillowScraper:
                             
                             for element in elements[:3]:  # Only check first 3 matches
                                 try:
-                                    element_text = element.text
-                                    # Quick check for score patterns
-                                    score_match = re.search(r'(\d+)(?:/100)?', element_text)
-                                    if score_match:
-                                        score = int(score_match.group(1))
-                                        if 0 <= score <= 100:
-                                            # Determine which score type based on context
-                                            if 'walk' in element_text.lower() and property_data['walk_score'] == 'N/A':
-                                                property_data['walk_score'] = f"{score}/100"
-                                            elif 'bike' in element_text.lower() and property_data['bike_score'] == 'N/A':
-                                                property_data['bike_score'] = f"{score}/100"
-                                            elif 'transit' in element_text.lower() and property_data['transit_score'] == 'N/A':
-                                                property_data['transit_score'] = f"{score}/100"
+                                    parse_score_element_text(element.text, property_data)
                                 except:
                                     continue
                                 
@@ -1078,10 +1201,6 @@ class MultiPropertyZillowScraper:
                 except Exception as e:
                     print(f"    Element search failed: {e}")
             
-            # Report results
-            scores_found = sum(1 for score in [property_data['walk_score'], property_data['bike_score'], property_data['transit_score']] 
-                            if score != 'N/A')
-            
             print("  - Neighborhood scores extraction completed")
             
         except Exception as e:
@@ -1100,80 +1219,11 @@ class MultiPropertyZillowScraper:
             
             print("  - Looking for school information...")
             
-            # Quick scroll to schools area
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.6);")
-            time.sleep(1)
-            
-            # Get page source once for faster processing
-            page_source = self.driver.page_source
+            # Schools area, only scrolled to when it is not rendered yet
+            self.reveal_section(0.6, ['GreatSchools', 'Elementary', 'Middle', 'High'])
             
-            # Simple text-based extraction for each school type
-            school_types = ['elementary', 'middle', 'high']
-            
-            for school_type in school_types:
-                # Look for school name patterns in the page source
-                name_patterns = [
-                    rf'([A-Z][a-zA-Z\s]+?)\s*{school_type.title()}',
-                    rf'([A-Z][a-zA-Z\s]+?)\s*School.*?{school_type}',
-                    rf'{school_type.title()}[:\s]*([A-Z][a-zA-Z\s]+)',
-                ]
-                
-                school_name = 'N/A'
-                for pattern in name_patterns:
-                    name_match = re.search(pattern, page_source, re.I)
-                    if name_match:
-                        potential_name = name_match.group(1).strip()
-                        # ADD THIS: Filter out common non-school text
-                        bad_keywords = ['check with', 'contact', 'verify', 'call', 'please', 'applicable', 'district', 'information', 'the applicable']
-                        if (len(potential_name) > 3 and len(potential_name) < 30 and 
-                            not any(bad in potential_name.lower() for bad in bad_keywords)):
-                            school_name = potential_name
-                            break
-            
-                school_distance = 'N/A'
-                
-                # Try multiple distance patterns - FIXED for actual format
-                distance_patterns = [
-                    # Pattern 1: "Distance: X.X mi" format (from your image)
-                    rf'{school_type}.*?Distance:\s*(\d+\.?\d*)\s*mi',
-                    
-                    # Pattern 2: School name followed by distance (if we found the name)
-                    rf'{re.escape(school_name)}.*?Distance:\s*(\d+\.?\d*)\s*mi' if school_name != 'N/A' else None,
-                    
-                    # Pattern 3: Alternative formats
-                    rf'{school_type}.*?(\d+\.?\d*)\s*mi',
-                    
-                    # Pattern 4: For middle school, also try "junior" or "k-8"
-                    rf'(?:junior|k-8).*?Distance:\s*(\d+\.?\d*)\s*mi' if school_type == 'middle' else None,
-                ]
-                
-                # Remove None patterns
-                distance_patterns = [p for p in distance_patterns if p is not None]
-                
-                for pattern in distance_patterns:
-                    try:
-                        distance_matches = re.findall(pattern, page_source, re.I)
-                        if distance_matches:
-                            # Take the first reasonable distance
-                            for distance in distance_matches:
-                                try:
-                                    distance_float = float(distance)
-                                    if 0.1 <= distance_float <= 50:
-                                        school_distance = f"{distance} mi"
-                                        break
-                                except ValueError:
-                                    continue
-                            
-                            if school_distance != 'N/A':
-                                break
-                    except re.error:
-                        continue
-                
-                # Save the school data
-                property_data[f'{school_type}_school'] = {
-                    'name': school_name,
-                    'distance': school_distance
-                }
+            # Shared snapshot, only re-pulled if the scroll above loaded new sections
+            parse_schools(self.get_page_source(), property_data)
             
             print("  - School extraction completed")
             
@@ -1182,8 +1232,7 @@ class MultiPropertyZillowScraper:
     
     def extract_environmental_risks(self, property_data):
         try:
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(random.uniform(2.5, 3.5))
+            self.reveal_section(1, ['Climate risks', 'Flood Factor', 'Fire Factor'])
             
             property_data['flood_risk'] = 'N/A'
             property_data['fire_risk'] = 'N/A'
@@ -1192,42 +1241,27 @@ class MultiPropertyZillowScraper:
             property_data['heat_risk'] = 'N/A'
             
             try:
-                climate_section = self.driver.find_element(By.XPATH, "//*[contains(text(), 'Climate risks')]")
-                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", climate_section)
-                time.sleep(random.uniform(2, 3))
+                if not has_section_text(self.driver, ['factor', 'Factor']):
+                    climate_section = self.driver.find_element(By.XPATH, "//*[contains(text(), 'Climate risks')]")
+                    self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", climate_section)
+                    wait_for_section_text(self.driver, ['factor', 'Factor'])
             except:
                 pass
             
-            risk_mappings = {
-                'flood': 'flood_risk',
-                'fire': 'fire_risk', 
-                'wind': 'wind_risk',
-                'air': 'air_risk',
-                'heat': 'heat_risk'
-            }
-            
-            for risk_type, risk_key in risk_mappings.items():
+            for risk_type, risk_key in RISK_TYPES.items():
                 try:
                     elements = self.driver.find_elements(By.XPATH, f"//*[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{risk_type} factor')]")
                     
                     for element in elements:
                         try:
                             container = element.find_element(By.XPATH, "./../../..")
-                            container_text = container.text
-                            
-                            level_match = re.search(r'(Minimal|Minor|Moderate|Major|Severe)', container_text, re.I)
-                            score_match = re.search(r'(\d+)/10', container_text)
+                            risk_value = parse_risk_container(container.text)
                             
-                            if level_match and score_match:
-                                level = level_match.group(1).title()
-                                score = score_match.group(1)
-                                property_data[risk_key] = f"{level} ({score}/10)"
+                            if risk_value:
+                                property_data[risk_key] = risk_value
                                 break
                         except:
                             continue
-                            
-                    if property_data[risk_key] != 'N/A':
-                        continue
                         
                 except:
                     pass
@@ -1243,15 +1277,7 @@ class MultiPropertyZillowScraper:
             for element in history_elements:
                 try:
                     container = element.find_element(By.XPATH, "./..")
-                    container_text = container.text
-                    
-                    history_matches = re.findall(r'(\d{1,2}/\d{1,2}/\d{4})\s+([A-Za-z\s]+)\s+(\$[\d,]+)', container_text)
-                    for match in history_matches:
-                        history.append({
-                            'date': match[0],
-                            'event': match[1].strip(),
-                            'price': match[2]
-                        })
+                    history.extend(parse_price_history(container.text))
                     
                     if len(history) >= 5:
                         break
@@ -1266,27 +1292,16 @@ class MultiPropertyZillowScraper:
     
     def extract_nearby_cities(self, property_data):
         try:
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(random.uniform(1.5, 2.5))
+            self.reveal_section(1, ['Nearby cities'])
             
             property_data['nearby_cities'] = []
             property_data['region'] = 'N/A'
             
-            page_source = self.driver.page_source
+            page_source = self.get_page_source()
             
-            region_patterns = [
-                r'Region:\s*([^<\n•]+)',
-                r'Region[:\s]+([^<\n•]+)',
-                r'Location[^<]*Region[:\s]*([^<\n•]+)'
-            ]
-            
-            for pattern in region_patterns:
-                region_match = re.search(pattern, page_source, re.I)
-                if region_match:
-                    region_text = region_match.group(1).strip()
-                    if region_text and len(region_text) > 2:
-                        property_data['region'] = region_text
-                        break
+            region = parse_region(page_source)
+            if region:
+                property_data['region'] = region
             
             if property_data['region'] == 'N/A':
                 try:
@@ -1295,11 +1310,9 @@ class MultiPropertyZillowScraper:
                         try:
                             for xpath in [".//..", "./../..", "./../../../.."]:
                                 container = location_elem.find_element(By.XPATH, xpath)
-                                container_text = container.text
-                                
-                                region_match = re.search(r'Region:\s*([^•\n]+)', container_text, re.I)
-                                if region_match:
-                                    property_data['region'] = region_match.group(1).strip()
+                                region = parse_region_container(container.text)
+                                if region:
+                                    property_data['region'] = region
                                     break
                             
                             if property_data['region'] != 'N/A':
@@ -1312,86 +1325,106 @@ class MultiPropertyZillowScraper:
             nearby_cities_elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), 'Nearby cities')]")
             
             if nearby_cities_elements:
-                self.driver.execute_script("arguments[0].scrollIntoView();", nearby_cities_elements[0])
-                time.sleep(2)
+                if not has_section_text(self.driver, ['Real estate']):
+                    self.driver.execute_script("arguments[0].scrollIntoView();", nearby_cities_elements[0])
+                    wait_for_section_text(self.driver, ['Real estate'], timeout=2)
                 
                 container = nearby_cities_elements[0].find_element(By.XPATH, "./../..")
                 city_links = container.find_elements(By.XPATH, ".//a[contains(text(), 'Real estate')]")
                 
-                cities = []
+                link_texts = []
                 for link in city_links[:5]:
                     try:
-                        city_text = link.text.strip()
-                        city_name = city_text.replace(' Real estate', '').strip()
-                        if city_name and city_name not in cities:
-                            cities.append(city_name)
+                        link_texts.append(link.text)
                     except:
                         continue
                 
-                property_data['nearby_cities'] = cities
+                property_data['nearby_cities'] = clean_nearby_city_links(link_texts)
             
             if not property_data['nearby_cities']:
-                nearby_section = re.search(r'Nearby cities(.*?)(?=<div|</section|</footer)', page_source, re.I | re.DOTALL)
-                
-                if nearby_section:
-                    section_text = nearby_section.group(1)
-                    city_matches = re.findall(r'([A-Za-z\s]+?)\s+Real estate', section_text)
-                    
-                    cities = []
-                    for city in city_matches[:5]:
-                        clean_city = city.strip()
-                        if clean_city and len(clean_city) > 2:
-                            cities.append(clean_city)
-                    
-                    property_data['nearby_cities'] = cities
+                property_data['nearby_cities'] = parse_nearby_cities_from_source(page_source)
                     
         except:
             pass
     
     def save_all_properties(self, filename_prefix="massachusetts_properties"):
         """Save all scraped properties to JSON and CSV"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        if self.all_properties_data:
-            # Save to JSON
-            json_filename = f"{filename_prefix}_{timestamp}.json"
-            with open(json_filename, 'w') as f:
-                json.dump(self.all_properties_data, f, indent=2)
-            
-            # Save to CSV
-            csv_filename = f"{filename_prefix}_{timestamp}.csv"
-            flattened_data = []
-            for property_data in self.all_properties_data:
-                flattened_data.append(self.flatten_property_data(property_data))
-            
-            df = pd.DataFrame(flattened_data)
-            df.to_csv(csv_filename, index=False)
-            
-            print(f"\n📁 All properties saved:")
-            print(f"   • {json_filename} (structured)")
-            print(f"   • {csv_filename} (flattened)")
-            print(f"   • Total properties: {len(self.all_properties_data)}")
-            
-            return json_filename, csv_filename  # ✅ Return both files
-        else:
+        if self.sink:
+            return self.export_streamed_properties(filename_prefix)
+        return save_properties(self.all_properties_data, filename_prefix)
+
+    def export_streamed_properties(self, filename_prefix):
+        """Build the JSON and CSV exports from the JSON Lines log, one record at a time"""
+        self.sink.close()
+        if not self.sink.count:
             print("No properties data to save")
             return None, None
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        json_filename = f"{filename_prefix}_{timestamp}.json"
+        csv_filename = f"{filename_prefix}_{timestamp}.csv"
+        
+        total = export_json(self.sink.path, json_filename)
+        export_csv(self.sink.path, csv_filename, flatten_property_data)
+        
+        print(f"\n📁 All properties saved:")
+        print(f"   • {self.sink.path} (log)")
+        print(f"   • {json_filename} (structured)")
+        print(f"   • {csv_filename} (flattened)")
+        print(f"   • Total properties: {total}")
+        
+        return json_filename, csv_filename
     
     def flatten_property_data(self, data):
         """Flatten nested data for CSV export"""
-        flattened = {}
+        return flatten_property_data(data)
+
+
+def save_properties(properties, filename_prefix="massachusetts_properties"):
+    """Save a list of property_data dicts to JSON and CSV (used by the scraper and by the worker pool)"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    if properties:
+        # Save to JSON
+        json_filename = f"{filename_prefix}_{timestamp}.json"
+        with open(json_filename, 'w') as f:
+            json.dump(properties, f, indent=2)
         
-        for key, value in data.items():
-            if isinstance(value, list):
-                flattened[key] = '; '.join(str(item) for item in value)
-            elif isinstance(value, dict):
-                for nested_key, nested_value in value.items():
-                    if isinstance(nested_value, dict):
-                        for deep_key, deep_value in nested_value.items():
-                            flattened[f"{key}_{nested_key}_{deep_key}"] = deep_value
-                    else:
-                        flattened[f"{key}_{nested_key}"] = nested_value
-            else:
-                flattened[key] = value
+        # Save to CSV
+        csv_filename = f"{filename_prefix}_{timestamp}.csv"
+        flattened_data = []
+        for property_data in properties:
+            flattened_data.append(flatten_property_data(property_data))
         
-        return flattened 
\ No newline at end of file
+        df = pd.DataFrame(flattened_data)
+        df.to_csv(csv_filename, index=False)
+        
+        print(f"\n📁 All properties saved:")
+        print(f"   • {json_filename} (structured)")
+        print(f"   • {csv_filename} (flattened)")
+        print(f"   • Total properties: {len(properties)}")
+        
+        return json_filename, csv_filename  # ✅ Return both files
+    else:
+        print("No properties data to save")
+        return None, None
+
+
+def flatten_property_data(data):
+    """Flatten nested data for CSV export"""
+    flattened = {}
+    
+    for key, value in data.items():
+        if isinstance(value, list):
+            flattened[key] = '; '.join(str(item) for item in value)
+        elif isinstance(value, dict):
+            for nested_key, nested_value in value.items():
+                if isinstance(nested_value, dict):
+                    for deep_key, deep_value in nested_value.items():
+                        flattened[f"{key}_{nested_key}_{deep_key}"] = deep_value
+                else:
+                    flattened[f"{key}_{nested_key}"] = nested_value
+        else:
+            flattened[key] = value
+    
+    return flattened
\ No newline at end of file